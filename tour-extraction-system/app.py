@@ -4,12 +4,19 @@ Permite upload de PDF e download do resultado refinado.
 """
 import streamlit as st
 import os
+import queue
 import tempfile
+import itertools
+import threading
 import pandas as pd
 from io import BytesIO
 from dotenv import load_dotenv
+from streamlit.runtime.scriptrunner import add_script_run_ctx
+from src.core.catalog_model import CompactCatalog
 from src.core.config import SystemConfig
 from src.pipeline import TourExtractionPipeline
+from src.processors.result_exporter import excel_columns, iter_excel_rows
+from src.processors.revision_tracker import catalog_key
 
 # Carrega variáveis de ambiente
 load_dotenv()
@@ -49,6 +56,64 @@ class StreamlitLogger:
                 st.text(f"{icon} {msg}")
 
 
+def json_mime(file_name: str) -> str:
+    """Tipo MIME do catálogo conforme formato e compressão (export.json)"""
+    if file_name.endswith(".gz"):
+        return "application/gzip"
+    if file_name.endswith(".zst"):
+        return "application/zstd"
+    return "application/x-ndjson" if file_name.endswith(".jsonl") else "application/json"
+
+
+def extract_streaming(extractor, reuse=None):
+    """
+    Executa a extração em segundo plano e exibe cada tour assim que chega.
+    
+    O callback on_tour roda nas threads do extrator; os tours passam por uma
+    fila e a tabela é atualizada pela thread do script.
+    """
+    tours_queue = queue.Queue()
+    result = {}
+    
+    def run():
+        try:
+            result["catalog"] = extractor.extract(reuse)
+        except Exception as e:
+            result["error"] = e
+    
+    extractor.on_tour = tours_queue.put
+    worker = threading.Thread(target=run, daemon=True)
+    add_script_run_ctx(worker)
+    worker.start()
+    
+    counter = st.empty()
+    table = st.empty()
+    rows = []
+    while worker.is_alive() or not tours_queue.empty():
+        try:
+            tours = [tours_queue.get(timeout=0.5)]
+        except queue.Empty:
+            continue
+        # Esvazia a fila antes de redesenhar (menos atualizações da tabela)
+        while not tours_queue.empty():
+            tours.append(tours_queue.get_nowait())
+        for tour in tours:
+            rows.append({
+                "Título": tour.get("title"),
+                "Cidade": tour.get("city"),
+                "Página": ", ".join(tour.get("source_chunks") or []),
+            })
+        counter.caption(f"{len(rows)} tours recebidos (prévia, antes da consolidação)")
+        table.dataframe(pd.DataFrame(rows), width='stretch', hide_index=True)
+    worker.join()
+    counter.empty()
+    table.empty()
+    
+    if "error" in result:
+        raise result["error"]
+    return result["catalog"]
+
+
 def main():
     """Interface principal do Streamlit."""
     
@@ -67,6 +132,8 @@ def main():
         st.session_state.xlsx_data = None
     if 'json_data' not in st.session_state:
         st.session_state.json_data = None
+    if 'json_name' not in st.session_state:
+        st.session_state.json_name = "tours_extracted.json"
     if 'df_preview' not in st.session_state:
         st.session_state.df_preview = None
     if 'stats' not in st.session_state:
@@ -78,11 +145,6 @@ def main():
     Extraia informações estruturadas de catálogos turísticos em PDF usando IA.
     """)
     
-    # Verificação de API Key
-    if not os.getenv("OPENAI_API_KEY"):
-        st.error("⚠️ OPENAI_API_KEY não encontrada no arquivo .env")
-        st.stop()
-    
     # Sidebar com configurações (opcional, limpa)
     with st.sidebar:
         st.header("⚙️ Configurações")
@@ -91,6 +153,17 @@ def main():
             value="config/settings.yaml",
             help="Caminho para o arquivo YAML de configuração"
         )
+        backend = st.selectbox(
+            "Backend de extração",
+            options=["crewai", "local"],
+            format_func=lambda b: "CrewAI (API OpenAI)" if b == "crewai" else "Local (CPU, sem rede)",
+            help="Local: modelo GGUF via llama.cpp; o catálogo não sai da máquina"
+        )
+        streaming = st.checkbox(
+            "Mostrar tours durante a extração",
+            value=SystemConfig.from_yaml(config_file).streaming_enabled,
+            help="Respostas em streaming: cada tour aparece assim que é extraído"
+        )
         
         st.markdown("---")
         st.markdown("### 📊 Sobre o Sistema")
@@ -100,6 +173,12 @@ def main():
         - **Saída**: Excel completo + JSON estruturado
         """)
     
+    # Verificação de API Key (dispensável no backend local ou com endpoint próprio)
+    if backend == "crewai" and not os.getenv("OPENAI_API_KEY"):
+        if not SystemConfig.from_yaml(config_file).llm_base_url:
+            st.error("⚠️ OPENAI_API_KEY não encontrada no arquivo .env")
+            st.stop()
+    
     # Upload de arquivo
     st.header("📁 Upload do Catálogo")
     uploaded_file = st.file_uploader(
@@ -138,6 +217,8 @@ def main():
                 
                 # Carrega configuração
                 config = SystemConfig.from_yaml(config_file)
+                config.extraction_backend = backend
+                config.streaming_enabled = streaming and backend == "crewai"
                 
                 # Cria logger customizado
                 logger = StreamlitLogger(status_container)
@@ -150,28 +231,39 @@ def main():
                 progress_bar.progress(10)
                 logger.info("[1/4] Processando PDF...")
                 pipeline.chunker.setup()
-                pipeline.chunker.process(tmp_path)
+                tracker = pipeline.tracker
+                # Arquivo temporário tem nome aleatório: o catálogo é identificado pelo nome enviado
+                reuse_pages = tracker.start(tmp_path, catalog_key(uploaded_file.name), uploaded_file.name) if tracker else None
+                pipeline.chunker.process(tmp_path, reuse=reuse_pages)
                 
                 # Etapa 2: Indexação
                 progress_bar.progress(30)
                 logger.info("[2/4] Criando índice semântico...")
                 pipeline.indexer.setup()
                 pipeline.indexer.load_chunks()
-                pipeline.indexer.create_index()
+                pipeline.indexer.create_index(reuse=tracker.embeddings() if tracker else None)
                 
                 # Etapa 3: Extração
                 progress_bar.progress(50)
                 logger.info("[3/4] Extraindo informações com IA...")
                 pipeline.extractor.setup()
-                catalog = pipeline.extractor.extract()
+                reuse = tracker.plan(pipeline.indexer.embeddings, pipeline.indexer.md_files) if tracker else None
+                if config.streaming_enabled:
+                    catalog = extract_streaming(pipeline.extractor, reuse)
+                else:
+                    catalog = pipeline.extractor.extract(reuse)
                 
                 # Etapa 4: Exportação
                 progress_bar.progress(80)
                 logger.info("[4/4] Gerando arquivos de saída...")
-                json_path, xlsx_path = pipeline.exporter.export(catalog)
+                catalog = CompactCatalog.from_dict(catalog)
+                json_path, xlsx_path = pipeline.exporter.export(catalog, source=uploaded_file.name)
+                if tracker:
+                    tracker.finish(catalog, pipeline.extractor.page_results, pipeline.extractor.catalog_metadata,
+                                   pipeline.indexer.texts, pipeline.indexer.embeddings)
                 
                 # Refinamento (apenas para debug interno)
-                refined_path = pipeline.refiner.refine(json_path)
+                refined_path = pipeline.refiner.refine(catalog)
                 
                 progress_bar.progress(100)
                 logger.info("✅ Processamento concluído com sucesso!")
@@ -179,28 +271,23 @@ def main():
                 # Limpa arquivo temporário
                 os.unlink(tmp_path)
                 
-                # Carrega Excel completo para session_state
-                df_complete = pd.read_excel(xlsx_path)
-                
                 # Armazena dados no session_state
                 with open(xlsx_path, "rb") as f:
                     st.session_state.xlsx_data = f.read()
                 
                 with open(json_path, "rb") as f:
                     st.session_state.json_data = f.read()
+                st.session_state.json_name = os.path.basename(json_path)
                 
-                st.session_state.df_preview = df_complete.head(100)
-                
-                # Calcula estatísticas do Excel completo
-                total_tours = len(df_complete)
-                if "Location Main" in df_complete.columns:
-                    total_cities = df_complete["Location Main"].nunique()
-                else:
-                    total_cities = "N/A"
+                # Prévia e estatísticas a partir do catálogo em memória (sem reler o Excel)
+                st.session_state.df_preview = pd.DataFrame(
+                    list(itertools.islice(iter_excel_rows(catalog), 100)), columns=excel_columns(catalog)
+                )
                 
                 st.session_state.stats = {
-                    "total_tours": total_tours,
-                    "total_cities": total_cities
+                    "total_tours": len(catalog),
+                    "total_cities": len({record.location_main for record in catalog.tours
+                                         if record.location_main is not None})
                 }
                 
                 st.session_state.processed = True
@@ -260,8 +347,8 @@ def main():
             st.download_button(
                 label="📥 Download JSON Estruturado",
                 data=st.session_state.json_data,
-                file_name="tours_extracted.json",
-                mime="application/json",
+                file_name=st.session_state.json_name,
+                mime=json_mime(st.session_state.json_name),
                 width='stretch'
             )
     
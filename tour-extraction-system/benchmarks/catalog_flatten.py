@@ -0,0 +1,167 @@
+"""
+Compara os laços por tour sobre o catálogo compacto (caminho do pipeline:
+export Excel e refinamento a partir do CompactCatalog) com os laços sobre os
+dicts que o export Excel e o refinamento usavam antes, em um catálogo
+sintético. Mede só a geração das linhas (sem gravar arquivos) e confere que
+os dois caminhos produzem as mesmas linhas.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.catalog_flatten --tours 10000 100000
+"""
+import time
+import types
+import logging
+import argparse
+
+from benchmarks.excel_export import synthetic_catalog
+from src.core.catalog_model import CompactCatalog
+from src.processors.result_exporter import excel_columns, iter_excel_rows, _cell_value
+from src.processors.result_refiner import ResultRefiner
+
+REFINED_COLUMNS = ["Title", "Location_Main", "Description", "Duration", "Duration_Unit", "Min_Adults",
+                   "Observations", "Price", "Currency"]
+
+
+def legacy_excel_rows(tours):
+    """Laço anterior do export Excel: um dict por linha, montado tour a tour"""
+    for tour in tours:
+        duration = tour.get("duration", {})
+        location = tour.get("location", {})
+        schedule = tour.get("schedule", {})
+        operation = tour.get("operation", {})
+        duration = duration if isinstance(duration, dict) else {}
+        location = location if isinstance(location, dict) else {}
+        schedule = schedule if isinstance(schedule, dict) else {}
+        non_operating = operation.get("non_operating_periods", []) if isinstance(operation, dict) else []
+        base = {
+            "City": tour.get("city", ""),
+            "Title": tour.get("title", ""),
+            "Location Main": location.get("main", ""),
+            "Location Region": location.get("region", ""),
+            "Location Zone": location.get("zone", ""),
+            "Description": tour.get("description", ""),
+            "Duration": duration.get("quantity", ""),
+            "Duration Unit": duration.get("unit", ""),
+            "Departure Time": schedule.get("departure_time", ""),
+            "Return Time": schedule.get("return_time", ""),
+            "Frequency": schedule.get("frequency", ""),
+            "Meeting Point": tour.get("meeting_point", ""),
+            "Includes": "; ".join(tour.get("includes", [])),
+            "Excludes": "; ".join(tour.get("excludes", [])),
+            "Language Options": "; ".join(tour.get("language_options", [])),
+            "Min Adults": tour.get("min_adults", ""),
+            "Max Adults": tour.get("max_adults", ""),
+            "Max Children": tour.get("max_childrens", ""),
+            "Min Booking": tour.get("min_booking", ""),
+            "Non Operating Periods": "; ".join(str(p) for p in non_operating),
+            "Observations": tour.get("observations", ""),
+            "Source Chunks": "; ".join(tour.get("source_chunks", [])),
+            "Pricing Type": tour.get("pricing_type", ""),
+        }
+        pricing_type = tour.get("pricing_type", "")
+        if pricing_type == "per_vehicle" and tour.get("options"):
+            for opt in tour["options"]:
+                details = opt.get("details", [])
+                if not details:
+                    yield {**base, "Option Name": opt.get("name_option", "")}
+                for detail in details:
+                    price = detail.get("price", {})
+                    price = price if isinstance(price, dict) else {}
+                    yield {**base, "Option Name": opt.get("name_option", ""),
+                           "Capacity": detail.get("capacity", ""), "Vehicle Options": detail.get("vehicle_options", ""),
+                           "Price": price.get("quantity", ""), "Currency": price.get("currency", "")}
+        elif pricing_type == "per_person" and tour.get("pricing_matrix"):
+            for pax in tour["pricing_matrix"]:
+                yield {**base, "Pax Count": pax.get("pax_count", ""), "Price": pax.get("price", ""),
+                       "Currency": pax.get("currency", "")}
+        else:
+            yield base
+
+
+def legacy_refined_records(tours):
+    """Laço anterior do refinamento: menor preço por tour e remoção de duplicatas"""
+    refined, seen = [], set()
+    for tour in tours:
+        location = tour.get("location", {})
+        duration = tour.get("duration", {})
+        min_price, min_currency = None, None
+        for option in tour.get("options", []) if isinstance(tour.get("options"), list) else []:
+            for detail in option.get("details", []):
+                price_info = detail.get("price", {})
+                price = price_info.get("quantity")
+                if price is not None and (min_price is None or price < min_price):
+                    min_price, min_currency = price, price_info.get("currency")
+        record = {
+            "Title": tour.get("title"),
+            "Location_Main": location.get("main") if isinstance(location, dict) else tour.get("location_main", ""),
+            "Description": tour.get("description"),
+            "Duration": duration.get("quantity") if isinstance(duration, dict) else tour.get("duration"),
+            "Duration_Unit": duration.get("unit") if isinstance(duration, dict) else tour.get("duration_unit"),
+            "Min_Adults": tour.get("min_booking") or tour.get("min_adults"),
+            "Observations": tour.get("observations", ""),
+            "Price": min_price if min_price is not None else "",
+            "Currency": min_currency if min_currency is not None else "",
+        }
+        key = (str(record["Title"]).strip().lower(), str(record["Location_Main"]).strip().lower())
+        if key not in seen and key != ("", ""):
+            seen.add(key)
+            refined.append(record)
+    return refined
+
+
+def _blank(value):
+    value = _cell_value(value)
+    return None if value == "" else value
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def run(n: int):
+    data = synthetic_catalog(n)
+    tours = data["tours"]
+    refiner = ResultRefiner(types.SimpleNamespace(dedup_fuzzy=False), logging.getLogger("bench"))
+
+    # Export Excel: linhas completas (valores na ordem das colunas)
+    legacy_excel_s, legacy_rows = timed(lambda: [list(row.values()) for row in legacy_excel_rows(tours)])
+    # O pipeline já monta o catálogo compacto ao fim da extração; medido à parte
+    catalog_s, catalog = timed(lambda: CompactCatalog.from_dict(data))
+    rows_s, rows = timed(lambda: [list(row.values()) for row in iter_excel_rows(catalog)])
+    columns = excel_columns(catalog)
+
+    # Refinamento: registros únicos com o menor preço
+    legacy_refine_s, legacy_refined = timed(lambda: legacy_refined_records(tours))
+    refine_s, refined = timed(lambda: refiner._remove_duplicates(refiner._extract_refined_records(catalog)))
+
+    same_excel = len(legacy_rows) == len(rows) and all(
+        [_blank(old.get(c)) for c in columns] == [_blank(new.get(c)) for c in columns]
+        for old, new in zip(legacy_excel_rows(tours), iter_excel_rows(catalog))
+    )
+    same_refined = len(legacy_refined) == len(refined) and all(
+        [_blank(old[c]) for c in REFINED_COLUMNS] == [_blank(new[c]) for c in REFINED_COLUMNS]
+        for old, new in zip(legacy_refined, refined)
+    )
+    del legacy_rows, rows
+
+    print(f"\n{n} tours ({len(catalog.detail_price)} linhas de preço)")
+    print(f"  catálogo compacto (from_dict):   {catalog_s:>7.2f}s")
+    print(f"  excel laço anterior (dicts):     {legacy_excel_s:>7.2f}s")
+    print(f"  excel laço (catálogo compacto):  {rows_s:>7.2f}s  mesmas linhas: {'sim' if same_excel else 'NÃO'}")
+    print(f"  refino laço anterior (dicts):    {legacy_refine_s:>7.2f}s")
+    print(f"  refino laço (catálogo compacto): {refine_s:>7.2f}s  "
+          f"mesmos registros: {'sim' if same_refined else 'NÃO'}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Linhas do Excel e do refinamento: catálogo compacto x dicts")
+    parser.add_argument("--tours", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+    for n in args.tours:
+        run(n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Memória por tour e tempo de export do catálogo compacto (CompactCatalog:
+TourRecord com __slots__ e colunas de preço em arrays) comparados com o
+catálogo em dicts aninhados.
+
+O catálogo sintético passa por JSON antes de cada medição para que cada
+texto seja um objeto próprio, como na saída real do extrator. A memória é a
+alocada (tracemalloc) pelo catálogo já construído; o export grava JSON
+compacto e o Excel completo a partir das tabelas do catálogo.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.catalog_memory --tours 10000 100000
+"""
+import gc
+import os
+import time
+import types
+import logging
+import argparse
+import tracemalloc
+
+from benchmarks.excel_export import synthetic_catalog
+from src.core.catalog_model import CompactCatalog
+from src.processors.catalog_tables import catalog_tables
+from src.processors.result_exporter import ResultExporter
+from src.utils.catalog_io import dumps, loads, write_catalog
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def traced_size(build):
+    """Bytes alocados e ainda vivos no objeto retornado por build"""
+    gc.collect()
+    tracemalloc.start()
+    obj = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size, obj
+
+
+def export_times(exporter: ResultExporter, catalog, name: str, out_dir: str):
+    """
+    Etapas do export: tabelas (catalog_tables), Excel completo e JSON compacto.
+    Com dicts é o caminho anterior (tabelas dos tours aninhados, JSON do próprio dict).
+    """
+    tours = catalog if isinstance(catalog, CompactCatalog) else catalog["tours"]
+    tables_s, tables = timed(lambda: catalog_tables(tours))
+    excel_s, _ = timed(lambda: exporter._write_excel(os.path.join(out_dir, f"bench_{name}.xlsx"), tables))
+    json_s, _ = timed(lambda: write_catalog(catalog, os.path.join(out_dir, f"bench_{name}"), "compact"))
+    return tables_s, excel_s, json_s
+
+
+def run(n: int, out_dir: str):
+    data = dumps(synthetic_catalog(n))
+
+    # from_dict reaproveita os textos do dict: o compacto é medido com o dict já descartado
+    compact_bytes, compact = traced_size(lambda: CompactCatalog.from_dict(loads(data)))
+    n_prices = len(compact.detail_price) + len(compact.matrix_price)
+    del compact
+    dict_bytes, catalog = traced_size(lambda: loads(data))
+
+    exporter = ResultExporter(types.SimpleNamespace(results_dir=out_dir), logging.getLogger("bench"))
+    convert_s, compact = timed(lambda: CompactCatalog.from_dict(catalog))
+    times = {"dicts": export_times(exporter, catalog, "dicts", out_dir),
+             "compacto": export_times(exporter, compact, "compact", out_dir)}
+
+    print(f"\n{n} tours ({n_prices} linhas de preço)")
+    print(f"  memória dicts:      {dict_bytes / 2**20:>8.1f} MB  ({dict_bytes / n:>6.0f} B/tour)")
+    print(f"  memória compacto:   {compact_bytes / 2**20:>8.1f} MB  ({compact_bytes / n:>6.0f} B/tour, "
+          f"{1 - compact_bytes / dict_bytes:.0%} menor)")
+    print(f"  conversão dicts -> compacto: {convert_s:.2f}s (uma vez, após a extração)")
+    print(f"  {'export':<10}{'tabelas':>9}{'Excel':>9}{'JSON':>8}{'total':>9}")
+    for name, (tables_s, excel_s, json_s) in times.items():
+        print(f"  {name:<10}{tables_s:>8.2f}s{excel_s:>8.2f}s{json_s:>7.2f}s{tables_s + excel_s + json_s:>8.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Catálogo compacto x dicts aninhados: memória e export")
+    parser.add_argument("--tours", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--out", default="output/benchmarks")
+    args = parser.parse_args()
+    os.makedirs(args.out, exist_ok=True)
+    for n in args.tours:
+        run(n, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Consultas típicas no banco SQLite do catálogo (CatalogStore) comparadas com
+a alternativa sem banco: ler todos os JSON de saída e filtrar os tours.
+
+Gera --docs catálogos sintéticos de --tours tours cada (um JSON compacto por
+documento, como vários tours_extracted.json guardados), mede o upsert de
+todos no banco (e um segundo upsert do primeiro documento, o caso de
+reprocessar um PDF) e confere que as duas abordagens retornam os mesmos tours.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.catalog_store --docs 20 --tours 5000
+"""
+import os
+import glob
+import time
+import argparse
+
+from benchmarks.excel_export import synthetic_catalog
+from src.processors.catalog_store import CatalogStore
+from src.utils.catalog_io import read_catalog, write_catalog
+
+
+def timed(fn, repeat: int = 1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def tour_prices(tour):
+    """(preço, moeda) de todas as linhas de preço do tour"""
+    for entry in tour.get("pricing_matrix") or []:
+        yield entry.get("price"), entry.get("currency")
+    for option in tour.get("options") or []:
+        for detail in option.get("details") or []:
+            price = detail.get("price") or {}
+            yield price.get("quantity"), price.get("currency")
+
+
+def json_scan(paths, city=None, title=None, currency=None, min_price=None, max_price=None, source=None):
+    """Mesmos filtros de CatalogStore.find_tours, lendo e percorrendo cada JSON"""
+    found = []
+    for path in paths:
+        name = os.path.basename(path).split(".")[0]
+        if source is not None and name != source:
+            continue
+        for tour in read_catalog(path)["tours"]:
+            if city is not None and str(tour.get("city") or "").lower() != city.lower():
+                continue
+            if title is not None and not str(tour.get("title") or "").lower().startswith(title.lower()):
+                continue
+            if currency is not None or min_price is not None or max_price is not None:
+                if not any(isinstance(p, (int, float))
+                           and (currency is None or c == currency)
+                           and (min_price is None or p >= min_price)
+                           and (max_price is None or p <= max_price)
+                           for p, c in tour_prices(tour)):
+                    continue
+            found.append((name, tour.get("title")))
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consultas no banco SQLite x varredura dos JSON de saída")
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--tours", type=int, default=5000, help="Tours por documento")
+    parser.add_argument("--repeat", type=int, default=20, help="Repetições de cada consulta no banco")
+    parser.add_argument("--out", default="output/benchmarks/catalog_store")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    for path in glob.glob(os.path.join(args.out, "*")):
+        os.remove(path)
+    db_path = os.path.join(args.out, "catalog.db")
+
+    catalogs = {}
+    for i in range(args.docs):
+        catalog = synthetic_catalog(args.tours)
+        for tour in catalog["tours"]:
+            tour["title"] = f"{tour['title']} d{i}"
+        catalogs[f"doc{i:03d}"] = catalog
+        write_catalog(catalog, os.path.join(args.out, f"doc{i:03d}"), "compact")
+    paths = sorted(glob.glob(os.path.join(args.out, "doc*.json")))
+    total = args.docs * args.tours
+
+    with CatalogStore(db_path) as store:
+        load_s, _ = timed(lambda: [store.upsert(catalog, source) for source, catalog in catalogs.items()])
+        first = next(iter(catalogs))
+        reupsert_s, _ = timed(lambda: store.upsert(catalogs[first], first))
+        print(f"{args.docs} documentos x {args.tours} tours = {total} tours | "
+              f"JSON: {sum(os.path.getsize(p) for p in paths) / 2**20:.1f} MB | "
+              f"banco: {os.path.getsize(db_path) / 2**20:.1f} MB")
+        print(f"upsert de todos os documentos: {load_s:.2f}s | reprocessar um documento: {reupsert_s:.2f}s\n")
+
+        sample = catalogs[first]["tours"][0]
+        queries = {
+            "cidade": dict(city=sample["city"]),
+            "início do título": dict(title=sample["title"][:12]),
+            "moeda + preço máximo": dict(currency="USD", max_price=60),
+            "cidade + moeda + faixa": dict(city=sample["city"], currency="EUR", min_price=150, max_price=200),
+            "documento de origem": dict(source=first),
+        }
+        print(f"{'consulta':<26}{'tours':>8}{'SQLite':>11}{'JSON':>10}{'ganho':>9}  mesmos tours")
+        for label, filters in queries.items():
+            db_s, rows = timed(lambda: store.find_tours(limit=None, **filters), args.repeat)
+            scan_s, scanned = timed(lambda: json_scan(paths, **filters))
+            same = sorted((r["source"], r["title"]) for r in rows) == sorted(scanned)
+            print(f"{label:<26}{len(rows):>8}{db_s * 1000:>9.1f}ms{scan_s:>9.2f}s{scan_s / db_s:>8.0f}x  "
+                  f"{'sim' if same else 'NÃO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""
+Compara o export Excel em streaming (openpyxl write-only) com o export
+anterior (lista de linhas -> DataFrame -> to_excel) em um catálogo sintético.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.excel_export --tours 100000
+
+Cada modo roda em um subprocesso próprio para que o pico de RSS de um não
+contamine o outro. "catálogo" é o RSS com o catálogo já em memória; "pico"
+é o máximo do processo durante a exportação.
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import subprocess
+
+from src.utils.profiler import current_rss
+
+CITIES = ["Paris", "Lyon", "Nice", "Roma", "Madrid", "Lisboa", "Cusco", "Buenos Aires"]
+
+
+def synthetic_catalog(n: int, seed: int = 7):
+    """Catálogo com a mistura de formatos de preço dos catálogos reais"""
+    rng = random.Random(seed)
+    tours = []
+    for i in range(n):
+        tour = {
+            "city": rng.choice(CITIES),
+            "title": f"Tour {i} " + rng.choice(["Panorâmico", "Gastronômico", "Noturno", "Privativo"]),
+            "description": "Roteiro com paradas nos principais pontos turísticos. " * rng.randint(2, 8),
+            "duration": {"quantity": rng.choice([2, 4, 8]), "unit": "hours"},
+            "schedule": {"departure_time": "09:00", "frequency": "Diário"},
+            "includes": ["Guia", "Transporte"],
+            "language_options": ["en", "es", "pt"],
+            "observations": "Suplemento noturno de 20%. " * rng.randint(0, 3),
+            "source_chunks": [f"page_{i // 5 + 1}.md"],
+        }
+        if i % 3 == 0:
+            tour["pricing_type"] = "per_person"
+            tour["pricing_matrix"] = [
+                {"pax_count": pax, "price": round(rng.uniform(40, 300), 2), "currency": "USD"} for pax in range(1, 7)
+            ]
+        else:
+            tour["pricing_type"] = "per_vehicle"
+            tour["options"] = [
+                {"name_option": name, "details": [
+                    {"capacity": cap, "vehicle_options": vehicle,
+                     "price": {"quantity": round(rng.uniform(100, 900), 2), "currency": "EUR"}}
+                    for cap, vehicle in (("01-03 pax", "car"), ("04-07 pax", "van"), ("08-16 pax", "minibus"))
+                ]}
+                for name in ("Half day", "Full day")
+            ]
+        tours.append(tour)
+    return {"agency": "Benchmark", "product": {"type": "Tours"}, "tours": tours}
+
+
+def peak_rss() -> int:
+    """Pico de RSS do processo em bytes (atual, se o SO não informa o pico)"""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return current_rss() or 0
+
+
+def run_worker(mode: str, n: int, out_dir: str):
+    """Executa um modo e imprime o resultado em JSON (última linha)"""
+    import types
+    import logging
+    import pandas as pd
+    from src.core.catalog_model import CompactCatalog
+    from src.processors.result_exporter import ResultExporter, iter_excel_rows
+
+    catalog = synthetic_catalog(n)
+    catalog_rss = current_rss() or peak_rss()
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"bench_{mode}.xlsx")
+
+    start = time.perf_counter()
+    if mode == "streaming":
+        exporter = ResultExporter(types.SimpleNamespace(results_dir=out_dir), logging.getLogger("bench"))
+        rows = exporter._write_excel(path, CompactCatalog.from_dict(catalog))
+    else:
+        # Export anterior: todas as linhas em memória antes do DataFrame
+        frame = pd.DataFrame(list(iter_excel_rows(CompactCatalog.from_dict(catalog))))
+        rows = len(frame)
+        frame.to_excel(path, index=False, engine="openpyxl")
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "mode": mode,
+        "rows": rows,
+        "seconds": elapsed,
+        "catalog_mb": catalog_rss / 2**20,
+        "peak_mb": peak_rss() / 2**20,
+        "file_mb": os.path.getsize(path) / 2**20,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export Excel: streaming write-only x DataFrame")
+    parser.add_argument("--tours", type=int, default=100000)
+    parser.add_argument("--modes", nargs="+", default=["streaming", "dataframe"], choices=["streaming", "dataframe"])
+    parser.add_argument("--out", default="output/benchmarks")
+    parser.add_argument("--worker", choices=["streaming", "dataframe"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.tours, args.out)
+        return
+
+    print(f"Catálogo sintético: {args.tours} tours")
+    print(f"{'modo':<11}{'linhas':>10}{'tempo':>9}{'catálogo':>11}{'pico':>10}{'export':>10}{'arquivo':>10}")
+    for mode in args.modes:
+        result = subprocess.run(
+            [sys.executable, "-m", "benchmarks.excel_export", "--worker", mode,
+             "--tours", str(args.tours), "--out", args.out],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            # -9/137: processo encerrado pelo SO, tipicamente por falta de memória
+            print(f"{mode:<11} falhou (código {result.returncode}): {result.stderr.strip()[-200:]}")
+            continue
+        r = json.loads(result.stdout.strip().splitlines()[-1])
+        print(f"{r['mode']:<11}{r['rows']:>10}{r['seconds']:>8.1f}s{r['catalog_mb']:>9.0f}MB{r['peak_mb']:>8.0f}MB"
+              f"{r['peak_mb'] - r['catalog_mb']:>8.0f}MB{r['file_mb']:>8.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Benchmark de carga da etapa de extração contra o servidor LLM falso (sem rede
+e sem custo). Mede tempo total, vazão e o comportamento de concorrência/rate
+limit do extrator diante de latência e falhas simuladas.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.extraction_load --chunks output/chunks \
+        --reference output/results/tours_extracted.json \
+        --latency-median 1.5 --latency-sigma 0.5 --rate-429 0.05 --workers 5
+
+Com --mode replay, as respostas gravadas (modo record do servidor) são
+reutilizadas e os prompts sem gravação recebem respostas sintéticas.
+"""
+import os
+import time
+import argparse
+
+from src.core.config import SystemConfig
+from src.core.logger import Logger
+from src.processors.tour_extractor import TourExtractor
+from src.utils.fake_llm_server import FakeLLMBackend, start_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga da extração contra servidor LLM local")
+    parser.add_argument("--chunks", default="output/chunks")
+    parser.add_argument("--reference", default="output/results/tours_extracted.json")
+    parser.add_argument("--config", default="config/settings.yaml")
+    parser.add_argument("--mode", choices=["replay", "synth"], default="synth")
+    parser.add_argument("--recordings", default="output/llm_recordings")
+    parser.add_argument("--latency-median", type=float, default=1.0)
+    parser.add_argument("--latency-sigma", type=float, default=0.4)
+    parser.add_argument("--output-tps", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--server-rpm", type=int, default=0, help="Limite de RPM imposto pelo servidor")
+    parser.add_argument("--workers", type=int, default=None, help="Sobrescreve extraction.max_workers")
+    parser.add_argument("--rate-limit", type=int, default=None, help="Sobrescreve extraction.rate_limit_per_minute")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    backend = FakeLLMBackend(
+        mode=args.mode, recordings_dir=args.recordings, reference=args.reference,
+        latency_median=args.latency_median, latency_sigma=args.latency_sigma, output_tps=args.output_tps,
+        error_rate=args.error_rate, rate_429=args.rate_429, rpm=args.server_rpm, seed=args.seed,
+    )
+    server = start_server(backend)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+    config = SystemConfig.from_yaml(args.config)
+    config.llm_base_url = base_url
+    config.routing_tiers = [{**tier, "base_url": base_url} for tier in config.routing_tiers]
+    if args.workers:
+        config.max_workers = args.workers
+    if args.rate_limit:
+        config.rate_limit = args.rate_limit
+
+    extractor = TourExtractor(config, Logger("WARNING"))
+    extractor.setup()
+    # files.json pode conter caminhos de outra máquina: usa os chunks do diretório informado
+    files = sorted(fn for fn in os.listdir(args.chunks) if fn.endswith(".md"))
+    extractor.md_files = [os.path.join(args.chunks, fn) for fn in files]
+    extractor.texts = []
+    for path in extractor.md_files:
+        with open(path, "r", encoding="utf-8") as f:
+            extractor.texts.append(f.read().strip())
+
+    start = time.perf_counter()
+    catalog = extractor.extract()
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    summary = backend.summary()
+    requests = summary.get("requests", 0)
+    print(f"Servidor: {base_url} ({args.mode}) | workers={config.max_workers} rpm={config.rate_limit}")
+    print(f"Páginas: {len(files)} | tours: {len(catalog['tours'])} | tempo total: {elapsed:.1f}s")
+    print(f"Requisições: {requests} ({requests / elapsed * 60 if elapsed else 0:.0f}/min) | "
+          f"ok={summary.get('ok', 0)} 429={summary.get('rate_limited', 0) + summary.get('injected_429', 0)} "
+          f"500={summary.get('injected_errors', 0)}")
+    if args.mode == "replay":
+        print(f"Gravações: {summary.get('replay_hits', 0)} reutilizadas, {summary.get('replay_misses', 0)} sintetizadas")
+    if "latency_p50_s" in summary:
+        print(f"Latência simulada: p50 {summary['latency_p50_s']:.2f}s, p95 {summary['latency_p95_s']:.2f}s")
+    for name, stats in extractor.router.stats.items():
+        if stats["calls"]:
+            print(f"Camada {name}: {stats['calls']} chamadas, {stats['escalations']} escalonadas, "
+                  f"latência média {stats['latency_s'] / stats['calls']:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
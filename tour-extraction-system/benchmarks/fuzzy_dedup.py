@@ -0,0 +1,118 @@
+"""
+Tempo da deduplicação difusa com blocagem em função do tamanho do corpus,
+comparado com a comparação de todos os pares (medida só nos corpus pequenos).
+
+O corpus sintético tem títulos de 3 a 5 palavras por cidade e uma fração de
+quase duplicatas injetadas (palavras trocadas de ordem, erro de digitação,
+caixa, preço com variação de até 5%), usada para medir a cobertura
+(duplicatas removidas) e os falsos positivos (originais removidos).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.fuzzy_dedup --sizes 10000 50000 100000 300000
+"""
+import time
+import types
+import random
+import logging
+import argparse
+
+from benchmarks.excel_export import CITIES
+from src.processors.tour_dedup import FuzzyDeduplicator
+
+SYLLABLES = ["ba", "lo", "mi", "ra", "te", "no", "vi", "sa", "qu", "el", "ar", "to", "pe", "du", "ca", "ri"]
+KINDS = ["tour", "visit", "excursion", "walk", "cruise", "transfer", "experience", "tasting"]
+
+
+def synthetic_corpus(n: int, duplicate_rate: float = 0.1, seed: int = 11):
+    """
+    Returns:
+        titles, cities, prices e, para cada registro, se é uma duplicata injetada
+    """
+    rng = random.Random(seed)
+    vocabulary = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(20000)})
+    titles, cities, prices, injected = [], [], [], []
+    while len(titles) < n:
+        if titles and rng.random() < duplicate_rate:
+            source = rng.randrange(len(titles))
+            if injected[source]:
+                continue
+            words = titles[source].split()
+            change = rng.choice(["shuffle", "typo", "case"])
+            if change == "shuffle":
+                rng.shuffle(words)
+            elif change == "typo":
+                pos = rng.randrange(len(words))
+                word = words[pos]
+                if len(word) > 4:
+                    cut = rng.randrange(1, len(word) - 1)
+                    words[pos] = word[:cut] + word[cut + 1:]
+            else:
+                words = [w.upper() for w in words]
+            titles.append(" ".join(words))
+            cities.append(cities[source])
+            prices.append(round(prices[source] * rng.uniform(0.97, 1.03), 2) if prices[source] else None)
+            injected.append(True)
+        else:
+            words = [rng.choice(vocabulary) for _ in range(rng.randint(2, 4))] + [rng.choice(KINDS)]
+            rng.shuffle(words)
+            titles.append(" ".join(words))
+            cities.append(rng.choice(CITIES))
+            prices.append(round(rng.uniform(20, 900), 2) if rng.random() > 0.1 else None)
+            injected.append(False)
+    return titles, cities, prices, injected
+
+
+def all_pairs(dedup: FuzzyDeduplicator, titles, cities, prices):
+    """Mesmo critério da deduplicação, comparando cada tour com todos os mantidos"""
+    from difflib import SequenceMatcher
+    from src.processors.tour_merger import normalize_text, title_key
+    config = dedup.config
+    matcher = SequenceMatcher(None, autojunk=False)
+    keys = [title_key(t, c) for t, c in zip(titles, cities)]
+    city_keys = [normalize_text(c) for c in cities]
+    values = [dedup._price(p) for p in prices]
+    kept = []
+    for i, key in enumerate(keys):
+        numbers = {t for t in key.split() if t.isdigit()}
+        matcher.set_seq2(key)
+        if not any(city_keys[i] == city_keys[j] and dedup._similar(matcher, keys[j], numbers, config.dedup_title_threshold)
+                   and dedup._same_price(values[i], values[j], config.dedup_price_tolerance) for j in kept):
+            kept.append(i)
+    return len(keys) - len(kept)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicação difusa com blocagem: tempo x tamanho do corpus")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000, 100000, 300000])
+    parser.add_argument("--threshold", type=float, default=0.85)
+    parser.add_argument("--price-tolerance", type=float, default=0.10)
+    parser.add_argument("--max-block", type=int, default=500)
+    parser.add_argument("--all-pairs-max", type=int, default=5000,
+                        help="Maior corpus em que a comparação de todos os pares também é medida")
+    args = parser.parse_args()
+
+    config = types.SimpleNamespace(dedup_title_threshold=args.threshold, dedup_price_tolerance=args.price_tolerance,
+                                   dedup_max_block_size=args.max_block)
+    dedup = FuzzyDeduplicator(config, logging.getLogger("bench"))
+
+    print(f"{'tours':>8}{'tempo':>9}{'comparações':>14}{'todos os pares':>16}{'removidos':>11}"
+          f"{'cobertura':>11}{'falsos +':>10}{'todos os pares (tempo)':>24}")
+    for n in sorted(set(args.sizes + [s for s in (1000, 2500) if s <= args.all_pairs_max])):
+        titles, cities, prices, injected = synthetic_corpus(n)
+        start = time.perf_counter()
+        flagged = dedup.duplicates(titles, cities, prices)
+        elapsed = time.perf_counter() - start
+        found = sum(1 for f, i in zip(flagged, injected) if f and i)
+        false_positives = sum(1 for f, i in zip(flagged, injected) if f and not i)
+        baseline = ""
+        if n <= args.all_pairs_max:
+            start = time.perf_counter()
+            removed = all_pairs(dedup, titles, cities, prices)
+            baseline = f"{time.perf_counter() - start:.1f}s ({removed} removidos)"
+        stats = dedup.stats
+        print(f"{n:>8}{elapsed:>8.2f}s{stats['comparisons']:>14}{stats['all_pairs']:>16}{stats['duplicates']:>11}"
+              f"{found / max(1, sum(injected)):>10.1%}{false_positives:>10}{baseline:>24}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Tempo de gravação, tamanho em disco e tempo de leitura do catálogo em cada
+formato/compressão de export.json, com o json da biblioteca padrão (export
+anterior: json.dump indent=2) como referência.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.json_export --tours 100000
+    python -m benchmarks.json_export --catalog output/results/tours_extracted.json
+"""
+import os
+import json
+import time
+import argparse
+
+from benchmarks.excel_export import synthetic_catalog
+from src.utils import catalog_io
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def stdlib_baseline(catalog, base_path: str):
+    """Export anterior: json.dump indentado e json.load"""
+    path = base_path + ".json"
+
+    def write():
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(catalog, f, ensure_ascii=False, indent=2)
+
+    def read():
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    write_s, _ = timed(write)
+    read_s, _ = timed(read)
+    return write_s, os.path.getsize(path), read_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serialização do catálogo: formatos e compressão")
+    parser.add_argument("--tours", type=int, default=100000)
+    parser.add_argument("--catalog", help="Catálogo de uma extração real (em vez do sintético)")
+    parser.add_argument("--out", default="output/benchmarks")
+    args = parser.parse_args()
+
+    catalog = catalog_io.read_catalog(args.catalog) if args.catalog else synthetic_catalog(args.tours)
+    os.makedirs(args.out, exist_ok=True)
+    base_path = os.path.join(args.out, "bench_catalog")
+
+    print(f"Catálogo: {len(catalog['tours'])} tours | orjson: {'sim' if catalog_io.orjson else 'não'}"
+          f" | zstandard: {'sim' if catalog_io.zstandard else 'não'}")
+    print(f"{'formato':<28}{'gravação':>10}{'tamanho':>11}{'leitura':>10}")
+    write_s, size, read_s = stdlib_baseline(catalog, base_path + "_stdlib")
+    print(f"{'json indent=2 (anterior)':<28}{write_s:>9.2f}s{size / 2**20:>9.1f}MB{read_s:>9.2f}s")
+
+    for fmt in catalog_io.FORMATS:
+        for compression in catalog_io.COMPRESSIONS:
+            if compression == "zstd" and catalog_io.zstandard is None:
+                continue
+            write_s, path = timed(lambda: catalog_io.write_catalog(catalog, base_path, fmt, compression))
+            read_s, loaded = timed(lambda: catalog_io.read_catalog(path))
+            assert len(loaded["tours"]) == len(catalog["tours"])
+            print(f"{fmt + ' / ' + compression:<28}{write_s:>9.2f}s{os.path.getsize(path) / 2**20:>9.1f}MB"
+                  f"{read_s:>9.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Vazão (tokens/s) e qualidade do backend local (llama.cpp em CPU) comparado a
+uma extração de referência.
+
+Uso (na raiz do projeto, um diretório de chunks por PDF):
+    python -m benchmarks.local_llm_quality --chunks output/chunks \
+        --reference output/results/tours_extracted.json \
+        --model models/qwen2.5-1.5b-instruct-q4_k_m.gguf
+
+Qualidade: recall/precisão de títulos normalizados e fração dos tours
+encontrados com o mesmo conjunto de preços da referência.
+"""
+import os
+import json
+import time
+import argparse
+
+from src.core.config import SystemConfig
+from src.core.logger import Logger
+from src.processors.tour_extractor import TourExtractor
+from src.processors.tour_merger import normalize_text, price_signature
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backend local: tokens/s e qualidade da extração")
+    parser.add_argument("--chunks", default="output/chunks")
+    parser.add_argument("--reference", default="output/results/tours_extracted.json")
+    parser.add_argument("--config", default="config/settings.yaml")
+    parser.add_argument("--model", default=None, help="Sobrescreve local_llm.model_path")
+    parser.add_argument("--threads", type=int, default=None)
+    args = parser.parse_args()
+
+    config = SystemConfig.from_yaml(args.config)
+    config.extraction_backend = "local"
+    if args.model:
+        config.local_model_path = args.model
+    if args.threads:
+        config.local_n_threads = args.threads
+
+    extractor = TourExtractor(config, Logger("WARNING"))
+    extractor.setup()
+    # files.json pode conter caminhos de outra máquina: usa os chunks do diretório informado
+    files = sorted(fn for fn in os.listdir(args.chunks) if fn.endswith(".md"))
+    extractor.md_files = [os.path.join(args.chunks, fn) for fn in files]
+    extractor.texts = []
+    for path in extractor.md_files:
+        with open(path, "r", encoding="utf-8") as f:
+            extractor.texts.append(f.read().strip())
+
+    start = time.perf_counter()
+    catalog = extractor.extract()
+    elapsed = time.perf_counter() - start
+
+    stats = extractor.local_llm.stats
+    print(f"Modelo: {os.path.basename(config.local_model_path)} | páginas: {len(files)} | tempo: {elapsed:.1f}s")
+    print(f"Chamadas: {stats['calls']} | tokens entrada/saída: {stats['prompt_tokens']}/{stats['completion_tokens']} | "
+          f"{extractor.local_llm.tokens_per_second():.1f} tokens/s | {elapsed / max(len(files), 1):.1f}s por página")
+
+    if not os.path.exists(args.reference):
+        return
+    with open(args.reference, "r", encoding="utf-8") as f:
+        reference = json.load(f).get("tours", [])
+
+    ref_by_title = {}
+    for tour in reference:
+        ref_by_title.setdefault(normalize_text(tour.get("title")), []).append(tour)
+    found = {normalize_text(t.get("title")) for t in catalog["tours"]}
+
+    matched = [t for t in catalog["tours"] if normalize_text(t.get("title")) in ref_by_title]
+    same_prices = sum(
+        1 for t in matched
+        if any(price_signature(r) == price_signature(t) for r in ref_by_title[normalize_text(t.get("title"))])
+    )
+    print(f"Tours: {len(catalog['tours'])} extraídos, {len(reference)} na referência")
+    print(f"Títulos: recall {len(found & set(ref_by_title)) / max(len(ref_by_title), 1):.0%}, "
+          f"precisão {len(matched) / max(len(catalog['tours']), 1):.0%} | "
+          f"preços idênticos em {same_prices}/{len(matched)} tours encontrados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Compara o Excel desnormalizado (tours_extracted.xlsx, uma linha por preço)
+com as tabelas normalizadas em Excel (uma planilha por tabela) e Parquet:
+tempo de gravação, tamanho em disco e tempo de carga com pandas.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.normalized_export --tours 10000
+    python -m benchmarks.normalized_export --catalog output/results/tours_extracted.json
+"""
+import os
+import time
+import types
+import logging
+import argparse
+
+import pandas as pd
+
+from benchmarks.excel_export import synthetic_catalog
+from src.core.catalog_model import CompactCatalog
+from src.processors.result_exporter import ResultExporter
+from src.utils.catalog_io import read_catalog
+
+
+def dir_size(path: str) -> int:
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    return sum(os.path.getsize(os.path.join(path, fn)) for fn in os.listdir(path))
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export desnormalizado x tabelas normalizadas (Excel/Parquet)")
+    parser.add_argument("--tours", type=int, default=10000)
+    parser.add_argument("--catalog", help="JSON de uma extração real (em vez do catálogo sintético)")
+    parser.add_argument("--out", default="output/benchmarks")
+    args = parser.parse_args()
+
+    if args.catalog:
+        catalog = read_catalog(args.catalog)
+    else:
+        catalog = synthetic_catalog(args.tours)
+    os.makedirs(args.out, exist_ok=True)
+
+    config = types.SimpleNamespace(results_dir=args.out, export_normalized_excel=True, export_parquet=False)
+    exporter = ResultExporter(config, logging.getLogger("bench"))
+    flat_path = os.path.join(args.out, "tours_extracted.xlsx")
+
+    write_flat, _ = timed(lambda: exporter._write_excel(flat_path, CompactCatalog.from_dict(catalog)))
+    write_norm, paths = timed(lambda: exporter.export_normalized(catalog))
+    config.export_normalized_excel, config.export_parquet = False, True
+    write_parquet, parquet_paths = timed(lambda: exporter.export_normalized(catalog))
+    paths.update(parquet_paths)
+
+    load_flat, flat = timed(lambda: pd.read_excel(flat_path))
+    load_norm, sheets = timed(lambda: pd.read_excel(paths["excel"], sheet_name=None))
+    results = [
+        ("xlsx desnormalizado", write_flat, dir_size(flat_path), load_flat, f"{len(flat)} linhas"),
+        ("xlsx normalizado", write_norm, dir_size(paths["excel"]), load_norm,
+         ", ".join(f"{name}={len(frame)}" for name, frame in sheets.items())),
+    ]
+    if "parquet" in paths:
+        load_parquet, tables = timed(lambda: {
+            fn[:-8]: pd.read_parquet(os.path.join(paths["parquet"], fn))
+            for fn in os.listdir(paths["parquet"]) if fn.endswith(".parquet")
+        })
+        results.append(("parquet", write_parquet, dir_size(paths["parquet"]), load_parquet,
+                        f"{len(tables)} tabelas"))
+
+    print(f"Catálogo: {len(catalog['tours'])} tours")
+    print(f"{'formato':<22}{'gravação':>10}{'tamanho':>11}{'carga':>9}  conteúdo")
+    for name, write_s, size, load_s, content in results:
+        print(f"{name:<22}{write_s:>9.1f}s{size / 2**20:>9.1f}MB{load_s:>8.2f}s  {content}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Compara tokens de entrada/saída por chunk entre o prompt legado e o prompt
+gerado a partir dos schemas (com chaves compactas).
+
+Uso (na raiz do projeto):
+    python -m benchmarks.prompt_tokens --chunks output/chunks \
+        --reference output/results/tours_extracted.json
+
+Entrada: prompt completo enviado por chunk (sem contexto de vizinhos).
+Saída: estimada re-serializando os tours da extração de referência no
+formato de resposta de cada estilo. Usa tiktoken quando disponível, senão
+aproxima por caracteres/4.
+"""
+import os
+import json
+import argparse
+from collections import defaultdict
+
+from src.core.prompts import (
+    PROMPT_EXCLUDED_FIELDS,
+    COMPACT_KEYS,
+    build_chunk_prompt,
+    build_legacy_prompt,
+    build_system_prompt,
+)
+
+
+def token_counter():
+    try:
+        import tiktoken
+        encoding = tiktoken.get_encoding("o200k_base")
+        return (lambda text: len(encoding.encode(text))), "tiktoken o200k_base"
+    except Exception:
+        return (lambda text: max(1, len(text) // 4)), "aproximação chars/4"
+
+
+def compact_tour(data):
+    """Resposta no estilo schema: sem campos vazios, chaves curtas"""
+    if isinstance(data, dict):
+        out = {}
+        for key, value in data.items():
+            if key in PROMPT_EXCLUDED_FIELDS:
+                continue
+            value = compact_tour(value)
+            if value in (None, "", [], {}):
+                continue
+            out[COMPACT_KEYS.get(key, key)] = value
+        return out
+    if isinstance(data, list):
+        return [compact_tour(v) for v in data if compact_tour(v) not in (None, "", [], {})]
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tokens por chunk: prompt legado x schema compacto")
+    parser.add_argument("--chunks", default="output/chunks")
+    parser.add_argument("--reference", default="output/results/tours_extracted.json")
+    args = parser.parse_args()
+
+    count, method = token_counter()
+    files = sorted(fn for fn in os.listdir(args.chunks) if fn.endswith(".md"))
+
+    tours_by_chunk = defaultdict(list)
+    if os.path.exists(args.reference):
+        with open(args.reference, "r", encoding="utf-8") as f:
+            for tour in json.load(f).get("tours", []):
+                for chunk in tour.get("source_chunks") or []:
+                    tours_by_chunk[chunk].append(tour)
+
+    system_tokens = count(build_system_prompt(compact=True))
+    totals = defaultdict(int)
+    print(f"Contagem: {method} | prefixo de sistema fixo (cacheável): {system_tokens} tokens")
+    print(f"{'chunk':<14}{'in legado':>10}{'in schema':>10}{'out legado':>11}{'out schema':>11}")
+
+    for fn in files:
+        with open(os.path.join(args.chunks, fn), "r", encoding="utf-8") as f:
+            text = f.read().strip()
+
+        in_legacy = count(build_legacy_prompt(fn, text))
+        in_schema = system_tokens + count(build_chunk_prompt(fn, text))
+
+        tours = tours_by_chunk.get(fn, [])
+        legacy_payload = {"agency": None, "product": None, "tours": tours}
+        out_legacy = count(json.dumps(legacy_payload, ensure_ascii=False, indent=2))
+        out_schema = count(json.dumps({"tours": compact_tour(tours)}, ensure_ascii=False, separators=(",", ":")))
+
+        totals["in_legacy"] += in_legacy
+        totals["in_schema"] += in_schema
+        totals["out_legacy"] += out_legacy
+        totals["out_schema"] += out_schema
+        print(f"{fn:<14}{in_legacy:>10}{in_schema:>10}{out_legacy:>11}{out_schema:>11}")
+
+    n = max(len(files), 1)
+    print("-" * 56)
+    print(f"{'média':<14}{totals['in_legacy'] / n:>10.0f}{totals['in_schema'] / n:>10.0f}"
+          f"{totals['out_legacy'] / n:>11.0f}{totals['out_schema'] / n:>11.0f}")
+    print(f"Redução: entrada {1 - totals['in_schema'] / totals['in_legacy']:.0%}, "
+          f"saída {1 - totals['out_schema'] / max(totals['out_legacy'], 1):.0%}; "
+          f"{system_tokens} tokens por chunk elegíveis a cache de prefixo")
+
+
+if __name__ == "__main__":
+    main()
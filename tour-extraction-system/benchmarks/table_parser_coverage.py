@@ -0,0 +1,87 @@
+"""
+Mede cobertura e acurácia do interpretador determinístico de tabelas.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.table_parser_coverage --chunks output/chunks \
+        --reference output/results/tours_extracted.json
+
+A cobertura é a fração de páginas resolvidas sem LLM. A acurácia compara os
+tours gerados com uma extração de referência (título normalizado + preços).
+"""
+import os
+import re
+import json
+import argparse
+import unicodedata
+
+from src.core.config import SystemConfig
+from src.core.logger import Logger
+from src.processors.table_parser import PricingTableParser
+
+
+def normalize(text: str) -> str:
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+def price_set(tour: dict) -> set:
+    prices = {p.get("price") for p in tour.get("pricing_matrix") or []}
+    for opt in tour.get("options") or []:
+        for d in opt.get("details") or []:
+            prices.add((d.get("price") or {}).get("quantity"))
+    return {float(p) for p in prices if isinstance(p, (int, float))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cobertura do fast path de tabelas")
+    parser.add_argument("--chunks", default="output/chunks", help="Diretório com os chunks .md")
+    parser.add_argument("--reference", default=None, help="JSON de referência (tours_extracted.json)")
+    parser.add_argument("--config", default="config/settings.yaml")
+    args = parser.parse_args()
+
+    config = SystemConfig.from_yaml(args.config)
+    table_parser = PricingTableParser(config, Logger("WARNING"))
+
+    files = sorted(fn for fn in os.listdir(args.chunks) if fn.endswith(".md"))
+    texts = []
+    for fn in files:
+        with open(os.path.join(args.chunks, fn), "r", encoding="utf-8") as f:
+            texts.append(f.read().strip())
+    table_parser.set_boilerplate(texts)
+
+    parsed_tours = []
+    for fn, text in zip(files, texts):
+        data = table_parser.parse_page(text, fn)
+        status = f"{len(data['tours'])} tours" if data else "LLM"
+        print(f"{fn:<16} {status}")
+        if data:
+            parsed_tours.extend(data["tours"])
+
+    stats = table_parser.stats
+    print("-" * 40)
+    print(f"Páginas: {len(files)} | resolvidas sem LLM: {stats['pages_parsed']} "
+          f"({stats['pages_parsed'] / max(len(files), 1):.0%})")
+    print(f"Tours gerados: {len(parsed_tours)}")
+    print(f"Motivos de fallback: sem tabela={stats['no_tables']}, texto descritivo={stats['prose_content']}, "
+          f"tabela não reconhecida={stats['unrecognized_table']}, schema inválido={stats['invalid_schema']}")
+
+    if args.reference and parsed_tours:
+        with open(args.reference, "r", encoding="utf-8") as f:
+            reference = json.load(f).get("tours", [])
+        by_title = {}
+        for tour in reference:
+            by_title.setdefault(normalize(tour.get("title")), []).append(tour)
+
+        matched = exact_prices = 0
+        for tour in parsed_tours:
+            candidates = by_title.get(normalize(tour["title"]), [])
+            if candidates:
+                matched += 1
+                if any(price_set(c) == price_set(tour) for c in candidates):
+                    exact_prices += 1
+        print(f"Referência: {matched}/{len(parsed_tours)} títulos encontrados, "
+              f"{exact_prices}/{matched or 1} com preços idênticos")
+
+
+if __name__ == "__main__":
+    main()
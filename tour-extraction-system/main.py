@@ -8,33 +8,73 @@ from dotenv import load_dotenv
 
 from src.core.logger import Logger
 from src.core.config import SystemConfig
-from src.pipeline import TourExtractionPipeline
+from src.pipeline import MultiDocumentPipeline, TourExtractionPipeline, pdf_paths
 from src.processors.result_refiner import ResultRefiner
 
 # Carrega variáveis de ambiente
 load_dotenv()
 
 
+def print_tour(tour):
+    """Exibe um tour recém-extraído (streaming)"""
+    source = ", ".join(tour.get("source_chunks") or [])
+    city = f" ({tour['city']})" if tour.get("city") else ""
+    print(f"[TOUR] {tour.get('title')}{city} <- {source}", flush=True)
+
+
 def main():
     """Ponto de entrada CLI"""
     parser = argparse.ArgumentParser(description="Tour Extraction System")
-    parser.add_argument("--pdf", required=True, help="Caminho para o arquivo PDF")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--pdf", help="Caminho para o arquivo PDF")
+    source.add_argument("--pdfs", nargs="+", metavar="PASTA_OU_GLOB",
+                        help="Vários PDFs (pastas e/ou padrões glob) com os modelos carregados uma única vez")
+    parser.add_argument("--documents", type=int, default=None,
+                        help="PDFs processados em paralelo com --pdfs (sobrescreve multi_document.parallel_documents)")
     parser.add_argument("--config", default="config/settings.yaml", help="Arquivo de configuração")
+    parser.add_argument("--backend", choices=["crewai", "local"], default=None,
+                        help="Backend de extração (sobrescreve extraction.backend)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Mostra cada tour assim que extraído (respostas em streaming)")
+    parser.add_argument("--profile", action="store_true",
+                        help="Grava cProfile e pilhas amostradas de cada etapa em directories.profile")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Reaproveita as páginas inalteradas da execução anterior do mesmo catálogo")
+    parser.add_argument("--catalog-id", default=None,
+                        help="Catálogo de que o PDF é uma revisão (padrão: nome do arquivo sem _v2, -rev3...)")
     
     args = parser.parse_args()
     
-    # Valida PDF
-    if not os.path.exists(args.pdf):
-        print(f"[ERRO] PDF não encontrado: {args.pdf}")
+    # Valida PDF(s)
+    pdf_files = pdf_paths(args.pdfs) if args.pdfs else [args.pdf]
+    missing = [p for p in pdf_files if not os.path.exists(p)]
+    if missing or not pdf_files:
+        print(f"[ERRO] PDF não encontrado: {', '.join(missing) or ' '.join(args.pdfs)}")
+        return
+    if args.pdfs and args.catalog_id:
+        print("[ERRO] --catalog-id identifica um único PDF; com --pdfs cada catálogo vem do nome do arquivo")
         return
     
     # Carrega configuração
     config = SystemConfig.from_yaml(args.config)
+    if args.backend:
+        config.extraction_backend = args.backend
+    if args.stream:
+        config.streaming_enabled = True
+    if args.profile:
+        config.profile_enabled = True
+    if args.incremental or args.catalog_id:
+        config.incremental_enabled = True
+    if args.documents:
+        config.parallel_documents = args.documents
     
     # Executa pipeline
     logger = Logger()
+    if args.pdfs:
+        MultiDocumentPipeline(config, logger).run(pdf_files, on_tour=print_tour if config.streaming_enabled else None)
+        return
     pipeline = TourExtractionPipeline(config, logger)
-    pipeline.run(args.pdf)
+    pipeline.run(args.pdf, on_tour=print_tour if config.streaming_enabled else None, catalog_id=args.catalog_id)
 
     # # Executa refined do Excel obtido
     # logger = Logger("INFO")
@@ -0,0 +1,342 @@
+"""
+Representação compacta do catálogo em memória.
+
+Em vez de um dict por tour com objetos e listas aninhados (location,
+duration, options -> details -> price...), cada tour é um TourRecord com
+__slots__ (campos do schema Tour achatados) e as opções, linhas de preço e
+faixas por pax de todos os tours ficam em colunas contíguas (array) do
+catálogo, indexadas por offsets no estilo CSR. Construída uma vez a partir
+da saída consolidada do extrator e consumida pelo achatamento em tabelas
+(catalog_tables) e pelos exports; o JSON é gerado de volta por to_dict.
+"""
+import sys
+import math
+from array import array
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .schemas import Tour
+
+
+# Objetos aninhados do schema -> (subcampo, atributo do TourRecord)
+NESTED_FIELDS = {
+    "location": (("main", "location_main"), ("region", "location_region"), ("zone", "location_zone")),
+    "duration": (("quantity", "duration"), ("unit", "duration_unit")),
+    "schedule": (("departure_time", "departure_time"), ("return_time", "return_time"),
+                 ("frequency", "frequency")),
+}
+SCALAR_FIELDS = ("id", "city", "title", "description", "pricing_type", "meeting_point", "min_adults",
+                 "max_adults", "max_childrens", "min_booking", "observations")
+LIST_FIELDS = ("includes", "excludes", "language_options", "source_chunks")
+# Subchaves conhecidas de cada objeto aninhado; as demais ficam em TourRecord.extra / row_extra
+NESTED_KEYS = {key: {field for field, _ in fields} for key, fields in NESTED_FIELDS.items()}
+OPTION_KEYS = {"name_option", "details"}
+DETAIL_KEYS = {"capacity", "vehicle_options", "price"}
+PRICE_KEYS = {"quantity", "currency"}
+MATRIX_KEYS = {"pax_count", "price", "currency"}
+# Campos guardados nas colunas de preço do catálogo, não no TourRecord
+PRICE_FIELDS = ("options", "pricing_matrix")
+
+# Textos curtos e repetidos (cidade, moeda, capacidade...) compartilham um único objeto
+INTERN_MAX_LEN = 40
+
+
+def _intern(value: Any) -> Any:
+    if type(value) is str and len(value) <= INTERN_MAX_LEN:
+        return sys.intern(value)
+    return value
+
+
+def _number(value: Any) -> Optional[float]:
+    """Preço/quantidade como float (textos numéricos convertidos); None se não for número"""
+    if type(value) in (int, float):
+        value = float(value)
+    elif isinstance(value, str):
+        try:
+            value = float(value.strip())
+        except ValueError:
+            return None
+    else:
+        return None
+    return value if math.isfinite(value) else None
+
+
+def _leftover(value: Dict[str, Any], known: set) -> Optional[Dict[str, Any]]:
+    """Subchaves fora do schema de um objeto aninhado (None se não houver)"""
+    rest = {k: v for k, v in value.items() if k not in known}
+    return rest or None
+
+
+def _plain(value: float) -> Any:
+    """Valor de uma coluna numérica de volta ao tipo do JSON (inteiros sem ".0", NaN -> None)"""
+    if value != value:
+        return None
+    return int(value) if value.is_integer() else value
+
+
+@dataclass(slots=True)
+class TourRecord:
+    """
+    Campos de um tour (schema Tour) sem os preços. Valores fora do formato
+    do schema que o achatamento não usa (ex: location em texto, chaves
+    desconhecidas) são mantidos em extra e voltam intactos no JSON; para
+    location/duration/schedule/operation em dict, extra guarda só as
+    subchaves fora do schema, mescladas de volta no objeto.
+    """
+    title: Any = None
+    id: Any = None
+    city: Any = None
+    location_main: Any = None
+    location_region: Any = None
+    location_zone: Any = None
+    duration: Any = None
+    duration_unit: Any = None
+    description: Any = None
+    pricing_type: Any = None
+    departure_time: Any = None
+    return_time: Any = None
+    frequency: Any = None
+    meeting_point: Any = None
+    includes: Optional[Tuple[Any, ...]] = None
+    excludes: Optional[Tuple[Any, ...]] = None
+    language_options: Optional[Tuple[Any, ...]] = None
+    non_operating_periods: Optional[Tuple[Any, ...]] = None
+    min_adults: Any = None
+    max_adults: Any = None
+    max_childrens: Any = None
+    min_booking: Any = None
+    observations: Any = None
+    source_chunks: Optional[Tuple[Any, ...]] = None
+    extra: Optional[Dict[str, Any]] = None
+
+
+class CompactCatalog:
+    """
+    Catálogo com um TourRecord por tour e os preços em colunas contíguas.
+
+    Opções do tour i: linhas option_offsets[i]:option_offsets[i + 1] das
+    colunas option_*; preços da opção j: detail_offsets[j]:detail_offsets[j + 1]
+    das colunas detail_*; faixas por pax do tour i: matrix_offsets[i]:
+    matrix_offsets[i + 1] das colunas matrix_*. Preços e pax_count são
+    float ('d', NaN quando ausentes); um valor não numérico ("sob consulta")
+    fica em raw_values[(coluna, linha)] para não se perder. Chaves fora do
+    schema em opções, preços e faixas ficam em row_extra[(tipo, linha)],
+    com tipo "option", "detail", "price" ou "matrix".
+    """
+
+    __slots__ = (
+        "agency", "product", "tours",
+        "option_offsets", "option_name",
+        "detail_offsets", "detail_capacity", "detail_vehicle", "detail_price", "detail_currency",
+        "matrix_offsets", "matrix_pax", "matrix_price", "matrix_currency",
+        "raw_values", "row_extra",
+    )
+
+    def __init__(self, agency: Any = None, product: Any = None):
+        self.agency = agency
+        self.product = product
+        self.tours: List[TourRecord] = []
+        self.option_offsets = array("q", [0])
+        self.option_name: List[Any] = []
+        self.detail_offsets = array("q", [0])
+        self.detail_capacity: List[Any] = []
+        self.detail_vehicle: List[Any] = []
+        self.detail_price = array("d")
+        self.detail_currency: List[Any] = []
+        self.matrix_offsets = array("q", [0])
+        self.matrix_pax = array("d")
+        self.matrix_price = array("d")
+        self.matrix_currency: List[Any] = []
+        self.raw_values: Dict[Tuple[str, int], Any] = {}
+        self.row_extra: Dict[Tuple[str, int], Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.tours)
+
+    @classmethod
+    def of(cls, catalog: Union["CompactCatalog", Dict[str, Any], List[Dict[str, Any]]]) -> "CompactCatalog":
+        """O próprio catálogo compacto, ou a conversão de um catálogo em dicts (ou lista de tours)"""
+        if isinstance(catalog, cls):
+            return catalog
+        return cls.from_dict(catalog)
+
+    @classmethod
+    def from_dict(cls, catalog: Union[Dict[str, Any], List[Dict[str, Any]]]) -> "CompactCatalog":
+        """
+        Converte o catálogo em dicts (saída do extrator ou JSON gravado).
+        Itens que não são objetos em options/details/pricing_matrix são
+        descartados, como no achatamento em tabelas.
+        """
+        if isinstance(catalog, list):
+            catalog = {"tours": catalog}
+        compact = cls(catalog.get("agency"), catalog.get("product"))
+        for tour in catalog.get("tours") or []:
+            if isinstance(tour, dict):
+                compact.append(tour)
+        return compact
+
+    def append(self, tour: Dict[str, Any]):
+        """Acrescenta um tour (dict no formato do schema Tour)"""
+        record = TourRecord()
+        extra = {}
+        for key, value in tour.items():
+            if key in SCALAR_FIELDS:
+                setattr(record, key, _intern(value))
+            elif key in NESTED_FIELDS:
+                if isinstance(value, dict):
+                    for field, attr in NESTED_FIELDS[key]:
+                        setattr(record, attr, _intern(value.get(field)))
+                    rest = _leftover(value, NESTED_KEYS[key])
+                    if rest:
+                        extra[key] = rest
+                elif key == "duration" and not isinstance(value, list):
+                    record.duration = value  # duração em texto ("3 horas")
+                elif value is not None:
+                    extra[key] = value
+            elif key in LIST_FIELDS:
+                if isinstance(value, list):
+                    setattr(record, key, tuple(_intern(v) for v in value))
+                elif value is not None:
+                    extra[key] = value
+            elif key == "operation":
+                if isinstance(value, dict):
+                    periods = value.get("non_operating_periods")
+                    if isinstance(periods, list):
+                        record.non_operating_periods = tuple(periods)
+                    # Períodos fora do formato (ex: texto) voltam como vieram, junto das demais subchaves
+                    rest = _leftover(value, {"non_operating_periods"} if isinstance(periods, list) else set())
+                    if rest:
+                        extra[key] = rest
+                elif value is not None:
+                    extra[key] = value
+            elif key not in PRICE_FIELDS:
+                extra[key] = value
+        record.extra = extra or None
+
+        options = tour.get("options")
+        for option in options if isinstance(options, list) else ():
+            if not isinstance(option, dict):
+                continue
+            details = option.get("details")
+            self._keep_extra("option", len(self.option_name), option,
+                             OPTION_KEYS if isinstance(details, list) or details is None else OPTION_KEYS - {"details"})
+            self.option_name.append(_intern(option.get("name_option")))
+            for detail in details if isinstance(details, list) else ():
+                if not isinstance(detail, dict):
+                    continue
+                price = detail.get("price")
+                row = len(self.detail_price)
+                self._keep_extra("detail", row, detail,
+                                 DETAIL_KEYS if isinstance(price, dict) or price is None else DETAIL_KEYS - {"price"})
+                price = price if isinstance(price, dict) else {}
+                self._keep_extra("price", row, price, PRICE_KEYS)
+                self.detail_capacity.append(_intern(detail.get("capacity")))
+                self.detail_vehicle.append(_intern(detail.get("vehicle_options")))
+                self._append_number("detail_price", self.detail_price, price.get("quantity"))
+                self.detail_currency.append(_intern(price.get("currency")))
+            self.detail_offsets.append(len(self.detail_price))
+        self.option_offsets.append(len(self.option_name))
+
+        matrix = tour.get("pricing_matrix")
+        for entry in matrix if isinstance(matrix, list) else ():
+            if not isinstance(entry, dict):
+                continue
+            self._keep_extra("matrix", len(self.matrix_price), entry, MATRIX_KEYS)
+            self._append_number("matrix_pax", self.matrix_pax, entry.get("pax_count"))
+            self._append_number("matrix_price", self.matrix_price, entry.get("price"))
+            self.matrix_currency.append(_intern(entry.get("currency")))
+        self.matrix_offsets.append(len(self.matrix_price))
+
+        self.tours.append(record)
+
+    def _keep_extra(self, kind: str, row: int, value: Dict[str, Any], known: set):
+        rest = _leftover(value, known)
+        if rest:
+            self.row_extra[(kind, row)] = rest
+
+    def _with_extra(self, kind: str, row: int, value: Dict[str, Any]) -> Dict[str, Any]:
+        """Objeto da linha com as chaves fora do schema mescladas de volta"""
+        if self.row_extra and (kind, row) in self.row_extra:
+            value.update(self.row_extra[(kind, row)])
+        return value
+
+    def _append_number(self, column: str, values: array, value: Any):
+        number = _number(value)
+        if number is None and value is not None:
+            self.raw_values[(column, len(values))] = value
+        values.append(math.nan if number is None else number)
+
+    def column_values(self, column: str) -> List[Any]:
+        """Coluna numérica (detail_price, matrix_pax, matrix_price) como valores Python, com os valores originais"""
+        values = [_plain(v) for v in getattr(self, column)]
+        for (name, row), value in self.raw_values.items():
+            if name == column:
+                values[row] = value
+        return values
+
+    def header(self) -> Dict[str, Any]:
+        """Metadados do catálogo (tudo menos os tours)"""
+        return {"agency": self.agency, "product": self.product}
+
+    def tour_dict(self, i: int) -> Dict[str, Any]:
+        """Tour i no formato do schema Tour (campos vazios omitidos)"""
+        record = self.tours[i]
+        tour: Dict[str, Any] = {}
+        for key in Tour.model_fields:
+            if key in NESTED_FIELDS:
+                if key == "duration" and isinstance(record.duration, str) and record.duration_unit is None:
+                    value = record.duration
+                else:
+                    value = {field: v for field, v in ((f, getattr(record, a)) for f, a in NESTED_FIELDS[key])
+                             if v is not None} or None
+            elif key in LIST_FIELDS:
+                value = getattr(record, key)
+                value = list(value) if value is not None else None
+            elif key == "operation":
+                periods = record.non_operating_periods
+                value = {"non_operating_periods": list(periods)} if periods is not None else None
+            elif key == "options":
+                value = self._options(i) or None
+            elif key == "pricing_matrix":
+                value = self._matrix(i) or None
+            else:
+                value = getattr(record, key)
+            rest = record.extra.get(key) if record.extra else None
+            if isinstance(rest, dict) and (value is None or isinstance(value, dict)):
+                value = {**(value or {}), **rest}
+            if value is not None:
+                tour[key] = value
+        if record.extra:
+            tour.update((k, v) for k, v in record.extra.items() if k not in tour)
+        return tour
+
+    def _value(self, column: str, values: array, row: int) -> Any:
+        if self.raw_values and (column, row) in self.raw_values:
+            return self.raw_values[(column, row)]
+        return _plain(values[row])
+
+    def _options(self, i: int) -> List[Dict[str, Any]]:
+        options = []
+        value, prices, currencies, extra = self._value, self.detail_price, self.detail_currency, self._with_extra
+        for j in range(self.option_offsets[i], self.option_offsets[i + 1]):
+            details = [extra("detail", k, {
+                "capacity": self.detail_capacity[k], "vehicle_options": self.detail_vehicle[k],
+                "price": extra("price", k, {"quantity": value("detail_price", prices, k), "currency": currencies[k]}),
+            }) for k in range(self.detail_offsets[j], self.detail_offsets[j + 1])]
+            options.append(extra("option", j, {"name_option": self.option_name[j], "details": details}))
+        return options
+
+    def _matrix(self, i: int) -> List[Dict[str, Any]]:
+        value = self._value
+        return [self._with_extra("matrix", k, {"pax_count": value("matrix_pax", self.matrix_pax, k),
+                                              "price": value("matrix_price", self.matrix_price, k),
+                                              "currency": self.matrix_currency[k]})
+                for k in range(self.matrix_offsets[i], self.matrix_offsets[i + 1])]
+
+    def iter_tour_dicts(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self.tours)):
+            yield self.tour_dict(i)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Catálogo em dicts, no formato do JSON exportado"""
+        return {**self.header(), "tours": list(self.iter_tour_dicts())}
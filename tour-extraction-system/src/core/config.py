@@ -3,8 +3,8 @@ Gerenciamento de configuração via YAML.
 """
 import yaml
 import os
-from dataclasses import dataclass
-from typing import Dict, Any
+from dataclasses import dataclass, field
+from typing import Dict, Any, List, Optional
 
 @dataclass
 class SystemConfig:
@@ -39,6 +39,97 @@ class SystemConfig:
     # Logging
     log_level: str
 
+    # Export normalizado (tours, opções, preços...) ligado por tour_id
+    export_normalized_excel: bool = False
+    export_parquet: bool = False
+    # Catálogo JSON: "pretty" (indentado), "compact" ou "jsonl" (um tour por linha); compressão none/gzip/zstd
+    json_format: str = "compact"
+    json_compression: str = "none"
+    # Banco SQLite consultável (tours/opções/preços de todos os PDFs, atualizado a cada execução)
+    export_sqlite: bool = False
+    sqlite_path: str = "output/catalog.db"
+
+    # Excel refinado (tours únicos com o menor preço) para o usuário final
+    export_refined: bool = False
+    # Deduplicação difusa do refinado: blocos por cidade, token do título e faixa de preço
+    dedup_fuzzy: bool = True
+    dedup_title_threshold: float = 0.85
+    dedup_price_tolerance: float = 0.10
+    dedup_max_block_size: int = 500
+
+    # Backend de extração: "crewai" (API) ou "local" (modelo GGUF em CPU via llama.cpp)
+    extraction_backend: str = "crewai"
+    local_model_path: str = "models/qwen2.5-1.5b-instruct-q4_k_m.gguf"
+    local_n_ctx: int = 8192
+    local_n_threads: int = 0
+    local_max_tokens: int = 2048
+
+    # Recuperação de respostas malformadas/truncadas (tours salvos um a um + continuação)
+    recovery_enabled: bool = True
+    recovery_max_continuations: int = 2
+    
+    # Streaming das respostas: tours emitidos (callback) assim que cada objeto fecha
+    streaming_enabled: bool = False
+
+    # Endpoint compatível com OpenAI (ex: servidor local de testes); None = provedor padrão
+    llm_base_url: Optional[str] = None
+
+    # Metadados do catálogo (agência/produto extraídos uma única vez)
+    metadata_first_pages: int = 2
+
+    # Prompt de extração ("schema" gerado dos modelos Pydantic ou "legacy")
+    prompt_style: str = "schema"
+    prompt_compact_keys: bool = True
+
+    # Empacotamento de páginas pequenas em uma única requisição
+    packing_enabled: bool = True
+    packing_small_chunk_tokens: int = 700
+    packing_max_tokens: int = 3000
+    packing_max_chunks: int = 4
+    packing_similarity_threshold: float = 0.6
+
+    # Triagem de páginas
+    triage_enabled: bool = True
+    triage_min_tour_score: float = 2.0
+    triage_metadata_pages: int = 1
+
+    # Fast path determinístico para tabelas de preço
+    table_parser_enabled: bool = True
+    table_parser_max_residual_chars: int = 1500
+
+    # Pool de endpoints (chaves/base URLs) com orçamento RPM/TPM próprio; vazio = OPENAI_API_KEY + rate_limit
+    endpoints: List[Dict[str, Any]] = field(default_factory=list)
+    endpoint_failure_threshold: int = 3
+    endpoint_cooldown_s: float = 30.0
+
+    # Modo lote (Batch API): todas as requisições em um JSONL, sem limites de RPM
+    batch_enabled: bool = False
+    batch_dir: str = "output/batch"
+    batch_poll_interval_s: float = 30.0
+    batch_completion_window: str = "24h"
+    batch_max_wait_h: float = 24.0
+    batch_cost_factor: float = 0.5
+    
+    # Perfil das etapas do pipeline (--profile grava cProfile e pilhas amostradas)
+    profile_enabled: bool = False
+    profile_dir: str = "output/profile"
+    profile_sample_interval_ms: int = 10
+
+    # Reextração incremental: nova revisão do mesmo catálogo reaproveita as páginas inalteradas
+    incremental_enabled: bool = False
+    incremental_dir: str = "output/incremental"
+
+    # Vários PDFs (--pdfs): modelos carregados uma vez, documentos em paralelo e saída por documento
+    documents_dir: str = "output/documents"
+    parallel_documents: int = 2
+
+    # Roteamento por camadas de modelo (escalonamento quando a validação falha)
+    routing_enabled: bool = False
+    routing_tiers: List[Dict[str, Any]] = field(default_factory=list)
+
+    # Preços por modelo (input_cost_per_1m/output_cost_per_1m em USD); modelo ausente = custo desconhecido
+    model_prices: Dict[str, Dict[str, float]] = field(default_factory=dict)
+
     @classmethod
     def from_yaml(cls, yaml_path: str) -> 'SystemConfig':
         """Carrega configuração de arquivo YAML"""
@@ -52,6 +143,20 @@ class SystemConfig:
     
         with open(absolute_yaml_path, 'r', encoding='utf-8') as f:
             config_data = yaml.safe_load(f)
+        
+        # Seções opcionais (valores padrão quando ausentes)
+        triage = config_data.get('triage', {})
+        table_parser = config_data.get('table_parser', {})
+        packing = config_data.get('packing', {})
+        routing = config_data.get('routing', {})
+        local_llm = config_data.get('local_llm', {})
+        endpoints = config_data.get('endpoints', {})
+        batch = config_data.get('batch', {})
+        recovery = config_data.get('recovery', {})
+        profiling = config_data.get('profiling', {})
+        dedup = config_data.get('dedup', {})
+        incremental = config_data.get('incremental', {})
+        multi_document = config_data.get('multi_document', {})
             
         return cls(
             uploads_dir=config_data['directories']['uploads'],
@@ -70,5 +175,57 @@ class SystemConfig:
             export_json=config_data['export']['formats']['json'],
             export_excel=config_data['export']['formats']['excel'],
             excel_max_desc_len=config_data['export']['excel_max_description_length'],
-            log_level=config_data['logging']['level']
+            export_normalized_excel=config_data['export']['formats'].get('normalized_excel', False),
+            export_parquet=config_data['export']['formats'].get('parquet', False),
+            json_format=config_data['export'].get('json', {}).get('format', 'compact'),
+            json_compression=config_data['export'].get('json', {}).get('compression', 'none'),
+            export_sqlite=config_data['export']['formats'].get('sqlite', False),
+            sqlite_path=config_data['export'].get('sqlite', {}).get('path', 'output/catalog.db'),
+            export_refined=config_data.get('export_refined', False),
+            dedup_fuzzy=dedup.get('fuzzy', True),
+            dedup_title_threshold=dedup.get('title_threshold', 0.85),
+            dedup_price_tolerance=dedup.get('price_tolerance', 0.10),
+            dedup_max_block_size=dedup.get('max_block_size', 500),
+            log_level=config_data['logging']['level'],
+            extraction_backend=config_data['extraction'].get('backend', 'crewai'),
+            local_model_path=local_llm.get('model_path', 'models/qwen2.5-1.5b-instruct-q4_k_m.gguf'),
+            local_n_ctx=local_llm.get('n_ctx', 8192),
+            local_n_threads=local_llm.get('n_threads', 0),
+            local_max_tokens=local_llm.get('max_tokens', 2048),
+            llm_base_url=config_data['extraction'].get('llm_base_url'),
+            streaming_enabled=config_data['extraction'].get('streaming', False),
+            metadata_first_pages=config_data['extraction'].get('metadata_first_pages', 2),
+            prompt_style=config_data['extraction'].get('prompt_style', 'schema'),
+            prompt_compact_keys=config_data['extraction'].get('prompt_compact_keys', True),
+            triage_enabled=triage.get('enabled', True),
+            triage_min_tour_score=triage.get('min_tour_score', 2.0),
+            triage_metadata_pages=triage.get('metadata_pages', 1),
+            table_parser_enabled=table_parser.get('enabled', True),
+            table_parser_max_residual_chars=table_parser.get('max_residual_chars', 1500),
+            packing_enabled=packing.get('enabled', True),
+            packing_small_chunk_tokens=packing.get('small_chunk_tokens', 700),
+            packing_max_tokens=packing.get('max_tokens', 3000),
+            packing_max_chunks=packing.get('max_chunks', 4),
+            packing_similarity_threshold=packing.get('similarity_threshold', 0.6),
+            endpoints=endpoints.get('pool', []),
+            endpoint_failure_threshold=endpoints.get('failure_threshold', 3),
+            endpoint_cooldown_s=endpoints.get('cooldown_s', 30.0),
+            batch_enabled=batch.get('enabled', False),
+            batch_dir=batch.get('dir', 'output/batch'),
+            batch_poll_interval_s=batch.get('poll_interval_s', 30.0),
+            batch_completion_window=batch.get('completion_window', '24h'),
+            batch_max_wait_h=batch.get('max_wait_h', 24.0),
+            batch_cost_factor=batch.get('cost_factor', 0.5),
+            profile_enabled=profiling.get('enabled', False),
+            profile_dir=config_data['directories'].get('profile', 'output/profile'),
+            profile_sample_interval_ms=profiling.get('sample_interval_ms', 10),
+            incremental_enabled=incremental.get('enabled', False),
+            incremental_dir=config_data['directories'].get('incremental', 'output/incremental'),
+            documents_dir=config_data['directories'].get('documents', 'output/documents'),
+            parallel_documents=multi_document.get('parallel_documents', 2),
+            recovery_enabled=recovery.get('enabled', True),
+            recovery_max_continuations=recovery.get('max_continuations', 2),
+            routing_enabled=routing.get('enabled', False),
+            routing_tiers=routing.get('tiers', []),
+            model_prices=config_data.get('pricing') or {}
         ) 
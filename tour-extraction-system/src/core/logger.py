@@ -28,3 +28,23 @@ class Logger:
     
     def debug(self, msg: str):
         self.logger.debug(msg)
+
+
+class DocumentLogger:
+    """Prefixa as mensagens com o documento (modo multi-PDF, documentos em paralelo)"""
+    
+    def __init__(self, logger, document: str):
+        self.logger = logger
+        self.prefix = f"[{document}] "
+    
+    def info(self, msg: str):
+        self.logger.info(self.prefix + msg)
+    
+    def error(self, msg: str):
+        self.logger.error(self.prefix + msg)
+    
+    def warning(self, msg: str):
+        self.logger.warning(self.prefix + msg)
+    
+    def debug(self, msg: str):
+        self.logger.debug(self.prefix + msg)
@@ -0,0 +1,407 @@
+"""
+Prompts de extração gerados a partir dos schemas Pydantic.
+
+O prefixo de sistema (regras + schema) é fixo para todos os chunks, o que
+permite o cache de prompt do provedor; cada requisição envia apenas o texto
+da página. Opcionalmente o modelo responde com chaves compactas, expandidas
+de volta após o parse.
+"""
+from typing import Any, Dict, List, Optional, Tuple, Union, get_args, get_origin
+
+from pydantic import BaseModel
+
+from .schemas import CatalogMetadata, Tour
+
+
+# Campos preenchidos pelo código, não pelo modelo
+PROMPT_EXCLUDED_FIELDS = {"id", "source_chunks"}
+
+# Mapeamento chave completa -> chave compacta (resposta do modelo)
+COMPACT_KEYS = {
+    "city": "c",
+    "title": "t",
+    "location": "loc",
+    "main": "m",
+    "region": "r",
+    "zone": "z",
+    "duration": "d",
+    "quantity": "q",
+    "unit": "u",
+    "description": "ds",
+    "pricing_type": "pt",
+    "options": "o",
+    "name_option": "n",
+    "details": "dt",
+    "capacity": "cp",
+    "vehicle_options": "v",
+    "price": "p",
+    "currency": "cu",
+    "pricing_matrix": "pm",
+    "pax_count": "px",
+    "schedule": "s",
+    "departure_time": "dep",
+    "return_time": "ret",
+    "frequency": "f",
+    "meeting_point": "mp",
+    "includes": "in",
+    "excludes": "ex",
+    "language_options": "lg",
+    "operation": "op",
+    "non_operating_periods": "nop",
+    "min_adults": "mina",
+    "max_adults": "maxa",
+    "max_childrens": "maxc",
+    "min_booking": "minb",
+    "observations": "obs",
+}
+
+# Chaves compactas da requisição de metadados (agência e produto)
+METADATA_COMPACT_KEYS = {
+    "agency": "ag",
+    "product": "pr",
+    "type": "ty",
+    "general_conditions": "gc",
+    "year": "y",
+    "destination": "de",
+}
+EXPANDED_KEYS = {v: k for k, v in {**COMPACT_KEYS, **METADATA_COMPACT_KEYS}.items()}
+assert len(EXPANDED_KEYS) == len(COMPACT_KEYS) + len(METADATA_COMPACT_KEYS), "chaves compactas duplicadas"
+
+CHUNK_EXPECTED_OUTPUT = 'JSON {"tours": [...]} seguindo o schema do sistema'
+METADATA_EXPECTED_OUTPUT = "JSON com agência e produto do catálogo"
+
+SYSTEM_RULES = """Você extrai tours/excursões/traslados de catálogos turísticos em qualquer idioma (inglês, português, espanhol, francês) e formato (tabelas, parágrafos, listas).
+
+REGRAS:
+- Extraia TODOS os tours do TEXTO ALVO com máxima precisão; NUNCA invente dados.
+- Preços: "per_vehicle" -> options[].details[] (capacidade, veículo, preço); "per_person" -> pricing_matrix[] (pax_count, preço).
+- Omita campos sem informação (não escreva null nem listas vazias).
+- Responda APENAS com JSON válido, sem comentários nem texto extra.
+- Trechos em "CONTEXTO DE REFERÊNCIA" servem apenas para completar dados (preços, condições);
+  NUNCA extraia tours que aparecem somente neles.
+- Se a requisição trouxer várias páginas delimitadas por "=== PÁGINA: nome ===", responda
+  {"chunks":[{"chunk":"nome","tours":[...]}]}, atribuindo cada tour à página onde ele aparece."""
+
+METADATA_RULES = """Você extrai os METADADOS GERAIS de catálogos turísticos (capa, condições gerais, políticas) em qualquer idioma.
+
+REGRAS:
+- Use apenas as páginas enviadas; NUNCA invente dados.
+- Omita campos sem informação (não escreva null nem listas vazias).
+- Responda APENAS com JSON válido, sem comentários nem texto extra."""
+
+
+def _describe_type(tp: Any, compact: bool) -> str:
+    """Assinatura compacta de um tipo (str, num, [..], {..})"""
+    origin = get_origin(tp)
+    if origin is Union:
+        args = [a for a in get_args(tp) if a is not type(None)]
+        return _describe_type(args[0], compact) if len(args) == 1 else "any"
+    if origin in (list, List):
+        args = get_args(tp)
+        item = args[0] if args else Any
+        return f"[{'str' if item is Any else _describe_type(item, compact)}]"
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        return describe_model(tp, compact)
+    return {str: "str", int: "int", float: "num", bool: "bool"}.get(tp, "any")
+
+
+def _key(name: str, compact: bool) -> str:
+    if not compact:
+        return name
+    return COMPACT_KEYS.get(name) or METADATA_COMPACT_KEYS.get(name, name)
+
+
+def describe_model(model: type, compact: bool = False) -> str:
+    """Gera a assinatura de saída de um modelo Pydantic, ex: {t:str,d:{q:num,u:str}}"""
+    parts = []
+    for name, field in model.model_fields.items():
+        if name in PROMPT_EXCLUDED_FIELDS:
+            continue
+        parts.append(f"{_key(name, compact)}:{_describe_type(field.annotation, compact)}")
+    return "{" + ",".join(parts) + "}"
+
+
+def field_instructions(model: type, compact: bool = False, prefix: str = "") -> List[str]:
+    """Lista 'chave: descrição' a partir das descrições dos campos (recursivo)"""
+    lines = []
+    for name, field in model.model_fields.items():
+        if name in PROMPT_EXCLUDED_FIELDS:
+            continue
+        key = prefix + _key(name, compact)
+        if field.description:
+            lines.append(f"- {key}: {field.description}")
+        nested = _nested_model(field.annotation)
+        if nested is not None:
+            lines.extend(field_instructions(nested, compact, prefix=f"{key}."))
+    return lines
+
+
+def _nested_model(tp: Any) -> Optional[type]:
+    """Modelo Pydantic contido em Optional[...] / List[...]"""
+    if isinstance(tp, type) and issubclass(tp, BaseModel):
+        return tp
+    for arg in get_args(tp):
+        found = _nested_model(arg)
+        if found is not None:
+            return found
+    return None
+
+
+def build_system_prompt(compact: bool = True) -> str:
+    """Prefixo fixo (regras + schema) compartilhado por todas as requisições de chunks"""
+    sections = [SYSTEM_RULES, "", "CAMPOS:"]
+    sections.extend(field_instructions(Tour, compact))
+    if compact:
+        legend = ", ".join(f"{short}={name}" for name, short in COMPACT_KEYS.items())
+        sections += ["", f"CHAVES COMPACTAS (use apenas as curtas): {legend}"]
+    sections += ["", "SCHEMA DE SAÍDA:", '{"tours":[' + describe_model(Tour, compact) + "]}"]
+    return "\n".join(sections)
+
+
+def build_metadata_system_prompt(compact: bool = True) -> str:
+    """Prefixo fixo (regras + schema de agência/produto) da requisição de metadados"""
+    sections = [METADATA_RULES, "", "CAMPOS:"]
+    sections.extend(field_instructions(CatalogMetadata, compact))
+    if compact:
+        legend = ", ".join(f"{short}={name}" for name, short in METADATA_COMPACT_KEYS.items())
+        sections += ["", f"CHAVES COMPACTAS (use apenas as curtas): {legend}"]
+    sections += ["", "SCHEMA DE SAÍDA:", describe_model(CatalogMetadata, compact)]
+    return "\n".join(sections)
+
+
+def build_chunk_prompt(chunk_filename: str, context: str,
+                       references: Optional[List[Tuple[str, str]]] = None) -> str:
+    """
+    Parte variável da requisição: a página a analisar e, opcionalmente,
+    páginas vizinhas marcadas como contexto somente de referência.
+    """
+    prompt = f"PÁGINA: {chunk_filename}\n\nTEXTO ALVO:\n{context}"
+    if references:
+        refs = "\n\n".join(f"--- {fn} ---\n{text}" for fn, text in references)
+        prompt += f"\n\nCONTEXTO DE REFERÊNCIA (não extrair tours daqui):\n{refs}"
+    return prompt
+
+
+def build_packed_prompt(chunk_filenames: List[str], texts: List[str]) -> str:
+    """Várias páginas pequenas em uma única requisição, com delimitadores explícitos"""
+    parts = [f"=== PÁGINA: {fn} ===\n{text}\n=== FIM: {fn} ===" for fn, text in zip(chunk_filenames, texts)]
+    return f"PÁGINAS ({len(parts)}), TEXTO ALVO:\n\n" + "\n\n".join(parts)
+
+
+def build_metadata_prompt(pages: List[Tuple[str, str]]) -> str:
+    """Parte variável da requisição de metadados: primeiras páginas e condições gerais"""
+    parts = "\n\n".join(f"### {fn}\n{text}" for fn, text in pages)
+    return f"PÁGINAS ({len(pages)}), TEXTO PARA ANÁLISE:\n\n{parts}"
+
+
+def build_continuation_prompt(prompt: str, done_titles: List[str], last_chunk: Optional[str] = None) -> str:
+    """
+    Pede apenas a cauda de uma resposta truncada: a mesma requisição, com a
+    lista dos tours já recebidos para que não sejam repetidos.
+    """
+    done = "; ".join(str(t) for t in done_titles) or "nenhum"
+    where = f" a partir da página {last_chunk}" if last_chunk else ""
+    return (
+        f"{prompt}\n\nCONTINUAÇÃO: a resposta anterior foi interrompida. Tours já recebidos (NÃO repetir): {done}.\n"
+        f"Responda no mesmo formato JSON apenas com os tours restantes{where}; se não houver, use uma lista vazia."
+    )
+
+
+def build_response_schema(kind: str = "chunk", compact: bool = True) -> Dict[str, Any]:
+    """
+    JSON Schema da resposta, gerado dos modelos Pydantic, para decodificação
+    restrita (gramática) em backends locais.
+
+    Args:
+        kind: "chunk" ({"tours": [...]}), "packed" ({"chunks": [...]}) ou "metadata"
+        compact: Usa as chaves compactas nos campos dos tours (e da agência/produto)
+    """
+    if kind == "metadata":
+        schema = CatalogMetadata.model_json_schema()
+        schema["required"] = ["agency", "product"]
+        return _compact_schema(schema) if compact else schema
+
+    tour = Tour.model_json_schema()
+    defs = tour.pop("$defs", {})
+    tour["properties"] = {k: v for k, v in tour["properties"].items() if k not in PROMPT_EXCLUDED_FIELDS}
+    tours = {"type": "array", "items": tour}
+    if kind == "packed":
+        schema = {
+            "type": "object",
+            "properties": {"chunks": {"type": "array", "items": {
+                "type": "object",
+                "properties": {"chunk": {"type": "string"}, "tours": tours},
+                "required": ["chunk", "tours"],
+            }}},
+            "required": ["chunks"],
+        }
+    else:
+        schema = {"type": "object", "properties": {"tours": tours}, "required": ["tours"]}
+    schema["$defs"] = defs
+    return _compact_schema(schema) if compact else schema
+
+
+def _compact_schema(schema: Any) -> Any:
+    """Renomeia propriedades e campos obrigatórios do schema para as chaves compactas"""
+    if isinstance(schema, list):
+        return [_compact_schema(v) for v in schema]
+    if not isinstance(schema, dict):
+        return schema
+    out = {}
+    for key, value in schema.items():
+        if key == "properties":
+            out[key] = {_key(k, True): _compact_schema(v) for k, v in value.items()}
+        elif key == "required":
+            out[key] = [_key(k, True) for k in value]
+        elif key == "$defs":
+            out[key] = {name: _compact_schema(v) for name, v in value.items()}
+        else:
+            out[key] = _compact_schema(value)
+    return out
+
+
+def expand_keys(data: Any) -> Any:
+    """Converte chaves compactas de volta para os nomes completos do schema"""
+    if isinstance(data, dict):
+        return {EXPANDED_KEYS.get(k, k): expand_keys(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [expand_keys(v) for v in data]
+    return data
+
+
+def build_legacy_prompt(chunk_filename: str, context: str) -> str:
+    """Prompt original escrito à mão (prompt_style: legacy), mantido para comparação"""
+    return f"""
+Extraia TODAS as informações de tours/excursões/traslados do texto com MÁXIMA PRECISÃO, INDEPENDENTE do idioma (inglês, português, espanhol, francês) ou formato (tabelas, parágrafos, listas).
+
+-----------------------------------------------------------------------------
+REGRAS CRÍTICAS DE EXTRAÇÃO:
+-----------------------------------------------------------------------------
+
+1. **IDIOMA:** Detecte automaticamente (inglês/português/espanhol/francês). Extraia em qualquer idioma.
+
+2. **CIDADE e TÍTULO:** 
+   - city: apenas a cidade (ex: "Paris", "San Andrés", "Colmar")
+   - title: nome do tour SEM a cidade (ex: "French wine tasting", NÃO "Paris French wine tasting")
+
+3. **DESCRIÇÃO:** Texto COMPLETO e detalhado (mínimo 80 caracteres). Inclua roteiro, diferenciais, pontos visitados.
+
+4. **DURAÇÃO:** Objeto {{"quantity": 3.5, "unit": "hours"}} ou {{"quantity": 8, "unit": "hours"}}
+
+5. **LOCALIZAÇÃO:**
+   - main: cidade principal
+   - region: região/estado (se mencionado)
+   - zone: "Zona 1"/"Zona 2"/"Zona 3" (se houver sistema de zonas)
+
+6. **PREÇOS - DOIS FORMATOS SUPORTADOS:**
+
+   📌 **FORMATO A - POR VEÍCULO (Europeu):**
+   - pricing_type: "per_vehicle"
+   - options: [
+       {{
+         "name_option": "Car/Van with english speaking driver. Price per car/van",
+         "details": [
+           {{"capacity": "01-03 pax", "vehicle_options": "car", "price": {{"quantity": 625, "currency": "EUR"}}}},
+           {{"capacity": "04-06 pax", "vehicle_options": "van", "price": {{"quantity": 625, "currency": "EUR"}}}}
+         ]
+       }},
+       {{
+         "name_option": "Entrance ticket. Price per pax",
+         "details": [{{"capacity": "all", "vehicle_options": null, "price": {{"quantity": 13, "currency": "EUR"}}}}]
+       }}
+     ]
+
+   📌 **FORMATO B - POR PESSOA/TABELA MATRICIAL (Latino-americano):**
+   - pricing_type: "per_person"
+   - pricing_matrix: [
+       {{"pax_count": 1, "price": 21, "currency": "USD"}},
+       ...
+     ]
+
+7. **HORÁRIOS E FREQUÊNCIA:**
+   - schedule: {{
+       "departure_time": "05:30" ou "08:30",
+       "return_time": "17:00",
+       "frequency": "Diário" ou "Segunda a Sexta"
+     }}
+
+8. **PONTO DE ENCONTRO:**
+   - meeting_point: "Hotel lobby" ou "Aeroporto" ou "Pier 5"
+
+9. **ITENS INCLUSOS/EXCLUÍDOS:**
+   - includes: ["Guia em espanhol", "Transporte", "Almoço"]
+   - excludes: ["Bebidas alcoólicas", "Gorjetas"]
+
+10. **IDIOMAS DISPONÍVEIS:**
+    - language_options: ["espanhol", "inglês", "português", "francês"]
+
+11. **OPERAÇÃO:**
+    - operation: {{
+        "non_operating_periods": ["01 May", "08 Jan to 09 Feb", "Domingos"]
+      }}
+
+12. **OBSERVAÇÕES (TODAS!):**
+    - observations: Agrupe TODAS as observações, restrições, notas, políticas de child, quantidade mínima para reserva, horários de reunião, fechamentos, suplementos, etc.
+    - Exemplo: "Eiffel Tower closed: 01 May. Top floor closed: 08 Jan to 09 Feb. Only for good walkers. Minimum 2 pax to confirm."
+
+13. **MIN_BOOKING:** Quantidade mínima de pessoas para confirmar reserva (ex: 2)
+
+14. **SOURCE_CHUNKS:** ["{chunk_filename}"]
+
+-----------------------------------------------------------------------------
+SCHEMA OBRIGATÓRIO (adapte ao formato encontrado):
+-----------------------------------------------------------------------------
+
+{{
+  "tours": [
+    {{
+      "id": "TOUR_ID_UNICO_NUMERICO",
+      "city": "Paris",
+      "title": "French wine tasting",
+      "location": {{"main": "Paris", "region": "Ile-de-France", "zone": null}},
+      "duration": {{"quantity": 1.5, "unit": "hours"}},
+      "description": "Complete description...",
+      
+      "pricing_type": "per_vehicle",  // ou "per_person"
+      "options": [...],  // Se per_vehicle
+      "pricing_matrix": [...],  // Se per_person
+      
+      "schedule": {{
+        "departure_time": "08:30",
+        "return_time": null,
+        "frequency": "Diário"
+      }},
+      "meeting_point": "Hotel lobby",
+      "includes": ["Guia", "Transporte", "Entrada"],
+      "excludes": ["Refeições", "Gorjetas"],
+      "language_options": ["espanhol", "inglês"],
+      
+      "operation": {{
+        "non_operating_periods": ["01 May", "Domingos"]
+      }},
+      "min_adults": 1,
+      "max_adults": 6,
+      "max_childrens": null,
+      "min_booking": 2,
+      "observations": "Todas observações agregadas aqui...",
+      "source_chunks": ["{chunk_filename}"]
+    }}
+  ]
+}}
+
+-----------------------------------------------------------------------------
+TEXTO PARA ANÁLISE:
+-----------------------------------------------------------------------------
+
+{context}
+
+-----------------------------------------------------------------------------
+ATENÇÃO FINAL:
+- Se NÃO houver informação, use null ou []
+- NUNCA invente dados
+- Adapte o formato ao que encontrar (per_vehicle OU per_person)
+- SEMPRE extraia observations COMPLETAS
+-----------------------------------------------------------------------------
+
+RETORNE APENAS O JSON ESTRUTURADO ACIMA!
+"""
@@ -8,32 +8,40 @@ from typing import List, Optional, Dict, Any
 class PriceDetail(BaseModel):
     """Detalhe de preço"""
     quantity: Optional[float] = None
-    currency: Optional[str] = None
+    currency: Optional[str] = Field(None, description="código ISO (EUR, USD)")
 
 
 class OptionDetail(BaseModel):
     """Detalhe de uma opção"""
-    capacity: Optional[str] = None
-    vehicle_options: Optional[str] = None
+    capacity: Optional[str] = Field(None, description='ex: "01-03 pax" ou "all"')
+    vehicle_options: Optional[str] = Field(None, description='ex: "car", "van"')
     price: Optional[PriceDetail] = None
 
 
 class TourOption(BaseModel):
     """Opção de tour (modalidade/preço)"""
-    name_option: Optional[str] = None
+    name_option: Optional[str] = Field(None, description="modalidade exatamente como no texto")
     details: Optional[List[OptionDetail]] = None
 
 
+class PricingMatrixEntry(BaseModel):
+    """Preço por pessoa conforme quantidade de passageiros"""
+    pax_count: Optional[int] = None
+    price: Optional[float] = None
+    currency: Optional[str] = None
+
+
 class Location(BaseModel):
     """Localização do tour"""
     main: Optional[str] = None
     region: Optional[str] = None
+    zone: Optional[str] = Field(None, description='ex: "Zona 1", se houver sistema de zonas')
 
 
 class DurationInfo(BaseModel):
     """Informação de duração"""
     quantity: Optional[float] = None
-    unit: Optional[str] = None
+    unit: Optional[str] = Field(None, description='"hours", "minutes" ou "days"')
 
 
 class NonOperatingPeriod(BaseModel):
@@ -43,38 +51,57 @@ class NonOperatingPeriod(BaseModel):
     date: Optional[str] = None
 
 
+class Schedule(BaseModel):
+    """Horários e frequência"""
+    departure_time: Optional[str] = Field(None, description="HH:MM")
+    return_time: Optional[str] = Field(None, description="HH:MM")
+    frequency: Optional[str] = Field(None, description='ex: "Diário", "Segunda a Sexta"')
+
+
 class Operation(BaseModel):
     """Operação do tour"""
-    non_operating_periods: Optional[List[Any]] = None
+    non_operating_periods: Optional[List[Any]] = Field(None, description='datas/períodos sem operação, ex: ["01 May", "Domingos"]')
 
 
 class Tour(BaseModel):
     """Tour completo extraído"""
     id: Optional[str] = None
-    city: Optional[str] = None
-    title: str
+    city: Optional[str] = Field(None, description='apenas a cidade, ex: "Paris"')
+    title: str = Field(..., description="nome do tour SEM a cidade")
     location: Optional[Location] = None
     duration: Optional[DurationInfo] = None
-    description: Optional[str] = None
-    options: Optional[List[TourOption]] = None
+    description: Optional[str] = Field(None, description="texto completo: roteiro, diferenciais, pontos visitados")
+    pricing_type: Optional[str] = Field(None, description='"per_vehicle" (usa options) ou "per_person" (usa pricing_matrix)')
+    options: Optional[List[TourOption]] = Field(None, description="preços por veículo/modalidade")
+    pricing_matrix: Optional[List[PricingMatrixEntry]] = Field(None, description="preço por pessoa conforme número de passageiros")
+    schedule: Optional[Schedule] = None
+    meeting_point: Optional[str] = None
+    includes: Optional[List[str]] = None
+    excludes: Optional[List[str]] = None
+    language_options: Optional[List[str]] = Field(None, description="idiomas disponíveis do guia")
     operation: Optional[Operation] = None
     min_adults: Optional[int] = None
     max_adults: Optional[int] = None
     max_childrens: Optional[int] = None
-    observations: Optional[str] = None
+    min_booking: Optional[int] = Field(None, description="mínimo de pessoas para confirmar a reserva")
+    observations: Optional[str] = Field(None, description="TODAS as observações, restrições, políticas, suplementos e fechamentos")
     source_chunks: Optional[List[str]] = None
 
 
 class Product(BaseModel):
     """Produto do catálogo"""
-    type: Optional[str] = None
-    general_conditions: Optional[str] = None
-    year: Optional[int] = None
-    destination: Optional[List[str]] = None
+    type: Optional[str] = Field(None, description='"Private Tour", "Shared Tour", "Transfer" ou "Tours"')
+    general_conditions: Optional[str] = Field(None, description="resumo COMPLETO das condições gerais (tarifas, validade, políticas de criança e cancelamento)")
+    year: Optional[int] = Field(None, description="ano de validade das tarifas")
+    destination: Optional[List[str]] = Field(None, description="países/destinos")
 
 
-class Catalog(BaseModel):
-    """Catálogo completo de tours"""
-    agency: Optional[str] = None
+class CatalogMetadata(BaseModel):
+    """Metadados gerais do catálogo (extraídos uma única vez)"""
+    agency: Optional[str] = Field(None, description="nome da agência/operadora responsável pelo catálogo")
     product: Optional[Product] = None
+
+
+class Catalog(CatalogMetadata):
+    """Catálogo completo de tours"""
     tours: List[Tour]
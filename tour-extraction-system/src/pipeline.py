@@ -3,13 +3,24 @@ Orquestrador principal do pipeline de extração.
 """
 
 import os
+import re
+import glob
+import json
+import time
+import dataclasses
+import concurrent.futures
+from typing import Any, Dict, List
 from .core.config import SystemConfig
-from .core.logger import Logger
+from .core.logger import DocumentLogger, Logger
 from .processors.pdf_chunker import PDFChunker
 from .processors.semantic_indexer import SemanticIndexer
 from .processors.tour_extractor import TourExtractor
 from .processors.result_exporter import ResultExporter
 from .processors.result_refiner import ResultRefiner
+from .processors.revision_tracker import RevisionTracker
+from .core.catalog_model import CompactCatalog
+from .utils.profiler import StageProfiler
+from .utils.telemetry import RunTelemetry, format_cost
 
 class TourExtractionPipeline:
     """Pipeline completo de extração de tours"""
@@ -22,9 +33,32 @@ class TourExtractionPipeline:
         self.extractor = TourExtractor(config, logger, indexer=self.indexer)
         self.exporter = ResultExporter(config, logger)
         self.refiner = ResultRefiner(config, logger)
+        self.tracker = RevisionTracker(config, logger) if config.incremental_enabled else None
+        self.profiler = StageProfiler(
+            logger,
+            profile_dir=config.profile_dir if config.profile_enabled else None,
+            sample_interval_s=config.profile_sample_interval_ms / 1000.0
+        )
     
-    def run(self, pdf_path: str):
-        """Executa o pipeline completo"""
+    def share(self, other: "TourExtractionPipeline"):
+        """Usa os modelos (Docling, embeddings, agentes) e o pool de endpoints de outro pipeline"""
+        self.chunker.share(other.chunker)
+        self.indexer.share(other.indexer)
+        self.extractor.share(other.extractor)
+    
+    def run(self, pdf_path: str, on_tour=None, catalog_id: str = None) -> Dict[str, Any]:
+        """
+        Executa o pipeline completo.
+        
+        Args:
+            pdf_path: Caminho do PDF
+            on_tour: Callback opcional chamado com cada tour assim que extraído (streaming)
+            catalog_id: Catálogo de que o PDF é uma revisão (modo incremental); padrão: nome
+                do arquivo sem sufixo de versão
+        
+        Returns:
+            Tours, páginas, chamadas/custo de LLM e arquivos gerados
+        """
         self.logger.info("="*80)
         self.logger.info("TOUR EXTRACTION PIPELINE")
         self.logger.info(f"PDF: {pdf_path}")
@@ -32,31 +66,49 @@ class TourExtractionPipeline:
         
         # Etapa 1: Chunking
         self.logger.info("[1/4] Chunking de PDF")
-        self.chunker.setup()
-        self.chunker.process(pdf_path)
+        with self.profiler.stage("chunking"):
+            self.chunker.setup()
+            reuse_pages = self.tracker.start(pdf_path, catalog_id) if self.tracker else None
+            self.chunker.process(pdf_path, reuse=reuse_pages)
         
         # Etapa 2: Indexação
         self.logger.info("[2/4] Indexação Semântica")
-        self.indexer.setup()
-        self.indexer.load_chunks()
-        self.indexer.create_index()
+        with self.profiler.stage("indexing"):
+            self.indexer.setup()
+            self.indexer.load_chunks()
+            self.indexer.create_index(reuse=self.tracker.embeddings() if self.tracker else None)
         
         # Etapa 3: Extração
         self.logger.info("[3/4] Extração de Tours")
-        self.extractor.setup()
-        catalog = self.extractor.extract()
+        with self.profiler.stage("extraction"):
+            self.extractor.setup()
+            self.extractor.on_tour = on_tour
+            reuse = self.tracker.plan(self.indexer.embeddings, self.indexer.md_files) if self.tracker else None
+            # Representação compacta, construída uma vez e usada por export e refinamento
+            catalog = CompactCatalog.from_dict(self.extractor.extract(reuse))
         
         # Etapa 4: Exportação bruta
         self.logger.info("[4/4] Exportação e Refinamento")
-        json_path, xlsx_path = self.exporter.export(catalog)
+        with self.profiler.stage("export"):
+            json_path, xlsx_path = self.exporter.export(catalog, source=os.path.basename(pdf_path))
+            diff_path = None
+            if self.tracker:
+                diff_path = self.tracker.finish(catalog, self.extractor.page_results,
+                                                self.extractor.catalog_metadata,
+                                                self.indexer.texts, self.indexer.embeddings)
         
         # NOVA ETAPA: Refinamento para usuário final (se configurado)
         refined_xlsx = None
-        if hasattr(self.config, 'export_refined') and self.config.export_refined and json_path:
-            refined_xlsx = self.refiner.refine(json_path)
+        if self.config.export_refined:
+            with self.profiler.stage("refine"):
+                # Catálogo em memória (sem reler o JSON gravado)
+                refined_xlsx = self.refiner.refine(catalog)
         
         # Log final
         self.logger.info("="*80)
+        self.logger.info("Tempo por etapa:")
+        self.profiler.report()
+        self.logger.info("="*80)
         self.logger.info("✅ PIPELINE CONCLUÍDO COM SUCESSO!")
         if json_path:
             self.logger.info(f"📄 JSON completo: {json_path}")
@@ -64,4 +116,154 @@ class TourExtractionPipeline:
             self.logger.info(f"📊 Excel bruto: {xlsx_path}")
         if refined_xlsx:
             self.logger.info(f"🎯 Excel refinado (FINAL): {refined_xlsx}")
+        if diff_path:
+            self.logger.info(f"🔁 Diferenças para a revisão anterior: {diff_path}")
+        self.logger.info("="*80)
+        
+        llm = self.extractor.telemetry.summary(len(catalog))
+        return {
+            "tours": len(catalog),
+            "pages": len(self.extractor.texts),
+            "llm_calls": llm["calls"],
+            "cost_usd": llm["cost_usd"],
+            "json": json_path,
+            "excel": xlsx_path,
+            "refined_excel": refined_xlsx,
+            "diff": diff_path,
+        }
+
+
+def pdf_paths(inputs: List[str]) -> List[str]:
+    """PDFs de uma lista de arquivos, pastas (*.pdf) e padrões glob, sem repetições"""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            found = [os.path.join(item, fn) for fn in os.listdir(item) if fn.lower().endswith(".pdf")]
+        elif glob.has_magic(item):
+            found = [p for p in glob.glob(item, recursive=True) if p.lower().endswith(".pdf")]
+        else:
+            found = [item]
+        paths.extend(sorted(found))
+    return list(dict.fromkeys(os.path.normpath(p) for p in paths))
+
+
+class MultiDocumentPipeline:
+    """
+    Vários PDFs em uma execução.
+    
+    Docling, o modelo de embeddings e os agentes (ou o modelo local) são
+    carregados uma única vez e compartilhados; os documentos rodam em paralelo
+    (parallel_documents), todos sob o mesmo pool de endpoints, de modo que o
+    rate limit RPM/TPM vale para a execução inteira. Cada documento grava
+    chunks, índice e resultados em documents_dir/<documento>/ e o resumo
+    consolidado vai para documents_dir/batch_summary.json.
+    """
+    
+    def __init__(self, config: SystemConfig, logger: Logger):
+        self.config = config
+        self.logger = logger
+        self.shared = TourExtractionPipeline(config, logger)
+    
+    def setup(self):
+        """Carrega os modelos compartilhados"""
+        self.shared.chunker.setup_converter()
+        self.shared.indexer.setup()
+        self.shared.extractor.setup_agents()
+    
+    def _document_config(self, doc_dir: str) -> SystemConfig:
+        return dataclasses.replace(
+            self.config,
+            chunks_dir=os.path.join(doc_dir, "chunks"),
+            index_dir=os.path.join(doc_dir, "index"),
+            results_dir=os.path.join(doc_dir, "results"),
+            batch_dir=os.path.join(doc_dir, "batch"),
+            profile_dir=os.path.join(doc_dir, "profile"),
+        )
+    
+    @staticmethod
+    def _document_names(paths: List[str]) -> List[str]:
+        """Subpasta de cada documento: nome do arquivo (sufixo _2, _3... se repetido)"""
+        names, seen = [], {}
+        for path in paths:
+            name = re.sub(r"[^\w.-]+", "_", os.path.splitext(os.path.basename(path))[0]).strip("_") or "document"
+            seen[name] = seen.get(name, 0) + 1
+            names.append(name if seen[name] == 1 else f"{name}_{seen[name]}")
+        return names
+    
+    def _run_document(self, pdf_path: str, name: str, on_tour=None) -> Dict[str, Any]:
+        doc_dir = os.path.join(self.config.documents_dir, name)
+        pipeline = TourExtractionPipeline(self._document_config(doc_dir), DocumentLogger(self.logger, name))
+        pipeline.share(self.shared)
+        
+        def document_tour(tour):
+            # Documentos em paralelo: as páginas de origem levam o nome do documento
+            on_tour({**tour, "source_chunks": [f"{name}/{c}" for c in tour.get("source_chunks") or []]})
+        
+        start = time.perf_counter()
+        try:
+            outputs = pipeline.run(pdf_path, on_tour=document_tour if on_tour else None)
+        except Exception as e:
+            pipeline.logger.error(f"Falha no processamento: {e}")
+            return {"document": name, "pdf": pdf_path, "status": "error", "error": str(e),
+                    "elapsed_s": round(time.perf_counter() - start, 1), "output_dir": doc_dir}
+        return {"document": name, "pdf": pdf_path, "status": "ok",
+                "elapsed_s": round(time.perf_counter() - start, 1), "output_dir": doc_dir, **outputs}
+    
+    def run(self, pdf_files: List[str], on_tour=None) -> str:
+        """
+        Processa os PDFs e grava o resumo consolidado.
+        
+        Args:
+            pdf_files: Caminhos dos PDFs
+            on_tour: Callback opcional chamado com cada tour assim que extraído (streaming),
+                com as páginas de origem prefixadas pelo documento
+        
+        Returns:
+            Caminho do resumo (batch_summary.json)
+        """
+        names = self._document_names(pdf_files)
+        workers = max(1, min(self.config.parallel_documents, len(pdf_files)))
+        if self.config.profile_enabled and workers > 1:
+            # cProfile perfila um documento por vez no processo
+            self.logger.warning("Perfil ativo: documentos processados um de cada vez")
+            workers = 1
+        self.logger.info(f"{len(pdf_files)} PDFs, {workers} em paralelo; saída em {self.config.documents_dir}")
+        
+        start = time.perf_counter()
+        self.setup()
+        self.shared.extractor.pool.reset()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            documents = list(executor.map(self._run_document, pdf_files, names, [on_tour] * len(pdf_files)))
+        elapsed = time.perf_counter() - start
+        
+        ok = [d for d in documents if d["status"] == "ok"]
+        summary = {
+            "documents": len(documents),
+            "succeeded": len(ok),
+            "failed": len(documents) - len(ok),
+            "parallel_documents": workers,
+            "elapsed_s": round(elapsed, 1),
+            "tours": sum(d["tours"] for d in ok),
+            "pages": sum(d["pages"] for d in ok),
+            "llm_calls": sum(d["llm_calls"] for d in ok),
+            "cost_usd": RunTelemetry.total_cost(ok),
+            "per_document": documents,
+        }
+        os.makedirs(self.config.documents_dir, exist_ok=True)
+        path = os.path.join(self.config.documents_dir, "batch_summary.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        
+        self.logger.info("="*80)
+        self.logger.info(f"{'documento':<40}{'status':>8}{'páginas':>9}{'tours':>8}{'tempo':>9}")
+        for d in documents:
+            self.logger.info(f"{d['document'][:39]:<40}{d['status']:>8}{d.get('pages', '-'):>9}"
+                             f"{d.get('tours', '-'):>8}{d['elapsed_s']:>8.0f}s")
+        self.shared.extractor.pool.report()
+        self.logger.info(
+            f"✅ {summary['succeeded']}/{summary['documents']} PDFs processados em {elapsed:.0f}s: "
+            f"{summary['tours']} tours, {summary['llm_calls']} chamadas de LLM, {format_cost(summary['cost_usd'])}"
+        )
+        self.logger.info(f"📋 Resumo consolidado: {path}")
         self.logger.info("="*80)
+        return path
@@ -0,0 +1,278 @@
+"""
+Banco SQLite local do catálogo: tours, opções e preços de todos os PDFs
+processados, atualizados (upsert) a cada execução e consultáveis sem
+carregar os JSON de saída.
+"""
+import os
+import json
+import time
+import sqlite3
+from typing import Any, Dict, List, Optional, Union
+
+import pandas as pd
+
+from ..core.catalog_model import CompactCatalog
+from .catalog_tables import TABLE_COLUMNS, catalog_tables
+from .tour_merger import tour_keys
+
+
+# Espera pelo lock de escrita (vários documentos em paralelo gravando no mesmo banco)
+BUSY_TIMEOUT_S = 60.0
+
+# Colunas da tabela tours do banco (as de catalog_tables, exceto o tour_id local)
+TOUR_COLUMNS = [c for c in TABLE_COLUMNS["tours"] if c != "tour_id"]
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS documents (
+    document_id INTEGER PRIMARY KEY,
+    source TEXT NOT NULL UNIQUE,
+    agency TEXT,
+    product TEXT,
+    tours INTEGER NOT NULL DEFAULT 0,
+    revision INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS tours (
+    tour_id INTEGER PRIMARY KEY,
+    document_id INTEGER NOT NULL REFERENCES documents(document_id) ON DELETE CASCADE,
+    tour_key TEXT NOT NULL,
+    revision INTEGER NOT NULL,
+    {", ".join(c + (" TEXT COLLATE NOCASE" if c in ("city", "title") else "") for c in TOUR_COLUMNS)},
+    UNIQUE (document_id, tour_key)
+);
+CREATE TABLE IF NOT EXISTS options (
+    option_id INTEGER PRIMARY KEY,
+    tour_id INTEGER NOT NULL REFERENCES tours(tour_id) ON DELETE CASCADE,
+    name_option TEXT
+);
+CREATE TABLE IF NOT EXISTS prices (
+    price_id INTEGER PRIMARY KEY,
+    tour_id INTEGER NOT NULL REFERENCES tours(tour_id) ON DELETE CASCADE,
+    option_id INTEGER REFERENCES options(option_id) ON DELETE CASCADE,
+    capacity, vehicle_options, pax_count,
+    price REAL,
+    currency TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_tours_city ON tours(city);
+CREATE INDEX IF NOT EXISTS idx_tours_title ON tours(title);
+CREATE INDEX IF NOT EXISTS idx_tours_document ON tours(document_id);
+CREATE INDEX IF NOT EXISTS idx_options_tour ON options(tour_id);
+CREATE INDEX IF NOT EXISTS idx_prices_tour ON prices(tour_id);
+CREATE INDEX IF NOT EXISTS idx_prices_option ON prices(option_id);
+CREATE INDEX IF NOT EXISTS idx_prices_currency_price ON prices(currency, price);
+"""
+
+
+def _sql_value(value: Any) -> Any:
+    """Valor aceito pelo sqlite3 (listas/objetos inesperados viram texto JSON)"""
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _values(series: pd.Series) -> list:
+    if series.dtype != object:
+        return series.tolist()
+    return [v if v is None or type(v) in (str, int, float) else _sql_value(v) for v in series.tolist()]
+
+
+def _rows(frame: pd.DataFrame, columns: List[str]) -> List[tuple]:
+    return list(zip(*(_values(frame[c]) for c in columns)))
+
+
+class CatalogStore:
+    """
+    Catálogos de vários PDFs em um único banco SQLite (documents, tours,
+    options, prices), com índices por cidade, título, moeda/preço e
+    documento de origem.
+
+    Cada PDF é um documento identificado pelo nome do arquivo; reprocessá-lo
+    atualiza os tours existentes (mesmo tour_id), insere os novos e remove os
+    que sumiram do catálogo, sem tocar nos demais documentos. Cada upsert é
+    uma única transação com inserções em lote.
+    """
+
+    def __init__(self, path: str, logger=None):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.logger = logger
+        self.conn = sqlite3.connect(path, timeout=BUSY_TIMEOUT_S)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self) -> "CatalogStore":
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def upsert(self, catalog: Union[CompactCatalog, Dict[str, Any]], source: str,
+               tables: Optional[Dict[str, pd.DataFrame]] = None) -> Dict[str, Any]:
+        """
+        Grava (ou atualiza) o catálogo de um documento.
+
+        Args:
+            source: Documento de origem (nome do PDF)
+            tables: Tabelas do catálogo já achatadas (catalog_tables); achatadas aqui se omitidas
+
+        Returns:
+            Contagens gravadas (tours, options, prices, removed) e tempo
+        """
+        start = time.perf_counter()
+        catalog = CompactCatalog.of(catalog)
+        if tables is None:
+            tables = catalog_tables(catalog)
+        tours = tables["tours"]
+        keys = tour_keys(tours["city"].tolist(), tours["title"].tolist())
+        now = time.strftime("%Y-%m-%dT%H:%M:%S")
+
+        with self.conn:
+            cur = self.conn.cursor()
+            cur.execute(
+                "INSERT INTO documents (source, agency, product, tours, revision, updated_at) "
+                "VALUES (?, ?, ?, ?, 1, ?) ON CONFLICT(source) DO UPDATE SET agency = excluded.agency, "
+                "product = excluded.product, tours = excluded.tours, revision = revision + 1, "
+                "updated_at = excluded.updated_at",
+                (source, _sql_value(catalog.agency), _sql_value(catalog.product), len(tours), now),
+            )
+            document_id, revision = cur.execute(
+                "SELECT document_id, revision FROM documents WHERE source = ?", (source,)
+            ).fetchone()
+
+            # Opções e preços do documento são sempre regravados por inteiro
+            document_tours = "SELECT tour_id FROM tours WHERE document_id = ?"
+            cur.execute(f"DELETE FROM prices WHERE tour_id IN ({document_tours})", (document_id,))
+            cur.execute(f"DELETE FROM options WHERE tour_id IN ({document_tours})", (document_id,))
+
+            columns = ", ".join(TOUR_COLUMNS)
+            cur.executemany(
+                f"INSERT INTO tours (document_id, tour_key, revision, {columns}) "
+                f"VALUES (?, ?, ?, {', '.join('?' * len(TOUR_COLUMNS))}) "
+                f"ON CONFLICT(document_id, tour_key) DO UPDATE SET revision = excluded.revision, "
+                + ", ".join(f"{c} = excluded.{c}" for c in TOUR_COLUMNS),
+                [(document_id, key, revision, *row) for key, row in zip(keys, _rows(tours, TOUR_COLUMNS))],
+            )
+            removed = cur.execute("DELETE FROM tours WHERE document_id = ? AND revision <> ?",
+                                  (document_id, revision)).rowcount
+
+            # tour_id/option_id de catalog_tables -> ids do banco
+            ids = dict(cur.execute("SELECT tour_key, tour_id FROM tours WHERE document_id = ?", (document_id,)))
+            tour_ids = pd.Series([ids[key] for key in keys], index=tours["tour_id"].tolist(), dtype="int64")
+            option_base = cur.execute("SELECT COALESCE(MAX(option_id), 0) FROM options").fetchone()[0]
+
+            options = tables["options"]
+            cur.executemany(
+                "INSERT INTO options (option_id, tour_id, name_option) VALUES (?, ?, ?)",
+                zip((options["option_id"] + option_base).tolist(),
+                    options["tour_id"].map(tour_ids).tolist(),
+                    _values(options["name_option"])),
+            )
+
+            option_prices = tables["option_prices"]
+            matrix = tables["pricing_matrix"]
+            prices = pd.concat([
+                option_prices.assign(option_id=option_prices["option_id"] + option_base, pax_count=None),
+                matrix.assign(option_id=None, capacity=None, vehicle_options=None),
+            ], ignore_index=True)
+            prices["tour_id"] = prices["tour_id"].map(tour_ids)
+            prices["price"] = pd.to_numeric(prices["price"], errors="coerce").astype(object)
+            prices = prices.where(prices.notna(), None)
+            price_columns = ["tour_id", "option_id", "capacity", "vehicle_options", "pax_count", "price", "currency"]
+            cur.executemany(
+                f"INSERT INTO prices ({', '.join(price_columns)}) VALUES ({', '.join('?' * len(price_columns))})",
+                _rows(prices, price_columns),
+            )
+
+        stats = {
+            "document_id": document_id,
+            "tours": len(tours),
+            "options": len(options),
+            "prices": len(prices),
+            "removed": removed,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        if self.logger:
+            self.logger.info(
+                f"Banco SQLite atualizado: {self.path} ({source}: {stats['tours']} tours, "
+                f"{stats['prices']} preços, {removed} removidos, {stats['seconds']:.2f}s)"
+            )
+        return stats
+
+    def find_tours(self, city: Optional[str] = None, title: Optional[str] = None,
+                   currency: Optional[str] = None, min_price: Optional[float] = None,
+                   max_price: Optional[float] = None, source: Optional[str] = None,
+                   limit: Optional[int] = 100) -> List[Dict[str, Any]]:
+        """
+        Busca tours (todos os filtros são opcionais e combinados com E).
+
+        Args:
+            city: Cidade exata (sem diferenciar maiúsculas)
+            title: Início do título (sem diferenciar maiúsculas)
+            currency: Moeda de algum preço do tour; com min_price/max_price,
+                a faixa vale para os preços nessa moeda
+            min_price, max_price: Faixa de algum preço do tour
+            source: Documento de origem
+            limit: Máximo de tours (None = todos)
+
+        Returns:
+            Colunas do tour, source e o menor preço (min_price/min_currency)
+        """
+        where, params = [], []
+        if city is not None:
+            where.append("t.city = ?")
+            params.append(city)
+        if title is not None:
+            escaped = title.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            where.append("t.title LIKE ? ESCAPE '\\'")
+            params.append(escaped + "%")
+        if source is not None:
+            where.append("d.source = ?")
+            params.append(source)
+        price_filter, price_params = [], []
+        if currency is not None:
+            price_filter.append("currency = ?")
+            price_params.append(currency)
+        if min_price is not None:
+            price_filter.append("price >= ?")
+            price_params.append(min_price)
+        if max_price is not None:
+            price_filter.append("price <= ?")
+            price_params.append(max_price)
+        if price_filter:
+            where.append(f"t.tour_id IN (SELECT tour_id FROM prices WHERE {' AND '.join(price_filter)})")
+            params.extend(price_params)
+
+        # Menor preço pelas linhas do próprio tour (o índice moeda/preço percorreria a moeda inteira)
+        min_filter = "AND p.currency = ?" if currency is not None else ""
+        min_params = [currency, currency] if currency is not None else []
+        sql = (
+            "SELECT d.source, t.*, "
+            "(SELECT MIN(p.price) FROM prices p INDEXED BY idx_prices_tour "
+            f"WHERE p.tour_id = t.tour_id {min_filter}) AS min_price, "
+            "(SELECT p.currency FROM prices p INDEXED BY idx_prices_tour "
+            f"WHERE p.tour_id = t.tour_id AND p.price IS NOT NULL {min_filter} "
+            "ORDER BY p.price LIMIT 1) AS min_currency "
+            "FROM tours t JOIN documents d ON d.document_id = t.document_id"
+            + (" WHERE " + " AND ".join(where) if where else "")
+            + " ORDER BY t.tour_id"
+            + (" LIMIT ?" if limit is not None else "")
+        )
+        params = min_params + params + ([limit] if limit is not None else [])
+        return [dict(row) for row in self.conn.execute(sql, params)]
+
+    def tour_prices(self, tour_id: int) -> List[Dict[str, Any]]:
+        """Linhas de preço de um tour (por opção/veículo ou por pax), com o nome da opção"""
+        return [dict(row) for row in self.conn.execute(
+            "SELECT p.*, o.name_option FROM prices p LEFT JOIN options o ON o.option_id = p.option_id "
+            "WHERE p.tour_id = ? ORDER BY p.price_id", (tour_id,)
+        )]
+
+    def documents(self) -> List[Dict[str, Any]]:
+        """Documentos gravados, com a contagem de tours e a data da última atualização"""
+        return [dict(row) for row in self.conn.execute("SELECT * FROM documents ORDER BY source")]
@@ -0,0 +1,272 @@
+"""
+Achatamento do catálogo em tabelas colunares (tours, opções, preços, matriz
+por pax e períodos sem operação), ligadas por tour_id.
+
+Módulo único de achatamento: o export Excel, o export normalizado e o
+refinamento consomem estas tabelas em vez de percorrer os tours aninhados.
+"""
+from typing import Any, Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+from ..core.catalog_model import CompactCatalog
+
+
+TABLE_COLUMNS = {
+    "tours": [
+        "tour_id", "city", "title", "location_main", "location_region", "location_zone", "description",
+        "duration", "duration_unit", "departure_time", "return_time", "frequency", "meeting_point",
+        "includes", "excludes", "language_options", "min_adults", "max_adults", "max_children",
+        "min_booking", "observations", "source_chunks", "pricing_type",
+    ],
+    "options": ["option_id", "tour_id", "name_option"],
+    "option_prices": ["option_id", "tour_id", "capacity", "vehicle_options", "price", "currency"],
+    "pricing_matrix": ["tour_id", "pax_count", "price", "currency"],
+    "non_operating_periods": ["tour_id", "period", "start", "end", "date"],
+}
+
+# Colunas numéricas quando todos os valores convertem; as demais são sempre texto
+NUMERIC_COLUMNS = {
+    "tour_id", "option_id", "duration", "min_adults", "max_adults", "max_children", "min_booking",
+    "pax_count", "price",
+}
+
+ID_COLUMNS = ("tour_id", "option_id")
+
+# Campos do tour: (objeto, campo) -> coluna da tabela tours
+TOUR_FIELDS = {
+    (None, "city"): "city",
+    (None, "title"): "title",
+    ("location", "main"): "location_main",
+    ("location", "region"): "location_region",
+    ("location", "zone"): "location_zone",
+    (None, "description"): "description",
+    ("duration", "quantity"): "duration",
+    ("duration", "unit"): "duration_unit",
+    ("schedule", "departure_time"): "departure_time",
+    ("schedule", "return_time"): "return_time",
+    ("schedule", "frequency"): "frequency",
+    (None, "meeting_point"): "meeting_point",
+    (None, "min_adults"): "min_adults",
+    (None, "max_adults"): "max_adults",
+    (None, "max_childrens"): "max_children",
+    (None, "min_booking"): "min_booking",
+    (None, "observations"): "observations",
+    (None, "pricing_type"): "pricing_type",
+}
+JOINED_FIELDS = ["includes", "excludes", "language_options", "source_chunks"]
+# Coluna da tabela tours -> atributo do TourRecord (catálogo compacto)
+RECORD_FIELDS = {column: column for column in TOUR_FIELDS.values()}
+RECORD_FIELDS["max_children"] = "max_childrens"
+
+
+def _column(frame: pd.DataFrame, name: str) -> pd.Series:
+    if name in frame.columns:
+        return frame[name]
+    return pd.Series(None, index=frame.index, dtype=object)
+
+
+def _is_type(series: pd.Series, kind) -> np.ndarray:
+    return np.fromiter((isinstance(v, kind) for v in series.to_numpy(dtype=object)), dtype=bool, count=len(series))
+
+
+def _objects(series: pd.Series) -> pd.DataFrame:
+    """Coluna de objetos -> uma coluna por campo, no mesmo índice (não-objetos viram linha vazia)"""
+    records = [v if isinstance(v, dict) else {} for v in series.tolist()]
+    if not records:
+        return pd.DataFrame(index=series.index)
+    return pd.DataFrame.from_records(records, index=series.index)
+
+
+def _joined(series: pd.Series) -> pd.Series:
+    """Listas unidas por "; " (None para listas vazias ou ausentes)"""
+    return series.map(lambda v: "; ".join(map(str, v)) or None if isinstance(v, list) else None)
+
+
+def _exploded(series: pd.Series) -> pd.Series:
+    """
+    Explode uma coluna de listas em uma linha por objeto da lista, mantendo
+    no índice a linha de origem (itens que não são objetos são descartados).
+    """
+    items = series[_is_type(series, list)].explode()
+    return items[_is_type(items, dict)]
+
+
+def _empty_tables() -> Dict[str, pd.DataFrame]:
+    return {name: pd.DataFrame({c: pd.Series(dtype="int64" if c in ID_COLUMNS else object) for c in columns})
+            for name, columns in TABLE_COLUMNS.items()}
+
+
+def catalog_tables(tours: Union[List[Dict[str, Any]], CompactCatalog]) -> Dict[str, pd.DataFrame]:
+    """
+    Normaliza os tours em uma tabela por entidade.
+
+    Cada campo textual do tour aparece uma única vez (tabela tours); opções,
+    preços e faixas de passageiros referenciam o tour por tour_id (posição
+    do tour no catálogo, a partir de 1) e os preços por option_id.
+
+    Args:
+        tours: Lista de tours em dicts ou o catálogo compacto (CompactCatalog),
+            cujas colunas de preço viram tabelas sem percorrer objetos aninhados
+    """
+    if isinstance(tours, CompactCatalog):
+        return _compact_tables(tours)
+    tours = [tour if isinstance(tour, dict) else {} for tour in tours]
+    if not tours:
+        return _empty_tables()
+
+    flat = pd.DataFrame.from_records(tours)
+    tour_ids = np.arange(1, len(tours) + 1)
+    nested = {name: _objects(_column(flat, name)) for name in ("location", "duration", "schedule", "operation")}
+
+    table = pd.DataFrame({"tour_id": tour_ids})
+    for (parent, field), column in TOUR_FIELDS.items():
+        source = flat if parent is None else nested[parent]
+        table[column] = _column(source, field).to_numpy(dtype=object)
+    # Duração informada como texto ("3 horas") em vez de objeto
+    raw_duration = _column(flat, "duration").to_numpy(dtype=object)
+    as_text = pd.isna(table["duration"].to_numpy()) & ~_is_type(pd.Series(raw_duration), (dict, list))
+    table.loc[as_text, "duration"] = raw_duration[as_text]
+    for field in JOINED_FIELDS:
+        table[field] = _joined(_column(flat, field)).to_numpy(dtype=object)
+
+    # Opções e seus preços
+    option_items = _exploded(_column(flat, "options"))
+    options = _objects(option_items).reset_index(drop=True)
+    options["tour_id"] = tour_ids[option_items.index.to_numpy()]
+    options["option_id"] = np.arange(1, len(options) + 1)
+    detail_items = _exploded(_column(options, "details"))
+    details = _objects(detail_items)
+    price = _objects(_column(details, "price"))
+    prices = pd.DataFrame({
+        "option_id": options["option_id"].to_numpy()[detail_items.index.to_numpy()],
+        "tour_id": options["tour_id"].to_numpy()[detail_items.index.to_numpy()],
+        "capacity": _column(details, "capacity").to_numpy(dtype=object),
+        "vehicle_options": _column(details, "vehicle_options").to_numpy(dtype=object),
+        "price": _column(price, "quantity").to_numpy(dtype=object),
+        "currency": _column(price, "currency").to_numpy(dtype=object),
+    })
+
+    # Matriz de preço por número de passageiros
+    matrix_items = _exploded(_column(flat, "pricing_matrix"))
+    matrix = _objects(matrix_items)
+    pricing_matrix = pd.DataFrame({
+        "tour_id": tour_ids[matrix_items.index.to_numpy()],
+        "pax_count": _column(matrix, "pax_count").to_numpy(dtype=object),
+        "price": _column(matrix, "price").to_numpy(dtype=object),
+        "currency": _column(matrix, "currency").to_numpy(dtype=object),
+    })
+
+    # Períodos sem operação: texto livre ("Domingos") ou objeto {start, end, date}
+    periods = _column(nested["operation"], "non_operating_periods")
+    periods = periods[_is_type(periods, list)].explode().dropna()
+    is_object = _is_type(periods, dict)
+    objects = _objects(periods[is_object])
+    texts = periods[~is_object]
+    non_operating = pd.concat([
+        pd.DataFrame({"tour_id": tour_ids[texts.index.to_numpy()],
+                      "period": texts.map(str).to_numpy(dtype=object)}, index=texts.index),
+        pd.DataFrame({"tour_id": tour_ids[objects.index.to_numpy()],
+                      "start": _column(objects, "start").to_numpy(),
+                      "end": _column(objects, "end").to_numpy(),
+                      "date": _column(objects, "date").to_numpy()}, index=objects.index),
+    ]).sort_index(kind="stable")
+
+    tables = {
+        "tours": table,
+        "options": options,
+        "option_prices": prices,
+        "pricing_matrix": pricing_matrix,
+        "non_operating_periods": non_operating,
+    }
+    return {name: _finalize(frame, TABLE_COLUMNS[name]) for name, frame in tables.items()}
+
+
+def _compact_tables(catalog: CompactCatalog) -> Dict[str, pd.DataFrame]:
+    """Mesmas tabelas de catalog_tables, a partir dos registros e colunas do catálogo compacto"""
+    records = catalog.tours
+    if not records:
+        return _empty_tables()
+    tour_ids = np.arange(1, len(records) + 1)
+
+    columns = {"tour_id": tour_ids}
+    for column in TABLE_COLUMNS["tours"][1:]:
+        if column in JOINED_FIELDS:
+            values = [getattr(r, column) for r in records]
+            columns[column] = pd.Series(["; ".join(map(str, v)) or None if v is not None else None for v in values],
+                                        dtype=object)
+        else:
+            columns[column] = pd.Series([getattr(r, RECORD_FIELDS[column]) for r in records], dtype=object)
+    table = pd.DataFrame(columns)
+
+    option_tour = np.repeat(tour_ids, np.diff(np.frombuffer(catalog.option_offsets, dtype=np.int64)))
+    option_ids = np.arange(1, len(option_tour) + 1)
+    options = pd.DataFrame({"option_id": option_ids, "tour_id": option_tour,
+                            "name_option": pd.Series(catalog.option_name, dtype=object)})
+
+    detail_option = np.repeat(option_ids, np.diff(np.frombuffer(catalog.detail_offsets, dtype=np.int64)))
+    prices = pd.DataFrame({
+        "option_id": detail_option,
+        "tour_id": option_tour[detail_option - 1],
+        "capacity": pd.Series(catalog.detail_capacity, dtype=object),
+        "vehicle_options": pd.Series(catalog.detail_vehicle, dtype=object),
+        "price": pd.Series(catalog.column_values("detail_price"), dtype=object),
+        "currency": pd.Series(catalog.detail_currency, dtype=object),
+    })
+
+    pricing_matrix = pd.DataFrame({
+        "tour_id": np.repeat(tour_ids, np.diff(np.frombuffer(catalog.matrix_offsets, dtype=np.int64))),
+        "pax_count": pd.Series(catalog.column_values("matrix_pax"), dtype=object),
+        "price": pd.Series(catalog.column_values("matrix_price"), dtype=object),
+        "currency": pd.Series(catalog.matrix_currency, dtype=object),
+    })
+
+    periods = []
+    for tour_id, record in zip(tour_ids.tolist(), records):
+        for period in record.non_operating_periods or ():
+            if isinstance(period, dict):
+                periods.append({"tour_id": tour_id, "start": period.get("start"), "end": period.get("end"),
+                                "date": period.get("date")})
+            elif period is not None and period == period:
+                periods.append({"tour_id": tour_id, "period": str(period)})
+    non_operating = pd.DataFrame.from_records(periods, columns=TABLE_COLUMNS["non_operating_periods"])
+
+    tables = {
+        "tours": table,
+        "options": options,
+        "option_prices": prices,
+        "pricing_matrix": pricing_matrix,
+        "non_operating_periods": non_operating,
+    }
+    return {name: _finalize(frame, TABLE_COLUMNS[name]) for name, frame in tables.items()}
+
+
+def _finalize(frame: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+    """Colunas na ordem do esquema; ids inteiros e demais valores Python, com None para ausentes"""
+    frame = frame.reindex(columns=columns).reset_index(drop=True)
+    for column in columns:
+        if column in ID_COLUMNS:
+            frame[column] = frame[column].astype("int64")
+        else:
+            values = frame[column].astype(object)
+            frame[column] = values.where(values.notna(), None)
+    return frame
+
+
+def arrow_safe(frame: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tipos estáveis para Parquet: colunas de texto sempre como string (mesmo
+    vazias); colunas numéricas como número, ou texto se algum valor não
+    converter (ex: preço "sob consulta").
+    """
+    frame = frame.copy()
+    for column in frame.columns:
+        if column in NUMERIC_COLUMNS:
+            try:
+                frame[column] = pd.to_numeric(frame[column])
+                continue
+            except (ValueError, TypeError):
+                pass
+        frame[column] = frame[column].map(lambda v: None if v is None or v != v else str(v)).astype("string")
+    return frame
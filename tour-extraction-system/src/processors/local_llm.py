@@ -0,0 +1,110 @@
+"""
+Backend local de LLM (CPU, em processo) com decodificação restrita por JSON Schema.
+"""
+import os
+import time
+import threading
+from typing import Dict, Tuple
+
+from ..core.config import SystemConfig
+from ..core.logger import Logger
+from ..core.prompts import build_response_schema
+
+
+class LocalLLM:
+    """
+    Executa um modelo instrucional quantizado (GGUF) via llama-cpp-python.
+
+    A saída é restrita por uma gramática derivada dos schemas Pydantic
+    (build_response_schema), então toda resposta é JSON válido no formato
+    esperado pelo extrator. Nenhum dado sai da máquina.
+    """
+
+    def __init__(self, config: SystemConfig, logger: Logger):
+        self.config = config
+        self.logger = logger
+        self.model = None
+        self.schemas = {}
+        # O contexto do llama.cpp não é thread-safe: uma geração por vez
+        self.lock = threading.Lock()
+        self.stats = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "generation_s": 0.0}
+
+    def setup(self):
+        """Carrega o modelo GGUF e pré-gera os schemas de resposta"""
+        try:
+            from llama_cpp import Llama
+        except ImportError as e:
+            raise ImportError(
+                "Backend local requer llama-cpp-python (pip install llama-cpp-python)"
+            ) from e
+
+        if not os.path.exists(self.config.local_model_path):
+            raise FileNotFoundError(f"Modelo local não encontrado: {self.config.local_model_path}")
+
+        self.model = Llama(
+            model_path=self.config.local_model_path,
+            n_ctx=self.config.local_n_ctx,
+            n_threads=self.config.local_n_threads or None,
+            verbose=False
+        )
+        compact = self.config.prompt_compact_keys and self.config.prompt_style != "legacy"
+        self.schemas = {
+            "chunk": build_response_schema("chunk", compact),
+            "packed": build_response_schema("packed", compact),
+            "metadata": build_response_schema("metadata", compact),
+        }
+        self.logger.info(
+            f"Modelo local carregado: {os.path.basename(self.config.local_model_path)} "
+            f"(n_ctx={self.config.local_n_ctx}, threads={self.config.local_n_threads or 'auto'})"
+        )
+
+    def run(self, system_prompt: str, prompt: str, kind: str = "chunk") -> Tuple[str, Dict[str, int]]:
+        """
+        Gera a resposta restrita ao schema do tipo de requisição.
+
+        O texto volta sem interpretação: quem chama faz o parse, com a
+        recuperação de respostas truncadas (max_tokens) e a continuação da cauda.
+
+        Returns:
+            Tupla (texto da resposta, uso de tokens)
+        """
+        messages = [{"role": "system", "content": system_prompt}, {"role": "user", "content": prompt}]
+        with self.lock:
+            start = time.perf_counter()
+            result = self.model.create_chat_completion(
+                messages=messages,
+                response_format={"type": "json_object", "schema": self.schemas[kind]},
+                temperature=self.config.temperature,
+                max_tokens=self.config.local_max_tokens
+            )
+            elapsed = time.perf_counter() - start
+
+            usage = {
+                "prompt_tokens": result.get("usage", {}).get("prompt_tokens", 0),
+                "completion_tokens": result.get("usage", {}).get("completion_tokens", 0),
+            }
+            self.stats["calls"] += 1
+            self.stats["prompt_tokens"] += usage["prompt_tokens"]
+            self.stats["completion_tokens"] += usage["completion_tokens"]
+            self.stats["generation_s"] += elapsed
+
+        choice = result["choices"][0]
+        if choice.get("finish_reason") == "length":
+            # Truncada por max_tokens: a gramática garante apenas o prefixo
+            self.logger.warning(f"Resposta local truncada ({usage['completion_tokens']} tokens)")
+        return choice["message"]["content"] or "", usage
+
+    def tokens_per_second(self) -> float:
+        """Vazão de geração (tokens de saída por segundo, incluindo o prefill)"""
+        if not self.stats["generation_s"]:
+            return 0.0
+        return self.stats["completion_tokens"] / self.stats["generation_s"]
+
+    def report(self):
+        """Registra no log a vazão do modelo local"""
+        if self.stats["calls"]:
+            self.logger.info(
+                f"Modelo local: {self.stats['calls']} chamadas, {self.stats['prompt_tokens']} tokens de entrada, "
+                f"{self.stats['completion_tokens']} de saída em {self.stats['generation_s']:.1f}s "
+                f"({self.tokens_per_second():.1f} tokens/s)"
+            )
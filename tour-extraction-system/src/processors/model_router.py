@@ -0,0 +1,148 @@
+"""
+Roteamento de chunks entre camadas de modelos (barato primeiro, escalonamento sob falha).
+"""
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from ..core.config import SystemConfig
+from ..core.logger import Logger
+from ..core.schemas import Tour
+from ..utils.telemetry import add_cost, format_cost
+from .tour_merger import price_signature
+
+
+class ModelRouter:
+    """
+    Define as camadas de modelos e valida as respostas de cada chamada.
+
+    Cada chunk vai primeiro para a camada mais barata; apenas respostas que
+    falham na validação (schema Tour + regras de sanidade) sobem para a
+    próxima camada. Chamadas, latência, tokens e custo são acumulados por camada.
+    """
+
+    def __init__(self, config: SystemConfig, logger: Logger):
+        self.config = config
+        self.logger = logger
+        self.tiers = self._load_tiers()
+        self.stats = {}
+        self.lock = threading.Lock()
+        self.reset()
+        for i, tier in enumerate(self.tiers):
+            self.logger.info(f"Camada {i} ({tier['name']}): {tier['model']}")
+
+    def _load_tiers(self) -> List[Dict[str, Any]]:
+        """Camadas configuradas (sem model: llm_model) ou, sem roteamento, uma única camada com llm_model"""
+        if self.config.extraction_backend == "local":
+            # Modelo em processo: sem custo por token
+            return [{"name": "local", "model": os.path.basename(self.config.local_model_path), "base_url": None,
+                     "input_cost_per_1m": 0.0, "output_cost_per_1m": 0.0}]
+        tiers = self.config.routing_tiers if self.config.routing_enabled else []
+        if not tiers:
+            return [self._priced({"name": "default", "model": self.config.llm_model,
+                                  "base_url": self.config.llm_base_url})]
+        return [
+            self._priced({
+                "name": tier.get("name") or f"tier{i + 1}",
+                "model": tier.get("model") or self.config.llm_model,
+                "base_url": tier.get("base_url") or self.config.llm_base_url,
+            }, tier)
+            for i, tier in enumerate(tiers)
+        ]
+
+    def _priced(self, tier: Dict[str, Any], overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Preços da camada: os da própria camada ou os de pricing para o modelo (None se desconhecidos)"""
+        prices = {**(self.config.model_prices.get(tier["model"]) or {}), **(overrides or {})}
+        for key in ("input_cost_per_1m", "output_cost_per_1m"):
+            value = prices.get(key)
+            tier[key] = None if value is None else float(value)
+        if tier["input_cost_per_1m"] is None or tier["output_cost_per_1m"] is None:
+            self.logger.warning(
+                f"Modelo {tier['model']} sem preço em pricing (settings.yaml): custo estimado fica null"
+            )
+        return tier
+
+    def reset(self):
+        """Zera as estatísticas (nova execução)"""
+        with self.lock:
+            self.stats = {
+                tier["name"]: {"calls": 0, "escalations": 0, "latency_s": 0.0, "max_latency_s": 0.0,
+                               "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+                for tier in self.tiers
+            }
+
+    def validate(self, data: Optional[Dict[str, Any]], price_tables: int = 0) -> List[str]:
+        """
+        Valida a resposta de um chunk.
+
+        Args:
+            data: Resposta já interpretada (chaves expandidas)
+            price_tables: Número de tabelas de preço detectadas na página
+
+        Returns:
+            Lista de problemas encontrados (vazia se a resposta é aceita)
+        """
+        if not isinstance(data, dict) or not isinstance(data.get("tours"), list):
+            return ["resposta sem lista de tours"]
+
+        problems = []
+        tours = [t for t in data["tours"] if isinstance(t, dict)]
+        for pos, tour in enumerate(tours):
+            if not str(tour.get("title") or "").strip():
+                problems.append(f"tour {pos + 1} sem título")
+                continue
+            try:
+                Tour(**tour)
+            except ValidationError as e:
+                problems.append(f"tour {pos + 1} inválido ({e.error_count()} erros de schema)")
+
+        if price_tables:
+            if not tours:
+                problems.append("página com tabela de preços e nenhum tour")
+            elif not any(price_signature(t) for t in tours):
+                problems.append("página com tabela de preços e tours sem preço")
+        return problems
+
+    def cost(self, tier_name: str, usage: Dict[str, int], cost_factor: float = 1.0) -> Optional[float]:
+        """Custo estimado (USD) de uma chamada na camada (None se o modelo não tem preço)"""
+        tier = next(t for t in self.tiers if t["name"] == tier_name)
+        if tier["input_cost_per_1m"] is None or tier["output_cost_per_1m"] is None:
+            return None
+        return cost_factor * (usage.get("prompt_tokens", 0) * tier["input_cost_per_1m"]
+                              + usage.get("completion_tokens", 0) * tier["output_cost_per_1m"]) / 1_000_000
+    
+    def record(self, tier_name: str, usage: Dict[str, int], latency: float, escalations: int = 0,
+               cost_factor: float = 1.0):
+        """Acumula uma chamada da camada (thread-safe); cost_factor aplica descontos (ex: Batch API)"""
+        prompt_tokens = usage.get("prompt_tokens", 0)
+        completion_tokens = usage.get("completion_tokens", 0)
+        cost = self.cost(tier_name, usage, cost_factor)
+        with self.lock:
+            stats = self.stats[tier_name]
+            stats["calls"] += 1
+            stats["escalations"] += escalations
+            stats["latency_s"] += latency
+            stats["max_latency_s"] = max(stats["max_latency_s"], latency)
+            stats["prompt_tokens"] += prompt_tokens
+            stats["completion_tokens"] += completion_tokens
+            stats["cost_usd"] = add_cost(stats["cost_usd"], cost)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Registra no log chamadas, latência e custo por camada"""
+        total_cost = 0.0
+        for tier in self.tiers:
+            stats = self.stats.get(tier["name"])
+            if not stats or not stats["calls"]:
+                continue
+            total_cost = add_cost(total_cost, stats["cost_usd"])
+            self.logger.info(
+                f"Camada {tier['name']} ({tier['model']}): {stats['calls']} chamadas, "
+                f"{stats['escalations']} escalonadas, latência média {stats['latency_s'] / stats['calls']:.1f}s "
+                f"(máx {stats['max_latency_s']:.1f}s), tokens {stats['prompt_tokens']}/{stats['completion_tokens']}, "
+                f"custo {format_cost(stats['cost_usd'])}"
+            )
+        if len(self.tiers) > 1:
+            self.logger.info(f"Custo total estimado da extração: {format_cost(total_cost)}")
+        return self.stats
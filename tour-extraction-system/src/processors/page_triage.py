@@ -0,0 +1,222 @@
+"""
+Triagem barata de páginas antes da extração com LLM.
+"""
+import re
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from ..core.config import SystemConfig
+from ..core.logger import Logger
+
+
+# Classes de página
+PAGE_TOURS = "tours"
+PAGE_METADATA = "metadata"
+PAGE_IRRELEVANT = "irrelevant"
+
+# Valores monetários: símbolo/código antes ou depois do número
+PRICE_PATTERN = re.compile(
+    r"(?:[$€£]|\b(?:USD|EUR|GBP|BRL|COP|MXN|ARS|R\$|US\$))\s?\d"
+    r"|\d(?:[\d.,]*\d)?\s?(?:€|\b(?:USD|EUR|GBP|BRL|COP|MXN|ARS|euros?|d[oó]lares|dollars?|reais)\b)",
+    re.IGNORECASE
+)
+
+# Cabeçalhos típicos de tabelas de preço
+PRICE_HEADER_PATTERN = re.compile(
+    r"\b(?:pax|pre[cç]os?|prices?|prix|precios?|valor(?:es)?|tarifas?|rates?|per person|por pessoa|por persona)\b",
+    re.IGNORECASE
+)
+
+# Rótulos de campos que descrevem um tour (multi-idioma)
+TOUR_FIELD_PATTERNS = [
+    re.compile(r"\b(?:dura[cç][aã]o|duraci[oó]n|duration|dur[ée]e)\b", re.IGNORECASE),
+    re.compile(r"\b(?:inclui|incluye|includes?|inclus|included)\b", re.IGNORECASE),
+    re.compile(r"\b(?:ponto de encontro|punto de encuentro|meeting point|point de rendez-vous)\b", re.IGNORECASE),
+    re.compile(r"\b(?:frequ[eê]ncia|frecuencia|frequency|fr[ée]quence)\b", re.IGNORECASE),
+    re.compile(r"\b(?:hor[aá]rio|horario|hora do encontro|departure|schedule|d[ée]part)\b", re.IGNORECASE),
+    re.compile(r"\b(?:itiner[aá]rio|roteiro|itinerary|itin[ée]raire)\b", re.IGNORECASE),
+]
+
+# Indícios de metadados do catálogo (condições gerais, políticas, contato)
+METADATA_PATTERNS = [
+    re.compile(r"\b(?:condi[cç][oõ]es gerais|condiciones generales|general conditions|conditions g[ée]n[ée]rales)\b", re.IGNORECASE),
+    re.compile(r"\b(?:pol[ií]ticas?|policy|policies|politique)\b", re.IGNORECASE),
+    re.compile(r"\b(?:cancelamentos?|cancelaci[oó]n|cancellation|annulation)\b", re.IGNORECASE),
+    re.compile(r"\b(?:validade|validez|validity|valid from)\b", re.IGNORECASE),
+    re.compile(r"\b(?:telefone|tel[ée]fono|phone|t[ée]l[ée]phone|e-?mail|correo|skype)\b", re.IGNORECASE),
+    re.compile(r"\b(?:ltda|s\.a\.s|s\.a\.|inc\.|sarl|gmbh)\b|www\.", re.IGNORECASE),
+]
+
+# Protótipos rotulados para similaridade semântica
+PROTOTYPES = {
+    PAGE_TOURS: [
+        "Tour description with duration, meeting point, departure time, what is included and price per person.",
+        "Passeio com duração de 3 horas, ponto de encontro no hotel, inclui transporte e guia. Preço por pessoa em dólares.",
+        "Excursión de día completo, incluye traslado y almuerzo. Tarifa por pasajero: Pax 1, Pax 2, Pax 3.",
+        "Private tour with driver, price per car/van for 1-3 pax, 4-6 pax, entrance ticket per person.",
+    ],
+    PAGE_METADATA: [
+        "General conditions, cancellation policy, payment terms and validity of the rates for the season.",
+        "Condições gerais, políticas de cancelamento, responsabilidades da agência e contatos de emergência.",
+        "Tarifario confidencial, precios netos en dólares, condiciones generales y datos de contacto de la agencia.",
+    ],
+    PAGE_IRRELEVANT: [
+        "List of hotels distributed by zone.",
+        "Lista de hotéis por zona: Hotel, Posada, Apartamentos, Hostal.",
+        "Image gallery and photographs without text.",
+    ],
+}
+
+
+class PageTriage:
+    """Classifica páginas em conteúdo de tours, metadados do catálogo ou irrelevantes"""
+
+    def __init__(self, config: SystemConfig, logger: Logger, indexer=None):
+        self.config = config
+        self.logger = logger
+        self.indexer = indexer
+        self.prototype_embeddings = {}
+        self.stats = {}
+
+    def setup(self):
+        """Gera embeddings dos protótipos se houver modelo de embeddings disponível"""
+        self.prototype_embeddings = {}
+        model = getattr(self.indexer, "model", None)
+        if model is None:
+            return
+
+        for label, texts in PROTOTYPES.items():
+            self.prototype_embeddings[label] = model.encode(
+                texts,
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+
+    def score_page(self, text: str, embedding: Optional[np.ndarray] = None) -> Dict[str, float]:
+        """
+        Calcula pontuações de cada classe a partir de sinais baratos.
+
+        Args:
+            text: Texto markdown da página
+            embedding: Embedding da página (opcional)
+
+        Returns:
+            Dicionário com pontuação por classe e sinais usados
+        """
+        price_hits = len(PRICE_PATTERN.findall(text))
+        price_tables = self._count_price_tables(text)
+        tour_fields = sum(1 for p in TOUR_FIELD_PATTERNS if p.search(text))
+        metadata_hits = sum(1 for p in METADATA_PATTERNS if p.search(text))
+
+        tours_score = 2.0 * min(price_tables, 2) + 0.5 * min(price_hits, 4) + 1.0 * tour_fields
+        metadata_score = 1.0 * metadata_hits
+
+        # Similaridade com protótipos rotulados (desempate semântico)
+        if embedding is not None and self.prototype_embeddings:
+            sims = self._prototype_similarity(embedding)
+            best = max(sims, key=sims.get)
+            if best == PAGE_TOURS:
+                tours_score += 1.0
+            elif best == PAGE_METADATA:
+                metadata_score += 1.0
+
+        return {
+            PAGE_TOURS: tours_score,
+            PAGE_METADATA: metadata_score,
+            "price_hits": price_hits,
+            "price_tables": price_tables,
+            "tour_fields": tour_fields,
+            "metadata_hits": metadata_hits,
+        }
+
+    def classify(self, text: str, idx: int = 0, embedding: Optional[np.ndarray] = None) -> str:
+        """Classifica uma página"""
+        if not text.strip():
+            return PAGE_IRRELEVANT
+
+        scores = self.score_page(text, embedding)
+        if scores[PAGE_TOURS] >= self.config.triage_min_tour_score:
+            return PAGE_TOURS
+        if idx < self.config.triage_metadata_pages or scores[PAGE_METADATA] >= 1.0:
+            return PAGE_METADATA
+        return PAGE_IRRELEVANT
+
+    def classify_pages(self, texts: List[str], embeddings: Optional[np.ndarray] = None) -> List[str]:
+        """
+        Classifica todas as páginas e registra estatísticas da triagem.
+
+        Args:
+            texts: Textos das páginas, na ordem do documento
+            embeddings: Matriz de embeddings das páginas (opcional)
+
+        Returns:
+            Lista com a classe de cada página
+        """
+        if embeddings is not None and len(embeddings) != len(texts):
+            embeddings = None
+
+        labels = [
+            self.classify(text, idx, embeddings[idx] if embeddings is not None else None)
+            for idx, text in enumerate(texts)
+        ]
+
+        total = len(labels)
+        skipped = labels.count(PAGE_IRRELEVANT)
+        self.stats = {
+            "total_pages": total,
+            PAGE_TOURS: labels.count(PAGE_TOURS),
+            PAGE_METADATA: labels.count(PAGE_METADATA),
+            PAGE_IRRELEVANT: skipped,
+            "skip_rate": skipped / total if total else 0.0,
+            "llm_calls_saved": skipped,
+        }
+
+        self.logger.info(
+            f"Triagem: {self.stats[PAGE_TOURS]} tours, {self.stats[PAGE_METADATA]} metadados, "
+            f"{skipped} irrelevantes | {skipped}/{total} páginas ignoradas "
+            f"({self.stats['skip_rate']:.0%}), {skipped} chamadas LLM evitadas"
+        )
+        return labels
+
+    def _count_price_tables(self, text: str) -> int:
+        """Conta tabelas markdown com formato de tabela de preços"""
+        count = 0
+        for table in self._markdown_tables(text):
+            header, rows = table[0], table[1:]
+            cells = [c for row in rows for c in row if c]
+            if not cells:
+                continue
+            numeric = sum(1 for c in cells if re.fullmatch(r"[$€£]?\s?\d+(?:[.,]\d+)?\s?(?:€|[A-Z]{3})?", c))
+            header_text = " ".join(header)
+            if numeric / len(cells) >= 0.3 or (PRICE_HEADER_PATTERN.search(header_text) and numeric):
+                count += 1
+        return count
+
+    @staticmethod
+    def _markdown_tables(text: str) -> List[List[List[str]]]:
+        """Separa as tabelas markdown da página em linhas de células (sem a linha separadora)"""
+        tables, current = [], []
+        for line in text.splitlines():
+            line = line.strip()
+            if line.startswith("|") and line.endswith("|"):
+                if re.fullmatch(r"\|[\s:|-]+\|", line):
+                    continue
+                current.append([c.strip() for c in line.strip("|").split("|")])
+            elif current:
+                tables.append(current)
+                current = []
+        if current:
+            tables.append(current)
+        return tables
+
+    def _prototype_similarity(self, embedding: np.ndarray) -> Dict[str, float]:
+        """Similaridade máxima (cosseno) do embedding da página com cada classe"""
+        vec = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        if norm > 0:
+            vec = vec / norm
+        return {
+            label: float(np.max(protos @ vec))
+            for label, protos in self.prototype_embeddings.items()
+        }
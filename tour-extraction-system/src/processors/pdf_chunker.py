@@ -4,6 +4,8 @@ Converte PDF em chunks markdown por página.
 import os
 import gc
 import tempfile
+import threading
+from typing import Dict, Optional
 from PyPDF2 import PdfReader, PdfWriter
 from docling.document_converter import DocumentConverter
 from docling.datamodel.base_models import InputFormat
@@ -21,17 +23,25 @@ class PDFChunker:
         self.config = config
         self.logger = logger
         self.converter = None
+        # Conversões Docling serializadas quando o conversor é compartilhado (modo multi-PDF)
+        self.convert_lock = threading.Lock()
     
     def setup(self):
-        """Inicializa conversor Docling"""
+        """Prepara o diretório de chunks e inicializa o conversor Docling (uma vez)"""
         os.makedirs(self.config.chunks_dir, exist_ok=True)
-        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
         
         # Limpa chunks antigos
         for fn in os.listdir(self.config.chunks_dir):
             if fn.endswith('.md'):
                 os.remove(os.path.join(self.config.chunks_dir, fn))
         
+        if self.converter is None:
+            self.setup_converter()
+    
+    def setup_converter(self):
+        """Carrega os modelos do Docling"""
+        os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+        
         # Configura Docling
         pdf_options = PdfPipelineOptions(do_ocr=self.config.enable_ocr)
         self.converter = DocumentConverter(
@@ -40,22 +50,36 @@ class PDFChunker:
         
         self.logger.info(f"PDF Chunker configurado (OCR: {self.config.enable_ocr})")
     
-    def process(self, pdf_path: str) -> int:
+    def share(self, other: "PDFChunker"):
+        """Usa o conversor Docling já carregado por outro chunker (modo multi-PDF)"""
+        self.converter = other.converter
+        self.convert_lock = other.convert_lock
+    
+    def process(self, pdf_path: str, reuse: Optional[Dict[int, str]] = None) -> int:
         """
         Processa PDF e retorna número de chunks gerados.
         
         Args:
             pdf_path: Caminho para o arquivo PDF
+            reuse: Markdown já convertido de páginas inalteradas (índice da
+                página -> texto), gravado sem passar pelo Docling
             
         Returns:
             Número de páginas/chunks processados
         """
         reader = PdfReader(pdf_path)
         num_pages = len(reader.pages)
+        reuse = reuse or {}
         self.logger.info(f"Processando {num_pages} páginas...")
         
         with tempfile.TemporaryDirectory() as tmp_dir:
             for page_num in range(1, num_pages + 1):
+                out_path = os.path.join(self.config.chunks_dir, f"page_{page_num:03d}.md")
+                if page_num - 1 in reuse:
+                    with open(out_path, "w", encoding="utf-8") as f:
+                        f.write(reuse[page_num - 1])
+                    continue
+                
                 # Cria PDF temporário com uma página
                 tmp_pdf = os.path.join(tmp_dir, f"page_{page_num:03d}.pdf")
                 writer = PdfWriter()
@@ -65,11 +89,11 @@ class PDFChunker:
                     writer.write(f)
                 
                 # Converte para markdown
-                result = self.converter.convert(tmp_pdf)
-                md_text = result.document.export_to_markdown()
+                with self.convert_lock:
+                    result = self.converter.convert(tmp_pdf)
+                    md_text = result.document.export_to_markdown()
                 
                 # Salva chunk
-                out_path = os.path.join(self.config.chunks_dir, f"page_{page_num:03d}.md")
                 with open(out_path, "w", encoding="utf-8") as f:
                     f.write(md_text)
                 
@@ -77,5 +101,9 @@ class PDFChunker:
                 del result, md_text
                 gc.collect()
         
-        self.logger.info(f"Chunking concluído: {num_pages} páginas processadas")
+        reused = sum(1 for i in range(num_pages) if i in reuse)
+        self.logger.info(
+            f"Chunking concluído: {num_pages} páginas processadas"
+            + (f" ({reused} reaproveitadas da revisão anterior)" if reused else "")
+        )
         return num_pages
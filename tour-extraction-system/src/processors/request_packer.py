@@ -0,0 +1,89 @@
+"""
+Agrupa páginas pequenas em uma única requisição ao LLM.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from ..core.config import SystemConfig
+from ..core.logger import Logger
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimativa barata de tokens (aprox. 4 caracteres por token)"""
+    return max(1, len(text) // 4)
+
+
+class RequestPacker:
+    """
+    Empacota chunks pequenos, adjacentes ou semanticamente similares, em
+    grupos que cabem em um orçamento de tokens. Cada grupo vira uma única
+    requisição, economizando o overhead fixo do prompt e uma ida à rede.
+    """
+
+    def __init__(self, config: SystemConfig, logger: Logger):
+        self.config = config
+        self.logger = logger
+        self.stats = {}
+
+    def pack(self, indices: List[int], texts: List[str],
+             embeddings: Optional[np.ndarray] = None) -> List[List[int]]:
+        """
+        Agrupa os índices de chunks.
+
+        Args:
+            indices: Índices dos chunks que irão para o LLM (ordem do documento)
+            texts: Textos de todos os chunks
+            embeddings: Embeddings normalizados dos chunks (opcional)
+
+        Returns:
+            Lista de grupos; grupos com um único índice são requisições normais
+        """
+        if embeddings is not None and len(embeddings) != len(texts):
+            embeddings = None
+
+        groups, current, current_tokens = [], [], 0
+        for idx in indices:
+            tokens = estimate_tokens(texts[idx][:self.config.max_context_chars])
+            if tokens > self.config.packing_small_chunk_tokens:
+                groups.append([idx])
+                continue
+
+            fits = (
+                current
+                and current_tokens + tokens <= self.config.packing_max_tokens
+                and len(current) < self.config.packing_max_chunks
+                and self._related(current[-1], idx, embeddings)
+            )
+            if fits:
+                current.append(idx)
+                current_tokens += tokens
+            else:
+                if current:
+                    groups.append(current)
+                current, current_tokens = [idx], tokens
+        if current:
+            groups.append(current)
+
+        groups.sort(key=lambda g: g[0])
+        self.stats = {
+            "chunks": len(indices),
+            "requests": len(groups),
+            "packed_requests": sum(1 for g in groups if len(g) > 1),
+            "requests_saved": len(indices) - len(groups),
+        }
+        self.logger.info(
+            f"Empacotamento: {self.stats['chunks']} chunks em {self.stats['requests']} requisições "
+            f"({self.stats['packed_requests']} agrupadas, {self.stats['requests_saved']} requisições economizadas)"
+        )
+        return groups
+
+    def _related(self, prev_idx: int, idx: int, embeddings: Optional[np.ndarray]) -> bool:
+        """Páginas adjacentes ou com similaridade acima do limiar"""
+        if idx - prev_idx == 1:
+            return True
+        if embeddings is None:
+            return False
+        a, b = embeddings[prev_idx], embeddings[idx]
+        denom = float(np.linalg.norm(a) * np.linalg.norm(b)) or 1.0
+        return float(np.dot(a, b)) / denom >= self.config.packing_similarity_threshold
@@ -1,14 +1,21 @@
 """
-Exporta resultados em JSON e Excel.
+Exporta resultados em JSON, Excel e tabelas normalizadas (Excel/Parquet).
 """
 
 import os
 import json
 import time
+import importlib.util
+from typing import Dict, Any, Iterator, List, Tuple, Optional, Union
+
 import pandas as pd
-from typing import Dict, Any, Tuple, Optional
+from openpyxl import Workbook
+from ..core.catalog_model import CompactCatalog
 from ..core.config import SystemConfig
 from ..core.logger import Logger
+from .catalog_store import CatalogStore
+from .catalog_tables import arrow_safe, catalog_tables
+from ..utils.catalog_io import write_catalog
 
 class ResultExporter:
     """Exportador de resultados"""
@@ -17,12 +24,24 @@ class ResultExporter:
         self.config = config
         self.logger = logger
     
-    def export(self, catalog: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
-        """Exporta para JSON e/ou Excel"""
+    def export(self, catalog: Union[CompactCatalog, Dict[str, Any]],
+               tables: Optional[Dict[str, pd.DataFrame]] = None,
+               source: Optional[str] = None) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Exporta para JSON e/ou Excel (e, se configurado, para o banco SQLite).
+        
+        Args:
+            catalog: Catálogo compacto (CompactCatalog); um catálogo em dicts é convertido uma vez
+            tables: Tabelas do catálogo já achatadas (catalog_tables) para os exports normalizados e
+                SQLite; achatadas aqui se omitidas e necessárias
+            source: Documento de origem no banco SQLite (nome do PDF)
+        """
         os.makedirs(self.config.results_dir, exist_ok=True)
+        catalog = CompactCatalog.of(catalog)
         
         json_path = None
         xlsx_path = None
+        normalized = self.config.export_normalized_excel or self.config.export_parquet
         
         if self.config.export_json:
             json_path = self._export_json(catalog)
@@ -30,155 +49,237 @@ class ResultExporter:
         if self.config.export_excel:
             xlsx_path = self._export_excel(catalog)
         
+        # Achatamento em tabelas só para os exports normalizados/SQLite
+        if tables is None and (normalized or self.config.export_sqlite):
+            tables = catalog_tables(catalog)
+        
+        if normalized:
+            self.export_normalized(catalog, tables)
+        
+        if self.config.export_sqlite:
+            self.export_sqlite(catalog, tables, source)
+        
         return json_path, xlsx_path
     
-    def _export_json(self, catalog: Dict[str, Any]) -> str:
-        """Exporta para JSON"""
-        json_path = os.path.join(self.config.results_dir, "tours_extracted.json")
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(catalog, f, ensure_ascii=False, indent=2)
-        self.logger.info(f"JSON salvo: {json_path}")
+    def export_normalized(self, catalog: Union[CompactCatalog, Dict[str, Any]],
+                          tables: Optional[Dict[str, pd.DataFrame]] = None) -> Dict[str, str]:
+        """
+        Exporta as tabelas normalizadas (tours, options, option_prices,
+        pricing_matrix, non_operating_periods), ligadas por tour_id: textos
+        longos do tour aparecem uma única vez em vez de em cada linha de preço.
+        
+        Returns:
+            Caminhos gerados por formato ("excel", "parquet")
+        """
+        if tables is None:
+            tables = catalog_tables(CompactCatalog.of(catalog))
+        paths = {}
+        
+        if self.config.export_normalized_excel:
+            paths["excel"] = os.path.join(self.config.results_dir, "tours_normalized.xlsx")
+            self._write_sheets(paths["excel"], tables)
+            self.logger.info(
+                f"Excel normalizado salvo: {paths['excel']} "
+                f"({', '.join(f'{name}={len(frame)}' for name, frame in tables.items())})"
+            )
+        
+        if self.config.export_parquet:
+            if importlib.util.find_spec("pyarrow") is None:
+                self.logger.warning("Export Parquet requer pyarrow (pip install pyarrow); ignorado")
+                return paths
+            paths["parquet"] = os.path.join(self.config.results_dir, "parquet")
+            os.makedirs(paths["parquet"], exist_ok=True)
+            for name, frame in tables.items():
+                arrow_safe(frame).to_parquet(os.path.join(paths["parquet"], f"{name}.parquet"), index=False)
+            self.logger.info(f"Tabelas Parquet salvas em {paths['parquet']}")
+        return paths
+    
+    def export_sqlite(self, catalog: Union[CompactCatalog, Dict[str, Any]], tables: Optional[Dict[str, pd.DataFrame]] = None,
+                      source: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Atualiza o catálogo no banco SQLite (export.sqlite.path), onde os tours
+        de todas as execuções ficam consultáveis (CatalogStore.find_tours).
+        Sem source, o documento é identificado pela agência do catálogo.
+        """
+        catalog = CompactCatalog.of(catalog)
+        source = source or catalog.agency or "catalog"
+        with CatalogStore(self.config.sqlite_path, self.logger) as store:
+            return store.upsert(catalog, source, tables)
+    
+    @staticmethod
+    def _write_sheets(path: str, tables: Dict[str, Any]):
+        """Uma planilha por tabela, gravada em streaming (write-only)"""
+        workbook = Workbook(write_only=True)
+        for name, frame in tables.items():
+            sheet = workbook.create_sheet(name)
+            sheet.append(list(frame.columns))
+            for row in frame.itertuples(index=False, name=None):
+                sheet.append([None if v is None or v != v else _cell_value(v) for v in row])
+        workbook.save(path)
+    
+    def _export_json(self, catalog: Union[CompactCatalog, Dict[str, Any]]) -> str:
+        """Exporta para JSON no formato e compressão configurados (export.json)"""
+        start = time.perf_counter()
+        json_path = write_catalog(
+            catalog, os.path.join(self.config.results_dir, "tours_extracted"),
+            self.config.json_format, self.config.json_compression
+        )
+        self.logger.info(
+            f"JSON salvo: {json_path} ({os.path.getsize(json_path) / 2**20:.1f} MB, "
+            f"{time.perf_counter() - start:.2f}s)"
+        )
         return json_path
     
-    def _export_excel(self, catalog: Dict[str, Any]) -> str:
-        """Exporta para Excel com formato completo multi-formato"""
-        rows = []
+    def _export_excel(self, catalog: Union[CompactCatalog, Dict[str, Any]]) -> Optional[str]:
+        """
+        Exporta para Excel com formato completo multi-formato.
         
-        for tour in catalog.get("tours", []):
-            # Descrição completa
-            desc = tour.get("description", "")
-            
-            # Duration
-            duration_obj = tour.get("duration", {})
-            duration_val = duration_obj.get("quantity", "") if isinstance(duration_obj, dict) else ""
-            duration_unit = duration_obj.get("unit", "") if isinstance(duration_obj, dict) else ""
-            
-            # Location
-            location_obj = tour.get("location", {})
-            location_main = location_obj.get("main", "") if isinstance(location_obj, dict) else ""
-            location_region = location_obj.get("region", "") if isinstance(location_obj, dict) else ""
-            location_zone = location_obj.get("zone", "") if isinstance(location_obj, dict) else ""
-            
-            # Schedule
-            schedule_obj = tour.get("schedule", {})
-            departure_time = schedule_obj.get("departure_time", "") if isinstance(schedule_obj, dict) else ""
-            return_time = schedule_obj.get("return_time", "") if isinstance(schedule_obj, dict) else ""
-            frequency = schedule_obj.get("frequency", "") if isinstance(schedule_obj, dict) else ""
-            
-            # Includes/Excludes
-            includes = tour.get("includes", [])
-            includes_str = "; ".join(includes) if includes else ""
-            excludes = tour.get("excludes", [])
-            excludes_str = "; ".join(excludes) if excludes else ""
-            
-            # Language options
-            lang_opts = tour.get("language_options", [])
-            lang_opts_str = "; ".join(lang_opts) if lang_opts else ""
-            
-            # Source chunks
-            source_chunks = tour.get("source_chunks", [])
-            source_chunks_str = "; ".join(source_chunks) if source_chunks else ""
-            
-            # Operation
-            operation_obj = tour.get("operation", {})
-            non_operating = operation_obj.get("non_operating_periods", []) if isinstance(operation_obj, dict) else []
-            non_operating_str = "; ".join([str(p) for p in non_operating]) if non_operating else ""
-            
-            # Base row com todos os campos
-            base_row = {
-                # "ID": tour.get("id", ""),
-                "City": tour.get("city", ""),
-                "Title": tour.get("title", ""),
-                "Location Main": location_main,
-                "Location Region": location_region,
-                "Location Zone": location_zone,
-                "Description": desc,
-                "Duration": duration_val,
-                "Duration Unit": duration_unit,
-                "Departure Time": departure_time,
-                "Return Time": return_time,
-                "Frequency": frequency,
-                "Meeting Point": tour.get("meeting_point", ""),
-                "Includes": includes_str,
-                "Excludes": excludes_str,
-                "Language Options": lang_opts_str,
-                "Min Adults": tour.get("min_adults", ""),
-                "Max Adults": tour.get("max_adults", ""),
-                "Max Children": tour.get("max_childrens", ""),
-                "Min Booking": tour.get("min_booking", ""),
-                "Non Operating Periods": non_operating_str,
-                "Observations": tour.get("observations", ""),
-                "Source Chunks": source_chunks_str,
-                "Pricing Type": tour.get("pricing_type", "")
-            }
-            
-            # Detecta formato de preços
-            pricing_type = tour.get("pricing_type", "")
-            
-            if pricing_type == "per_vehicle":
-                # Formato europeu (options)
-                options = tour.get("options", [])
-                if options:
-                    for opt in options:
-                        opt_name = opt.get("name_option", "")
-                        opt_details = opt.get("details", [])
-                        
-                        if opt_details:
-                            for detail in opt_details:
-                                row = base_row.copy()
-                                row["Option Name"] = opt_name
-                                row["Capacity"] = detail.get("capacity", "")
-                                row["Vehicle Options"] = detail.get("vehicle_options", "")
-                                
-                                price_obj = detail.get("price", {})
-                                if isinstance(price_obj, dict):
-                                    row["Price"] = price_obj.get("quantity", "")
-                                    row["Currency"] = price_obj.get("currency", "")
-                                else:
-                                    row["Price"] = ""
-                                    row["Currency"] = ""
-                                
-                                rows.append(row)
-                        else:
-                            row = base_row.copy()
-                            row["Option Name"] = opt_name
-                            row["Capacity"] = ""
-                            row["Vehicle Options"] = ""
-                            row["Price"] = ""
-                            row["Currency"] = ""
-                            rows.append(row)
-                else:
-                    rows.append(base_row)
-                    
-            elif pricing_type == "per_person":
-                # Formato latino-americano (pricing_matrix)
-                pricing_matrix = tour.get("pricing_matrix", [])
-                
-                if pricing_matrix:
-                    for pax_pricing in pricing_matrix:
-                        row = base_row.copy()
-                        row["Pax Count"] = pax_pricing.get("pax_count", "")
-                        row["Price"] = pax_pricing.get("price", "")
-                        row["Currency"] = pax_pricing.get("currency", "")
-                        rows.append(row)
-                else:
-                    rows.append(base_row)
-            else:
-                # Sem informação de preços
-                rows.append(base_row)
+        As linhas são geradas tour a tour a partir do catálogo compacto e
+        gravadas direto em um workbook openpyxl write-only: a memória não
+        cresce com tours x preços x colunas.
+        """
+        catalog = CompactCatalog.of(catalog)
+        if not len(catalog):
+            return None
         
-        if rows:
-            df = pd.DataFrame(rows)
-            excel_path = os.path.join(self.config.results_dir, "tours_extracted.xlsx")
-            
-            try:
-                df.to_excel(excel_path, index=False, engine='openpyxl')
-                self.logger.info(f"Excel salvo: {excel_path}")
-                return excel_path
-            except PermissionError:
-                alt_path = os.path.join(self.config.results_dir, f"tours_{int(time.time())}.xlsx")
-                df.to_excel(alt_path, index=False, engine='openpyxl')
-                self.logger.info(f"Excel salvo: {alt_path}")
-                return alt_path
+        excel_path = os.path.join(self.config.results_dir, "tours_extracted.xlsx")
+        try:
+            rows = self._write_excel(excel_path, catalog)
+        except PermissionError:
+            excel_path = os.path.join(self.config.results_dir, f"tours_{int(time.time())}.xlsx")
+            rows = self._write_excel(excel_path, catalog)
+        self.logger.info(f"Excel salvo: {excel_path} ({rows} linhas)")
+        return excel_path
+    
+    def _write_excel(self, path: str, catalog: CompactCatalog) -> int:
+        """Grava as linhas em streaming, na planilha e colunas do export anterior (pandas.to_excel)"""
+        columns = excel_columns(catalog)
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet("Sheet1")
+        sheet.append(columns)
         
+        count = 0
+        for row in iter_excel_rows(catalog):
+            sheet.append([_cell_value(row.get(name)) for name in columns])
+            count += 1
+        workbook.save(path)
+        return count
+
+
+BASE_COLUMNS = [
+    # "ID",
+    "City", "Title", "Location Main", "Location Region", "Location Zone", "Description",
+    "Duration", "Duration Unit", "Departure Time", "Return Time", "Frequency", "Meeting Point",
+    "Includes", "Excludes", "Language Options", "Min Adults", "Max Adults", "Max Children",
+    "Min Booking", "Non Operating Periods", "Observations", "Source Chunks", "Pricing Type",
+]
+OPTION_COLUMNS = ["Option Name", "Capacity", "Vehicle Options", "Price", "Currency"]
+MATRIX_COLUMNS = ["Pax Count", "Price", "Currency"]
+
+
+
+def _cell_value(value: Any) -> Any:
+    """Valor aceito pelo openpyxl (estruturas viram texto)"""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    if isinstance(value, float) and value != value:
         return None
+    return value
+
+
+def _joined(values) -> Optional[str]:
+    """Lista unida por "; " (None se vazia ou ausente)"""
+    return "; ".join(map(str, values)) or None if values is not None else None
+
+
+def _periods(periods) -> Optional[str]:
+    """Períodos sem operação unidos por "; " (objetos como {start, end, date})"""
+    texts = []
+    for period in periods or ():
+        if isinstance(period, dict):
+            texts.append(str({k: period.get(k) for k in ("start", "end", "date") if period.get(k) is not None}))
+        elif period is not None and period == period:
+            texts.append(str(period))
+    return "; ".join(texts) or None
+
+
+def _base_row(record) -> Dict[str, Any]:
+    """Colunas do tour (BASE_COLUMNS) a partir do TourRecord"""
+    return {
+        "City": record.city,
+        "Title": record.title,
+        "Location Main": record.location_main,
+        "Location Region": record.location_region,
+        "Location Zone": record.location_zone,
+        "Description": record.description,
+        "Duration": record.duration,
+        "Duration Unit": record.duration_unit,
+        "Departure Time": record.departure_time,
+        "Return Time": record.return_time,
+        "Frequency": record.frequency,
+        "Meeting Point": record.meeting_point,
+        "Includes": _joined(record.includes),
+        "Excludes": _joined(record.excludes),
+        "Language Options": _joined(record.language_options),
+        "Min Adults": record.min_adults,
+        "Max Adults": record.max_adults,
+        "Max Children": record.max_childrens,
+        "Min Booking": record.min_booking,
+        "Non Operating Periods": _periods(record.non_operating_periods),
+        "Observations": record.observations,
+        "Source Chunks": _joined(record.source_chunks),
+        "Pricing Type": record.pricing_type,
+    }
+
+
+def excel_columns(catalog: CompactCatalog) -> List[str]:
+    """Colunas na ordem da primeira ocorrência (a mesma do DataFrame do export anterior)"""
+    columns = dict.fromkeys(BASE_COLUMNS)
+    seen = set()
+    for i, record in enumerate(catalog.tours):
+        if record.pricing_type == "per_vehicle" and catalog.option_offsets[i + 1] > catalog.option_offsets[i]:
+            kind = "options"
+        elif record.pricing_type == "per_person" and catalog.matrix_offsets[i + 1] > catalog.matrix_offsets[i]:
+            kind = "matrix"
+        else:
+            continue
+        if kind not in seen:
+            seen.add(kind)
+            columns.update(dict.fromkeys(OPTION_COLUMNS if kind == "options" else MATRIX_COLUMNS))
+            if len(seen) == 2:
+                break
+    return list(columns)
+
+
+def iter_excel_rows(catalog: CompactCatalog) -> Iterator[Dict[str, Any]]:
+    """
+    Uma linha por detalhe de preço (per_vehicle) ou por faixa de passageiros
+    (per_person); tours sem preços geram uma única linha.
+    
+    Percorre os registros do catálogo compacto tour a tour, indexando as
+    colunas de preço pelos offsets; cada linha é gerada sob demanda e pode ser
+    descartada após a gravação.
+    """
+    option_offsets, detail_offsets, matrix_offsets = catalog.option_offsets, catalog.detail_offsets, catalog.matrix_offsets
+    option_names, capacities, vehicles = catalog.option_name, catalog.detail_capacity, catalog.detail_vehicle
+    detail_prices, detail_currencies = catalog.column_values("detail_price"), catalog.detail_currency
+    matrix_pax, matrix_prices = catalog.column_values("matrix_pax"), catalog.column_values("matrix_price")
+    matrix_currencies = catalog.matrix_currency
+    for i, record in enumerate(catalog.tours):
+        row = _base_row(record)
+        if record.pricing_type == "per_vehicle" and option_offsets[i + 1] > option_offsets[i]:
+            for j in range(option_offsets[i], option_offsets[i + 1]):
+                name = option_names[j]
+                if detail_offsets[j + 1] == detail_offsets[j]:
+                    # Opção sem detalhes: linha só com o nome
+                    yield {**row, "Option Name": name}
+                for k in range(detail_offsets[j], detail_offsets[j + 1]):
+                    yield {**row, "Option Name": name, "Capacity": capacities[k],
+                           "Vehicle Options": vehicles[k], "Price": detail_prices[k],
+                           "Currency": detail_currencies[k]}
+        elif record.pricing_type == "per_person" and matrix_offsets[i + 1] > matrix_offsets[i]:
+            for k in range(matrix_offsets[i], matrix_offsets[i + 1]):
+                yield {**row, "Pax Count": matrix_pax[k], "Price": matrix_prices[k],
+                       "Currency": matrix_currencies[k]}
+        else:
+            yield row
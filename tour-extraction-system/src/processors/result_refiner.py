@@ -116,9 +116,16 @@
 #         return unique
 
 import os
-import json
+import math
 import pandas as pd
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
+
+from ..core.catalog_model import CompactCatalog
+from .tour_dedup import FuzzyDeduplicator
+from ..utils.catalog_io import read_catalog
+
+REFINED_COLUMNS = ["City", "Title", "Location_Main", "Description", "Duration", "Duration_Unit", "Min_Adults",
+                   "Observations", "Price", "Currency"]
 
 class ResultRefiner:
     """
@@ -129,36 +136,37 @@ class ResultRefiner:
     def __init__(self, config, logger):
         self.config = config
         self.logger = logger
+        self.deduplicator = FuzzyDeduplicator(config, logger)
 
-    def refine(self, raw_json_path: str) -> str:
+    def refine(self, source: Union[str, CompactCatalog, Dict[str, Any], List[Dict[str, Any]]]) -> str:
         """
-        Refina o JSON bruto e gera Excel limpo para usuário final.
+        Refina o catálogo e gera Excel limpo para usuário final.
         Args:
-            raw_json_path: Caminho do tours_extracted.json
+            source: Catálogo em memória (CompactCatalog, dict com 'tours' ou lista de tours) ou caminho do catálogo gravado
+                (tours_extracted.json/.jsonl, comprimido ou não)
         Returns:
             Caminho do arquivo Excel refinado gerado
         """
         self.logger.info("Iniciando refinamento dos resultados...")
 
-        with open(raw_json_path, "r", encoding="utf-8") as f:
-            raw_data = json.load(f)
-
-        # Suporta tanto lista de tours quanto dicionário com chave 'tours'
-        if isinstance(raw_data, dict) and "tours" in raw_data:
-            tours = raw_data["tours"]
-        elif isinstance(raw_data, list):
-            tours = raw_data
+        if isinstance(source, str):
+            raw_data = read_catalog(source)
         else:
+            raw_data = source
+
+        # Suporta catálogo compacto, lista de tours ou dicionário com chave 'tours'
+        if not isinstance(raw_data, (CompactCatalog, list)) and not (isinstance(raw_data, dict) and "tours" in raw_data):
             raise ValueError("Formato de entrada inválido: esperado lista ou dict com chave 'tours'.")
+        catalog = CompactCatalog.of(raw_data)
 
         # Extrai e limpa registros
-        refined_records = self._extract_refined_records(tours)
+        refined_records = self._extract_refined_records(catalog)
         # Remove duplicatas
         unique_records = self._remove_duplicates(refined_records)
         # Formata e exporta para Excel
         output_path = os.path.join(self.config.results_dir, "tours_extracted_refined.xlsx")
         os.makedirs(self.config.results_dir, exist_ok=True)
-        df = pd.DataFrame(unique_records)
+        df = pd.DataFrame(unique_records, columns=REFINED_COLUMNS)
         column_order = [
             "Title",
             "Location_Main",
@@ -175,56 +183,39 @@ class ResultRefiner:
         self.logger.info(f"Excel refinado salvo em: {output_path}")
         return output_path
 
-    def _extract_refined_records(self, tours: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def _extract_refined_records(self, catalog: CompactCatalog) -> List[Dict[str, Any]]:
         """
         Extrai os campos essenciais de cada tour, buscando o menor preço disponível em todas as opções.
         """
+        option_offsets, detail_offsets = catalog.option_offsets, catalog.detail_offsets
+        prices, price_values = catalog.detail_price, catalog.column_values("detail_price")
         refined = []
-        for tour in tours:
-            title = tour.get("title")
-            location = tour.get("location", {})
-            location_main = location.get("main") if isinstance(location, dict) else tour.get("location_main", "")
-            description = tour.get("description")
-            duration_info = tour.get("duration", {})
-            duration = duration_info.get("quantity") if isinstance(duration_info, dict) else tour.get("duration")
-            duration_unit = duration_info.get("unit") if isinstance(duration_info, dict) else tour.get("duration_unit")
-            min_adults = tour.get("min_booking") or tour.get("min_adults")
-            observations = tour.get("observations", "")
-
-            # Agora busca o menor preço e a moeda correspondente em todas as opções/detalhes
-            min_price = None
-            min_currency = None
-            if "options" in tour and isinstance(tour["options"], list):
-                for option in tour["options"]:
-                    details = option.get("details", [])
-                    for d in details:
-                        price_info = d.get("price", {})
-                        price = price_info.get("quantity")
-                        curr = price_info.get("currency")
-                        # Salva preço/min_price se: é o primeiro OU menor valor encontrado
-                        if price is not None and (min_price is None or price < min_price):
-                            min_price = price
-                            min_currency = curr
-
-            price = min_price if min_price is not None else ""
-            currency = min_currency if min_currency is not None else ""
-
+        for i, record in enumerate(catalog.tours):
+            # Menor preço numérico do tour (primeira ocorrência em empates); NaN = nulo ou texto ("sob consulta")
+            cheapest = None
+            for k in range(detail_offsets[option_offsets[i]], detail_offsets[option_offsets[i + 1]]):
+                price = prices[k]
+                if not math.isnan(price) and (cheapest is None or price < prices[cheapest]):
+                    cheapest = k
+            min_booking = record.min_booking
             refined.append({
-                "Title": title,
-                "Location_Main": location_main,
-                "Description": description,
-                "Duration": duration,
-                "Duration_Unit": duration_unit,
-                "Min_Adults": min_adults,
-                "Observations": observations,
-                "Price": price,
-                "Currency": currency
+                "City": record.city,
+                "Title": record.title,
+                "Location_Main": record.location_main,
+                "Description": record.description,
+                "Duration": record.duration,
+                "Duration_Unit": record.duration_unit,
+                "Min_Adults": min_booking if min_booking is not None and min_booking != 0 else record.min_adults,
+                "Observations": record.observations if record.observations is not None else "",
+                "Price": price_values[cheapest] if cheapest is not None else "",
+                "Currency": (catalog.detail_currency[cheapest] if cheapest is not None else None) or "",
             })
         return refined
 
     def _remove_duplicates(self, records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Remove duplicatas considerando Title e Location_Main.
+        Remove duplicatas considerando Title e Location_Main e, se configurado,
+        quase duplicatas (títulos similares na mesma cidade e faixa de preço).
         """
         seen = set()
         unique = []
@@ -233,4 +224,10 @@ class ResultRefiner:
             if key not in seen and key != ("", ""):
                 seen.add(key)
                 unique.append(rec)
+
+        if self.config.dedup_fuzzy and len(unique) > 1:
+            cities = [r["City"] if r["City"] is not None else r["Location_Main"] for r in unique]
+            prices = [r["Price"] if isinstance(r["Price"], (int, float)) else math.nan for r in unique]
+            fuzzy = self.deduplicator.duplicates([r["Title"] for r in unique], cities, prices)
+            unique = [r for r, duplicate in zip(unique, fuzzy) if not duplicate]
         return unique
@@ -0,0 +1,339 @@
+"""
+Reextração incremental de novas revisões de um catálogo (tarifario_v2.pdf,
+tarifario_v3.pdf...).
+
+Cada página do PDF é identificada pelo hash do seu conteúdo (content stream
+e imagens/formulários referenciados). O estado da última execução de cada
+catálogo (markdown, embeddings e resposta da extração de cada página, mais o
+catálogo consolidado) fica em incremental_dir/<catálogo>; na revisão seguinte
+só passam de novo por OCR/Docling, embeddings e LLM as páginas novas ou
+alteradas e as páginas cujas referências semânticas (os chunks similares
+enviados junto no prompt) mudaram. O resultado é comparado com o catálogo
+anterior e as diferenças (tours adicionados, removidos e alterados) gravadas
+em results/catalog_diff.json.
+"""
+import os
+import re
+import json
+import time
+import hashlib
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Set, Union
+
+import numpy as np
+from PyPDF2 import PdfReader
+
+from ..core.catalog_model import CompactCatalog
+from ..utils.catalog_io import read_catalog, write_catalog
+from .semantic_indexer import REFERENCE_TOP_K
+from .tour_merger import normalize_text, tour_keys
+
+
+# Sufixos de versão removidos do nome do arquivo para identificar o catálogo
+VERSION_SUFFIX = re.compile(r"\s+(?:v|ver|version|versao|rev|revisao|revision)\s*\d+$")
+# Profundidade máxima de formulários (XObject /Form) aninhados no hash da página
+MAX_XOBJECT_DEPTH = 4
+
+
+def catalog_key(pdf_path: str) -> str:
+    """Identificador do catálogo: nome do PDF normalizado, sem sufixo de versão (_v2, -rev3...)"""
+    name = normalize_text(os.path.splitext(os.path.basename(pdf_path))[0])
+    while VERSION_SUFFIX.search(name):
+        name = VERSION_SUFFIX.sub("", name)
+    return name.replace(" ", "_") or "catalog"
+
+
+def _hash_xobjects(resources: Any, digest, depth: int):
+    resources = resources.get_object() if resources is not None else None
+    xobjects = resources.get("/XObject") if resources is not None else None
+    if xobjects is None or depth > MAX_XOBJECT_DEPTH:
+        return
+    xobjects = xobjects.get_object()
+    for name in sorted(xobjects):
+        obj = xobjects[name].get_object()
+        digest.update(str(name).encode())
+        try:
+            digest.update(obj.get_data())
+        except Exception:
+            digest.update(repr(obj).encode())
+        if obj.get("/Subtype") == "/Form":
+            _hash_xobjects(obj.get("/Resources"), digest, depth + 1)
+
+
+def page_hash(page) -> str:
+    """Hash do conteúdo de uma página (PyPDF2): texto/desenho, imagens, formulários, tamanho e rotação"""
+    digest = hashlib.sha256()
+    contents = page.get_contents()
+    if contents is not None:
+        digest.update(contents.get_data())
+    _hash_xobjects(page.get("/Resources"), digest, 0)
+    digest.update(repr([float(v) for v in page.mediabox]).encode())
+    digest.update(str(page.get("/Rotate", 0)).encode())
+    return digest.hexdigest()
+
+
+def page_hashes(pdf_path: str) -> List[str]:
+    reader = PdfReader(pdf_path)
+    return [page_hash(page) for page in reader.pages]
+
+
+def page_references(embeddings: Optional[np.ndarray], top_k: int = REFERENCE_TOP_K) -> List[List[int]]:
+    """
+    Chunks similares de cada página (produto interno dos embeddings, como o
+    índice FAISS), sem a própria página: os que a extração envia como referência.
+    """
+    if embeddings is None or len(embeddings) == 0:
+        return []
+    scores = embeddings @ embeddings.T
+    k = min(top_k, len(embeddings))
+    top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    return [[int(j) for j in row if j != i] for i, row in enumerate(top)]
+
+
+def _keyed_tours(catalog: CompactCatalog) -> Dict[str, Dict[str, Any]]:
+    tours = list(catalog.iter_tour_dicts())
+    keys = tour_keys([t.get("city") for t in tours], [t.get("title") for t in tours])
+    return dict(zip(keys, tours))
+
+
+def _label(tour: Dict[str, Any]) -> Dict[str, Any]:
+    return {"city": tour.get("city"), "title": tour.get("title"), "source_chunks": tour.get("source_chunks")}
+
+
+def catalog_diff(previous: Union[CompactCatalog, Dict[str, Any], None],
+                 current: Union[CompactCatalog, Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Tours adicionados, removidos e alterados entre duas revisões do catálogo.
+
+    Tours são pareados pela chave natural (cidade + tokens do título, como no
+    banco SQLite) e comparados no formato normalizado do catálogo compacto;
+    a página de origem (source_chunks) não conta como alteração.
+    """
+    old = _keyed_tours(CompactCatalog.of(previous)) if previous is not None else {}
+    new = _keyed_tours(CompactCatalog.of(current))
+    changed = []
+    for key, tour in new.items():
+        before = old.get(key)
+        if before is None:
+            continue
+        fields = sorted(f for f in before.keys() | tour.keys()
+                        if f != "source_chunks" and before.get(f) != tour.get(f))
+        if fields:
+            changed.append({**_label(tour), "fields": fields})
+    return {
+        "added": [_label(tour) for key, tour in new.items() if key not in old],
+        "removed": [_label(tour) for key, tour in old.items() if key not in new],
+        "changed": changed,
+        "unchanged": sum(1 for key in new if key in old) - len(changed),
+    }
+
+
+@dataclass
+class PageReuse:
+    """O que a extração reaproveita da revisão anterior"""
+    # Resposta consolidada de cada página reaproveitada (índice da página -> {"tours": [...]})
+    results: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    # Páginas refeitas: novas/alteradas ou com referências semânticas diferentes
+    stale: Set[int] = field(default_factory=set)
+    # Metadados do catálogo (agency/product) da revisão anterior
+    metadata: Optional[Dict[str, Any]] = None
+
+
+class RevisionTracker:
+    """Estado por catálogo entre revisões do mesmo PDF e relatório de diferenças"""
+
+    def __init__(self, config, logger):
+        self.config = config
+        self.logger = logger
+        self.catalog_id = None
+        self.state_dir = None
+        self.source = None
+        self.hashes: List[str] = []
+        self.manifest: Dict[str, Any] = {}
+        self.previous: Dict[str, int] = {}  # hash -> índice da página na revisão anterior
+        self.reuse: Optional[PageReuse] = None
+
+    def _path(self, *parts: str) -> str:
+        return os.path.join(self.state_dir, *parts)
+
+    def start(self, pdf_path: str, catalog_id: Optional[str] = None, source: Optional[str] = None) -> Dict[int, str]:
+        """
+        Calcula o hash das páginas e carrega o estado da revisão anterior.
+
+        Args:
+            pdf_path: Caminho do PDF
+            catalog_id: Catálogo de que o PDF é uma revisão (padrão: catalog_key do arquivo)
+            source: Nome do documento no relatório (padrão: nome do arquivo)
+
+        Returns:
+            Markdown das páginas inalteradas (índice -> texto), para o chunker
+        """
+        self.catalog_id = catalog_id or catalog_key(pdf_path)
+        self.state_dir = os.path.join(self.config.incremental_dir, self.catalog_id)
+        self.source = source or os.path.basename(pdf_path)
+        self.hashes = page_hashes(pdf_path)
+        self.reuse = None
+
+        self.manifest = {}
+        if os.path.exists(self._path("manifest.json")):
+            with open(self._path("manifest.json"), "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        pages = self.manifest.get("pages", [])
+        self.previous = {page["hash"]: i for i, page in enumerate(pages)}
+
+        texts = {}
+        for i, h in enumerate(self.hashes):
+            path = self._path("pages", f"{h}.md")
+            if h in self.previous and os.path.exists(path):
+                with open(path, "r", encoding="utf-8") as f:
+                    texts[i] = f.read()
+
+        if not self.manifest:
+            self.logger.info(f"Catálogo {self.catalog_id}: primeira revisão, {len(self.hashes)} páginas processadas")
+        else:
+            current = set(self.hashes)
+            self.logger.info(
+                f"Catálogo {self.catalog_id}: revisão {self.manifest['revision'] + 1} "
+                f"(anterior: {self.manifest.get('source')}); {len(texts)} de {len(self.hashes)} páginas "
+                f"inalteradas, {len(self.hashes) - len(texts)} novas/alteradas, "
+                f"{sum(1 for page in pages if page['hash'] not in current)} removidas"
+            )
+        return texts
+
+    def embeddings(self) -> Dict[int, np.ndarray]:
+        """Embeddings das páginas inalteradas, se calculados com o mesmo modelo"""
+        path = self._path("embeddings.npy")
+        if (not self.manifest or not os.path.exists(path)
+                or self.manifest.get("embedding_model") != self.config.embedding_model
+                or self.manifest.get("normalize_embeddings") != self.config.normalize_embeddings):
+            return {}
+        previous = np.load(path)
+        return {i: previous[self.previous[h]] for i, h in enumerate(self.hashes)
+                if h in self.previous and self.previous[h] < len(previous)}
+
+    def plan(self, embeddings: Optional[np.ndarray], md_files: List[str]) -> PageReuse:
+        """
+        Decide o que a extração reaproveita: a resposta de uma página inalterada
+        só é reaproveitada se as referências semânticas dela continuam as mesmas
+        páginas inalteradas (o prompt seria idêntico ao da revisão anterior).
+        """
+        pages = self.manifest.get("pages", [])
+        results = {}
+        if os.path.exists(self._path("results.json")):
+            results = read_catalog(self._path("results.json"))
+
+        stale = set()
+        for i, refs in enumerate(page_references(embeddings) or [[] for _ in self.hashes]):
+            h = self.hashes[i]
+            if h not in self.previous:
+                stale.add(i)
+                continue
+            if [self.hashes[j] for j in refs] != pages[self.previous[h]].get("references", []):
+                stale.add(i)
+
+        reuse = PageReuse(stale=stale, metadata=self.manifest.get("metadata"))
+        for i, h in enumerate(self.hashes):
+            if i in stale or h not in results:
+                continue
+            data = results[h]
+            # Origem atribuída pelo código, como em _finish_chunk: o nome da página pode ter mudado
+            chunk_filename = os.path.basename(md_files[i])
+            for tour in data.get("tours", []):
+                if isinstance(tour, dict):
+                    tour["source_chunks"] = [chunk_filename]
+            reuse.results[i] = data
+
+        changed = sum(1 for h in self.hashes if h not in self.previous)
+        if self.manifest:
+            self.logger.info(
+                f"Plano incremental: {len(stale)} páginas refeitas ({changed} novas/alteradas, "
+                f"{len(stale) - changed} com referências semânticas alteradas); "
+                f"{len(reuse.results)} respostas reaproveitadas"
+            )
+        self.reuse = reuse
+        return reuse
+
+    def finish(self, catalog: Union[CompactCatalog, Dict[str, Any]], page_results: Dict[int, Dict[str, Any]],
+               metadata: Dict[str, Any], texts: List[str], embeddings: Optional[np.ndarray]) -> Optional[str]:
+        """
+        Compara o catálogo com o da revisão anterior, grava o relatório de
+        diferenças e substitui o estado salvo pelo desta revisão.
+
+        Returns:
+            Caminho do relatório (results/catalog_diff.json)
+        """
+        catalog_base = self._path("catalog")
+        previous = read_catalog(catalog_base + ".json") if os.path.exists(catalog_base + ".json") else None
+        diff = catalog_diff(previous, catalog)
+
+        stale = self.reuse.stale if self.reuse is not None else set(range(len(self.hashes)))
+        revision = self.manifest.get("revision", 0) + 1
+        report = {
+            "catalog_id": self.catalog_id,
+            "revision": revision,
+            "source": self.source,
+            "previous_source": self.manifest.get("source"),
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "pages": {
+                "total": len(self.hashes),
+                "unchanged": sum(1 for h in self.hashes if h in self.previous),
+                "removed": sum(1 for h in self.previous if h not in set(self.hashes)),
+                "reextracted": len(stale),
+                "reused_results": len(self.reuse.results) if self.reuse is not None else 0,
+            },
+            "tours": {
+                "added": len(diff["added"]),
+                "removed": len(diff["removed"]),
+                "changed": len(diff["changed"]),
+                "unchanged": diff["unchanged"],
+            },
+            **{k: diff[k] for k in ("added", "removed", "changed")},
+        }
+        os.makedirs(self.config.results_dir, exist_ok=True)
+        report_path = os.path.join(self.config.results_dir, "catalog_diff.json")
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        self._save(catalog, page_results, metadata, texts, embeddings, revision)
+        counts = report["tours"]
+        self.logger.info(
+            f"Diferenças para a revisão anterior: {counts['added']} tours adicionados, {counts['removed']} "
+            f"removidos, {counts['changed']} alterados, {counts['unchanged']} inalterados ({report_path})"
+        )
+        return report_path
+
+    def _save(self, catalog, page_results, metadata, texts, embeddings, revision: int):
+        """Estado desta revisão: markdown, embeddings, respostas por página e catálogo"""
+        pages_dir = self._path("pages")
+        os.makedirs(pages_dir, exist_ok=True)
+        current = set(self.hashes)
+        for fn in os.listdir(pages_dir):
+            if fn.endswith(".md") and fn[:-3] not in current:
+                os.remove(os.path.join(pages_dir, fn))
+        for h, text in zip(self.hashes, texts):
+            path = os.path.join(pages_dir, f"{h}.md")
+            if not os.path.exists(path):
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(text)
+
+        if embeddings is not None:
+            np.save(self._path("embeddings.npy"), embeddings)
+        write_catalog({self.hashes[i]: data for i, data in page_results.items()}, self._path("results"), "compact")
+        write_catalog(catalog, self._path("catalog"), "compact")
+
+        references = page_references(embeddings)
+        manifest = {
+            "catalog_id": self.catalog_id,
+            "revision": revision,
+            "source": self.source,
+            "updated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "embedding_model": self.config.embedding_model,
+            "normalize_embeddings": self.config.normalize_embeddings,
+            "metadata": metadata,
+            "pages": [
+                {"hash": h, "references": [self.hashes[j] for j in references[i]] if references else []}
+                for i, h in enumerate(self.hashes)
+            ],
+        }
+        with open(self._path("manifest.json"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
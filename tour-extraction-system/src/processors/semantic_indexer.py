@@ -3,6 +3,7 @@ Cria índice FAISS dos chunks para busca semântica.
 """
 import os
 import json
+from typing import Dict, Optional
 import numpy as np
 from sentence_transformers import SentenceTransformer
 import faiss
@@ -11,6 +12,10 @@ from ..core.config import SystemConfig
 from ..core.logger import Logger
 
 
+# Chunks similares buscados como referência de cada chunk na extração
+REFERENCE_TOP_K = 3
+
+
 class SemanticIndexer:
     """Indexador semântico usando FAISS"""
     
@@ -20,13 +25,20 @@ class SemanticIndexer:
         self.model = None
         self.md_files = []
         self.texts = []
+        self.embeddings = None
     
     def setup(self):
-        """Inicializa modelo de embeddings"""
+        """Inicializa modelo de embeddings (uma vez)"""
         os.makedirs(self.config.index_dir, exist_ok=True)
+        if self.model is not None:
+            return
         self.model = SentenceTransformer(self.config.embedding_model)
         self.logger.info(f"Modelo carregado: {self.config.embedding_model}")
     
+    def share(self, other: "SemanticIndexer"):
+        """Usa o modelo de embeddings já carregado por outro indexador (modo multi-PDF)"""
+        self.model = other.model
+    
     def load_chunks(self):
         """Carrega chunks markdown"""
         self.md_files = sorted([
@@ -45,15 +57,38 @@ class SemanticIndexer:
         
         self.logger.info(f"Carregados {len(self.texts)} chunks")
     
-    def create_index(self):
-        """Cria índice FAISS"""
-        self.logger.info("Gerando embeddings...")
+    def create_index(self, reuse: Optional[Dict[int, np.ndarray]] = None):
+        """
+        Cria índice FAISS.
+        
+        Args:
+            reuse: Embeddings já calculados de chunks inalterados (índice ->
+                vetor); só os demais chunks são codificados
+        """
+        reuse = reuse or {}
+        pending = [i for i in range(len(self.texts)) if i not in reuse]
+        if reuse:
+            self.logger.info(f"Gerando embeddings de {len(pending)} de {len(self.texts)} chunks...")
+        else:
+            self.logger.info("Gerando embeddings...")
+        
+        embeddings = None
+        if pending:
+            embeddings = self.model.encode(
+                [self.texts[i] for i in pending],
+                convert_to_numpy=True,
+                normalize_embeddings=self.config.normalize_embeddings
+            )
+        if reuse:
+            encoded = embeddings
+            dim = self.model.get_sentence_embedding_dimension()
+            embeddings = np.empty((len(self.texts), dim), dtype=np.float32)
+            for idx, vector in reuse.items():
+                embeddings[idx] = vector
+            if pending:
+                embeddings[pending] = encoded
         
-        embeddings = self.model.encode(
-            self.texts,
-            convert_to_numpy=True,
-            normalize_embeddings=self.config.normalize_embeddings
-        )
+        self.embeddings = embeddings
         
         # Cria índice FAISS (cosine similarity via inner product)
         dim = embeddings.shape[1]
@@ -69,7 +104,7 @@ class SemanticIndexer:
         
         self.logger.info(f"Índice criado: {len(self.md_files)} chunks indexados")
 
-    def search_similar_chunks(self, text, top_k=3):
+    def search_similar_chunks(self, text, top_k=REFERENCE_TOP_K):
         """
         Retorna os índices dos top_k chunks semanticamente mais similares ao texto fornecido.
         """
@@ -97,4 +132,4 @@ class SemanticIndexer:
                     "text": self.texts[idx],
                     "file": md_files[idx]
                 })
-        return similar_chunks
\ No newline at end of file
+        return similar_chunks
\ No newline at end of file
@@ -0,0 +1,460 @@
+"""
+Interpretador determinístico de tabelas de preço (fast path sem LLM).
+"""
+import re
+from collections import Counter
+from typing import Dict, Any, List, Optional, Tuple
+
+from pydantic import ValidationError
+
+from ..core.config import SystemConfig
+from ..core.logger import Logger
+from ..core.schemas import Tour
+from .page_triage import TOUR_FIELD_PATTERNS
+from .tour_merger import normalize_text
+
+
+# Cabeçalhos de colunas
+PAX_HEADER = re.compile(r"^pax\s*(\d+)|^(\d+)\s*pax$", re.IGNORECASE)
+VEHICLE_CAPACITY_HEADER = re.compile(
+    r"^(?P<vehicle>[^\d|]*?)\s*(?P<capacity>\d+\s*(?:-|a|to|à)\s*\d+|\d+)\s*pax$",
+    re.IGNORECASE
+)
+PRICE_COLUMN = re.compile(r"\b(?:pre[cç]o|price|prix|precio|valor|tarifa|rate)\b", re.IGNORECASE)
+CAPACITY_COLUMN = re.compile(r"\b(?:capacidade|capacidad|capacity|capacit[ée]|pax|passageiros|pasajeros)\b", re.IGNORECASE)
+VEHICLE_COLUMN = re.compile(r"\b(?:ve[ií]culo|vehicle|v[ée]hicule|carro|car|van)\b", re.IGNORECASE)
+DURATION_COLUMN = re.compile(r"\b(?:dura[cç][aã]o|duraci[oó]n|duration|dur[ée]e)\b", re.IGNORECASE)
+TIME_COLUMN = re.compile(r"\b(?:hora|hor[aá]rio|horario|agendar|schedule|time|heure|departure|sa[ií]da)\b", re.IGNORECASE)
+
+# Valores
+PRICE_VALUE = re.compile(
+    r"^(?P<pre>[$€£]|US\$|R\$|USD|EUR|GBP|BRL|COP)?\s*(?P<num>\d{1,3}(?:[.\s]\d{3})*(?:,\d{1,2})?|\d+(?:[.,]\d{1,2})?)\s*(?P<post>€|USD|EUR|GBP|BRL|COP)?$",
+    re.IGNORECASE
+)
+EMPTY_VALUE = re.compile(r"^(?:n/?a|-|—|–|)$", re.IGNORECASE)
+DURATION_VALUE = re.compile(
+    r"(\d+(?:[.,]\d+)?)\s*(h|hrs?|hours?|horas?|heures?|min|minutes?|minutos?|days?|dias?|d[ií]as?|jours?)\b",
+    re.IGNORECASE
+)
+TIME_VALUE = re.compile(r"\b(\d{1,2})\s?[:h]\s?(\d{2})\b")
+ZONE_VALUE = re.compile(r"\b(?:zona|zone)\s+(?:\d+|[A-Z])\b", re.IGNORECASE)
+
+CURRENCY_SYMBOLS = {"$": "USD", "US$": "USD", "€": "EUR", "£": "GBP", "R$": "BRL"}
+PAGE_CURRENCY_PATTERNS = [
+    ("USD", re.compile(r"\b(?:USD|US\$|d[oó]lares|dollars?)\b", re.IGNORECASE)),
+    ("EUR", re.compile(r"€|\b(?:EUR|euros?)\b", re.IGNORECASE)),
+    ("GBP", re.compile(r"£|\bGBP\b", re.IGNORECASE)),
+    ("BRL", re.compile(r"R\$|\b(?:BRL|reais)\b", re.IGNORECASE)),
+    ("COP", re.compile(r"\b(?:COP|pesos colombianos)\b", re.IGNORECASE)),
+]
+
+LANGUAGES = [
+    ("espanhol", re.compile(r"\b(?:espanhol|español|espanol|spanish|espagnol)\b", re.IGNORECASE)),
+    ("inglês", re.compile(r"\b(?:ingl[eê]s|ingl[ée]s|english|anglais)\b", re.IGNORECASE)),
+    ("português", re.compile(r"\b(?:portugu[eê]s|portugu[ée]s|portuguese|portugais)\b", re.IGNORECASE)),
+    ("francês", re.compile(r"\b(?:franc[eê]s|franc[ée]s|french|fran[cç]ais)\b", re.IGNORECASE)),
+    ("italiano", re.compile(r"\b(?:italiano|italian|italien)\b", re.IGNORECASE)),
+]
+
+
+class PricingTableParser:
+    """
+    Converte tabelas markdown regulares (Docling) em tours sem chamar o LLM.
+
+    Layouts reconhecidos:
+        - Serviço × colunas "Pax N" (pricing_matrix por pessoa)
+        - Serviço × coluna única de preço por pessoa
+        - Opção × colunas "Veículo NN-NN pax" (options por veículo)
+        - Linhas capacidade × veículo × preço (options por veículo)
+
+    Uma página só é considerada resolvida quando todas as suas tabelas são
+    reconhecidas, todos os tours validam contra o schema e o texto restante
+    não descreve outros tours.
+    """
+
+    def __init__(self, config: SystemConfig, logger: Logger):
+        self.config = config
+        self.logger = logger
+        self.boilerplate = set()
+        self.stats = Counter()
+
+    def set_boilerplate(self, texts: List[str]):
+        """Marca linhas repetidas em metade ou mais das páginas (cabeçalhos/rodapés)"""
+        counts = Counter()
+        for text in texts:
+            counts.update({line.strip() for line in text.splitlines() if line.strip()})
+        min_pages = max(2, len(texts) // 2)
+        self.boilerplate = {line for line, n in counts.items() if n >= min_pages}
+
+    def parse_page(self, text: str, chunk_filename: str) -> Optional[Dict[str, Any]]:
+        """
+        Tenta extrair os tours da página apenas com regras.
+
+        Args:
+            text: Texto markdown da página
+            chunk_filename: Nome do chunk (para source_chunks)
+
+        Returns:
+            Resultado no mesmo formato do extrator LLM, ou None se a página
+            não puder ser interpretada com confiança
+        """
+        self.stats["pages_attempted"] += 1
+        blocks, residual = self._split_blocks(text)
+        if not blocks:
+            self.stats["no_tables"] += 1
+            return None
+
+        # Texto fora das tabelas descrevendo tours exige o LLM
+        residual_text = "\n".join(residual).strip()
+        field_hits = sum(1 for p in TOUR_FIELD_PATTERNS if p.search(residual_text))
+        if field_hits >= 2 or len(residual_text) > self.config.table_parser_max_residual_chars:
+            self.stats["prose_content"] += 1
+            return None
+
+        page_currency = self._page_currency(text)
+        tours = []
+        for context, header, rows in blocks:
+            parsed = self._parse_table(context, header, rows, page_currency)
+            if parsed is None:
+                self.stats["unrecognized_table"] += 1
+                return None
+            tours.extend(parsed)
+
+        if not tours:
+            self.stats["unrecognized_table"] += 1
+            return None
+
+        observations = " ".join(residual_text.split()) or None
+        for tour in tours:
+            tour["observations"] = observations
+            tour["source_chunks"] = [chunk_filename]
+            try:
+                Tour(**tour)
+            except ValidationError:
+                self.stats["invalid_schema"] += 1
+                return None
+
+        self.stats["pages_parsed"] += 1
+        self.stats["tours"] += len(tours)
+        return {"agency": None, "product": None, "tours": tours}
+
+    # ------------------------------------------------------------------
+    # Estrutura da página
+    # ------------------------------------------------------------------
+
+    def _split_blocks(self, text: str) -> Tuple[List[Tuple[str, List[str], List[List[str]]]], List[str]]:
+        """Separa tabelas (com o título/contexto anterior) do texto restante"""
+        blocks, residual = [], []
+        table, context = [], []
+
+        def flush():
+            if table:
+                blocks.append((" ".join(context), table[0], table[1:]))
+                context.clear()
+            table.clear()
+
+        for raw in text.splitlines():
+            line = raw.strip()
+            if line.startswith("|") and line.endswith("|"):
+                if not re.fullmatch(r"\|[\s:|-]+\|", line):
+                    table.append([c.strip() for c in line.strip("|").split("|")])
+                continue
+
+            flush()
+            if not line or line in self.boilerplate or line.startswith("<!--"):
+                continue
+            if line.startswith("#"):
+                # Títulos antes de uma tabela servem de contexto para ela
+                context.append(line.lstrip("#").strip())
+            else:
+                if context:
+                    residual.extend(context)
+                    context.clear()
+                residual.append(line)
+        flush()
+        residual.extend(context)
+        return blocks, residual
+
+    def _parse_table(self, context: str, header: List[str], rows: List[List[str]],
+                     page_currency: Optional[str]) -> Optional[List[Dict[str, Any]]]:
+        """Aplica o primeiro layout que reconhecer a tabela"""
+        if not rows or any(len(r) != len(header) for r in rows):
+            return None
+
+        for layout in (self._parse_pax_matrix, self._parse_vehicle_columns,
+                       self._parse_capacity_rows, self._parse_single_price):
+            tours = layout(context, header, rows, page_currency)
+            if tours is not None:
+                return tours
+        return None
+
+    # ------------------------------------------------------------------
+    # Layouts
+    # ------------------------------------------------------------------
+
+    def _parse_pax_matrix(self, context, header, rows, page_currency):
+        """Serviço × Pax 1, Pax 2, ... -> pricing_matrix por pessoa"""
+        pax_cols = {}
+        for i, h in enumerate(header):
+            m = PAX_HEADER.match(h)
+            if m:
+                pax_cols[i] = int(m.group(1) or m.group(2))
+        if len(pax_cols) < 2:
+            return None
+
+        service_col = self._service_column(header, rows, exclude=set(pax_cols))
+        if service_col is None:
+            return None
+
+        tours = []
+        for row in rows:
+            matrix = []
+            for col, pax in pax_cols.items():
+                price = self._parse_price(row[col], page_currency)
+                if price is False:
+                    return None
+                if price is not None:
+                    matrix.append({"pax_count": pax, "price": price[0], "currency": price[1]})
+            if not matrix or not row[service_col]:
+                return None
+            tour = self._base_tour(row[service_col], context, header, row)
+            tour["pricing_type"] = "per_person"
+            tour["pricing_matrix"] = matrix
+            tours.append(tour)
+        return tours
+
+    def _parse_single_price(self, context, header, rows, page_currency):
+        """Serviço × (duração, hora) × preço por pessoa"""
+        price_cols = [i for i, h in enumerate(header) if PRICE_COLUMN.search(h)]
+        if len(price_cols) != 1:
+            return None
+        price_col = price_cols[0]
+
+        service_col = self._service_column(header, rows, exclude={price_col})
+        if service_col is None:
+            return None
+
+        tours = []
+        for row in rows:
+            price = self._parse_price(row[price_col], page_currency)
+            if not price or not row[service_col]:
+                return None
+            tour = self._base_tour(row[service_col], context, header, row)
+            tour["pricing_type"] = "per_person"
+            tour["pricing_matrix"] = [{"pax_count": None, "price": price[0], "currency": price[1]}]
+            tours.append(tour)
+        return tours
+
+    def _parse_vehicle_columns(self, context, header, rows, page_currency):
+        """Opção × "Car 01-03 pax", "Van 04-06 pax" -> um tour com options por veículo"""
+        vehicle_cols = {}
+        for i, h in enumerate(header):
+            m = VEHICLE_CAPACITY_HEADER.match(h)
+            if m and not PAX_HEADER.match(h):
+                vehicle_cols[i] = (m.group("capacity").replace(" ", "") + " pax",
+                                   m.group("vehicle").strip().lower() or None)
+        if not vehicle_cols or not context:
+            return None
+
+        option_col = self._service_column(header, rows, exclude=set(vehicle_cols), allow_empty_header=True)
+        if option_col is None:
+            return None
+
+        options = []
+        for row in rows:
+            details = []
+            for col, (capacity, vehicle) in vehicle_cols.items():
+                price = self._parse_price(row[col], page_currency)
+                if price is False:
+                    return None
+                if price is not None:
+                    details.append({
+                        "capacity": capacity,
+                        "vehicle_options": vehicle,
+                        "price": {"quantity": price[0], "currency": price[1]}
+                    })
+            if not details or not row[option_col]:
+                return None
+            options.append({"name_option": row[option_col], "details": details})
+
+        tour = self._base_tour(context, "", header, None)
+        tour["pricing_type"] = "per_vehicle"
+        tour["options"] = options
+        return [tour]
+
+    def _parse_capacity_rows(self, context, header, rows, page_currency):
+        """Linhas capacidade × veículo × preço -> um tour com uma option"""
+        capacity_cols = [i for i, h in enumerate(header) if CAPACITY_COLUMN.search(h) and not PAX_HEADER.match(h)]
+        vehicle_cols = [i for i, h in enumerate(header) if VEHICLE_COLUMN.search(h)]
+        price_cols = [i for i, h in enumerate(header) if PRICE_COLUMN.search(h)]
+        if len(capacity_cols) != 1 or len(price_cols) != 1 or not context:
+            return None
+        vehicle_col = vehicle_cols[0] if vehicle_cols else None
+
+        details = []
+        for row in rows:
+            price = self._parse_price(row[price_cols[0]], page_currency)
+            if not price or not row[capacity_cols[0]]:
+                return None
+            details.append({
+                "capacity": row[capacity_cols[0]],
+                "vehicle_options": row[vehicle_col] if vehicle_col is not None else None,
+                "price": {"quantity": price[0], "currency": price[1]}
+            })
+
+        tour = self._base_tour(context, "", header, None)
+        tour["pricing_type"] = "per_vehicle"
+        tour["options"] = [{"name_option": header[price_cols[0]], "details": details}]
+        return [tour]
+
+    # ------------------------------------------------------------------
+    # Auxiliares
+    # ------------------------------------------------------------------
+
+    def _base_tour(self, title: str, context: str, header: List[str], row: Optional[List[str]]) -> Dict[str, Any]:
+        """Monta o tour com os campos comuns ao formato do extrator"""
+        duration = {"quantity": None, "unit": None}
+        departure_time = None
+        if row is not None:
+            for i, h in enumerate(header):
+                if DURATION_COLUMN.search(h):
+                    duration = self._parse_duration(row[i])
+                elif TIME_COLUMN.search(h):
+                    m = TIME_VALUE.search(row[i])
+                    departure_time = f"{int(m.group(1)):02d}:{m.group(2)}" if m else None
+        else:
+            duration = self._parse_duration(title)
+
+        languages = [name for name, pattern in LANGUAGES if pattern.search(f"{title} {context}")]
+        zone = ZONE_VALUE.search(title) or ZONE_VALUE.search(context)
+        return {
+            "id": None,
+            "city": None,  # preenchida por locate, com as cidades do catálogo
+            "title": title.strip(),
+            "location": {"main": None, "region": None, "zone": zone.group(0) if zone else None},
+            "duration": duration,
+            "description": None,
+            "pricing_type": None,
+            "options": None,
+            "pricing_matrix": None,
+            "schedule": {"departure_time": departure_time, "return_time": None, "frequency": None},
+            "meeting_point": None,
+            "includes": [],
+            "excludes": [],
+            "language_options": languages,
+            "operation": {"non_operating_periods": []},
+            "min_adults": None,
+            "max_adults": None,
+            "max_childrens": None,
+            "min_booking": None,
+        }
+
+    @staticmethod
+    def catalog_cities(tours: List[Dict[str, Any]], product: Any) -> List[str]:
+        """
+        Cidades do catálogo, da mais frequente para a menos frequente, a partir
+        dos tours extraídos pelo LLM; sem eles, o destino do produto quando único.
+        """
+        counts = Counter(t["city"].strip() for t in tours
+                         if isinstance(t, dict) and isinstance(t.get("city"), str) and t["city"].strip())
+        if counts:
+            return [city for city, _ in counts.most_common()]
+        destination = product.get("destination") if isinstance(product, dict) else None
+        if isinstance(destination, str):
+            destination = [destination]
+        if isinstance(destination, list) and len(destination) == 1 and isinstance(destination[0], str):
+            return [destination[0]]
+        return []
+
+    @staticmethod
+    def locate(tours: List[Dict[str, Any]], text: str, cities: List[str]):
+        """
+        Preenche cidade e local dos tours de uma página resolvida pelo parser:
+        a cidade do catálogo citada no título do tour ou em um título da
+        página; senão a cidade mais frequente do catálogo.
+        """
+        if not cities:
+            return
+        names = [(city, f" {normalize_text(city)} ") for city in cities if normalize_text(city)]
+        headings = [f" {normalize_text(line.lstrip('#'))} " for line in text.splitlines()
+                    if line.lstrip().startswith("#")]
+
+        def mentioned(texts: List[str]) -> Optional[str]:
+            for city, name in names:
+                if any(name in t for t in texts):
+                    return city
+            return None
+
+        page_city = mentioned(headings) or cities[0]
+        for tour in tours:
+            city = mentioned([f" {normalize_text(tour.get('title'))} "]) or page_city
+            tour["city"] = city
+            location = tour.get("location")
+            if isinstance(location, dict) and not location.get("main"):
+                location["main"] = city
+
+    @staticmethod
+    def _service_column(header, rows, exclude, allow_empty_header=False) -> Optional[int]:
+        """Primeira coluna textual (nome do serviço/opção)"""
+        for i, h in enumerate(header):
+            if i in exclude or (not h and not allow_empty_header):
+                continue
+            if DURATION_COLUMN.search(h) or TIME_COLUMN.search(h):
+                continue
+            values = [r[i] for r in rows]
+            if sum(1 for v in values if re.search(r"[A-Za-zÀ-ú]{3,}", v)) == len(values):
+                return i
+        return None
+
+    @staticmethod
+    def _parse_price(cell: str, page_currency: Optional[str]):
+        """
+        Converte célula em (valor, moeda).
+
+        Returns:
+            None para célula vazia/N/A, False para célula não interpretável
+        """
+        cell = cell.strip()
+        if EMPTY_VALUE.match(cell):
+            return None
+        m = PRICE_VALUE.match(cell)
+        if not m:
+            return False
+
+        symbol = (m.group("pre") or m.group("post") or "").upper()
+        currency = CURRENCY_SYMBOLS.get(symbol, symbol) or page_currency
+        if not currency:
+            return False
+
+        num = m.group("num").replace(" ", "")
+        if "," in num:
+            num = num.replace(".", "").replace(",", ".")
+        elif re.fullmatch(r"\d{1,3}(?:\.\d{3})+", num):
+            num = num.replace(".", "")
+        value = float(num)
+        return (int(value) if value.is_integer() else value), currency
+
+    @staticmethod
+    def _parse_duration(text: str) -> Dict[str, Any]:
+        """Converte '2.5 horas', '4h30min', '1 day' em {quantity, unit}"""
+        m = re.search(r"(\d+)\s*h\s*(\d{2})\s*(?:min)?", text, re.IGNORECASE)
+        if m:
+            return {"quantity": round(int(m.group(1)) + int(m.group(2)) / 60, 2), "unit": "hours"}
+        m = DURATION_VALUE.search(text)
+        if not m:
+            return {"quantity": None, "unit": None}
+        quantity = float(m.group(1).replace(",", "."))
+        unit = m.group(2).lower()
+        if unit.startswith("min"):
+            unit = "minutes"
+        elif unit[0] in "dj":
+            unit = "days"
+        else:
+            unit = "hours"
+        return {"quantity": int(quantity) if quantity.is_integer() else quantity, "unit": unit}
+
+    @staticmethod
+    def _page_currency(text: str) -> Optional[str]:
+        """Moeda única mencionada na página (None se ausente ou ambígua)"""
+        found = [code for code, pattern in PAGE_CURRENCY_PATTERNS if pattern.search(text)]
+        return found[0] if len(found) == 1 else None
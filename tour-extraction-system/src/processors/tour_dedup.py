@@ -0,0 +1,155 @@
+"""
+Deduplicação difusa de tours com blocagem (cidade, tokens do título e faixa de preço).
+"""
+import math
+import time
+from difflib import SequenceMatcher
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from .tour_merger import normalize_text, title_key
+
+
+BLOCK_TOKENS = 2
+
+
+class FuzzyDeduplicator:
+    """
+    Marca tours quase duplicados ("Eiffel Tower tour" x "Tour Eiffel Tower")
+    sem comparar todos os pares.
+
+    Cada tour mantido entra em blocos (cidade, token do título) subdivididos
+    por faixa de preço logarítmica, usando os BLOCK_TOKENS tokens mais raros
+    do título na cidade (um erro de digitação em um deles não impede o
+    encontro pelo outro); tokens frequentes demais (ex: "tour") não formam
+    bloco. Um tour novo só é comparado com os tours mantidos que
+    compartilham algum bloco e faixa de preço vizinha, por similaridade de
+    sequência dos títulos normalizados (tokens ordenados); números no título
+    ("Dia 1" x "Dia 2") e preços fora da tolerância nunca são considerados
+    duplicatas.
+    """
+
+    def __init__(self, config, logger):
+        self.config = config
+        self.logger = logger
+        self.stats: Dict[str, Any] = {}
+
+    def duplicates(self, titles: Sequence[Any], cities: Sequence[Any],
+                   prices: Optional[Sequence[Any]] = None) -> np.ndarray:
+        """
+        Args:
+            titles: Título de cada tour
+            cities: Cidade (ou local principal) de cada tour
+            prices: Preço de referência de cada tour (None/NaN quando ausente)
+
+        Returns:
+            Máscara booleana: True para tours equivalentes a um tour anterior
+        """
+        start = time.perf_counter()
+        threshold = self.config.dedup_title_threshold
+        tolerance = self.config.dedup_price_tolerance
+        n = len(titles)
+        prices = [None] * n if prices is None else list(prices)
+
+        keys = [title_key(title, city) for title, city in zip(titles, cities)]
+        city_keys = [normalize_text(city) for city in cities]
+        price_values = [self._price(p) for p in prices]
+        buckets = [self._bucket(p, tolerance) for p in price_values]
+
+        # Frequência de cada token por cidade: tokens comuns não formam bloco
+        frequency: Dict[tuple, int] = {}
+        for city, key in zip(city_keys, keys):
+            for token in set(key.split()):
+                frequency[(city, token)] = frequency.get((city, token), 0) + 1
+        max_block = self.config.dedup_max_block_size
+
+        # (cidade, token) -> faixa de preço -> posições dos tours mantidos
+        blocks: Dict[tuple, Dict[Optional[int], List[int]]] = {}
+        duplicated = np.zeros(n, dtype=bool)
+        matcher = SequenceMatcher(None, autojunk=False)
+        comparisons = 0
+        for i in range(n):
+            key = keys[i]
+            if not key:
+                continue
+            tokens = set(key.split())
+            rarest = sorted((frequency[(city_keys[i], t)], t) for t in tokens)[:BLOCK_TOKENS]
+            block_tokens = [t for count, t in rarest if count <= max_block] or [key]
+            numbers = {t for t in tokens if t.isdigit()}
+            bucket = buckets[i]
+
+            seen = set()
+            for token in block_tokens:
+                by_bucket = blocks.get((city_keys[i], token))
+                if not by_bucket:
+                    continue
+                if not seen:
+                    # O título do tour novo fica fixo: o SequenceMatcher indexa seq2 uma vez só
+                    matcher.set_seq2(key)
+                # Sem preço: compara com todas as faixas; com preço: faixas vizinhas e tours sem preço
+                if bucket is None:
+                    candidates = [j for positions in by_bucket.values() for j in positions]
+                else:
+                    candidates = [j for b in (bucket - 1, bucket, bucket + 1, None) for j in by_bucket.get(b, ())]
+                for j in candidates:
+                    if j in seen:
+                        continue
+                    seen.add(j)
+                    comparisons += 1
+                    if self._similar(matcher, keys[j], numbers, threshold) and \
+                            self._same_price(price_values[i], price_values[j], tolerance):
+                        duplicated[i] = True
+                        break
+                if duplicated[i]:
+                    break
+
+            if not duplicated[i]:
+                for token in block_tokens:
+                    blocks.setdefault((city_keys[i], token), {}).setdefault(bucket, []).append(i)
+
+        self.stats = {
+            "tours": n,
+            "duplicates": int(duplicated.sum()),
+            "blocks": len(blocks),
+            "comparisons": comparisons,
+            "all_pairs": n * (n - 1) // 2,
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        self.logger.info(
+            f"Deduplicação difusa: {self.stats['duplicates']} quase duplicatas em {n} tours "
+            f"({comparisons} comparações em {len(blocks)} blocos, {self.stats['seconds']:.2f}s)"
+        )
+        return duplicated
+
+    @staticmethod
+    def _price(value: Any) -> Optional[float]:
+        try:
+            value = float(value)
+        except (TypeError, ValueError):
+            return None
+        return value if value > 0 and not math.isnan(value) else None
+
+    @staticmethod
+    def _bucket(price: Optional[float], tolerance: float) -> Optional[int]:
+        """Faixa logarítmica de largura (1 + tolerância)"""
+        if price is None:
+            return None
+        return int(math.floor(math.log(price) / math.log1p(max(tolerance, 1e-6))))
+
+    @staticmethod
+    def _same_price(a: Optional[float], b: Optional[float], tolerance: float) -> bool:
+        if a is None or b is None:
+            return True
+        return abs(a - b) <= tolerance * max(a, b)
+
+    @staticmethod
+    def _similar(matcher: SequenceMatcher, other: str, numbers: set, threshold: float) -> bool:
+        """Título em matcher.b (com os números em numbers) x outro título normalizado"""
+        if other == matcher.b:
+            return True
+        if numbers != {t for t in other.split() if t.isdigit()}:
+            return False
+        matcher.set_seq1(other)
+        return (matcher.real_quick_ratio() >= threshold and matcher.quick_ratio() >= threshold
+                and matcher.ratio() >= threshold)
@@ -3,14 +3,62 @@ Extrai tours usando CrewAI em paralelo com controle de rate limit.
 """
 import os
 import json
+import time
+import http.client
+import threading
 import concurrent.futures
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional
 
 from crewai import Agent, Task, Crew, LLM
+from openai import APIError
+from pydantic import ValidationError
 
 from ..core.config import SystemConfig
 from ..core.logger import Logger
-from ..utils.rate_limiter import RateLimiter
+from ..core.schemas import Tour
+from ..core.prompts import (
+    CHUNK_EXPECTED_OUTPUT,
+    METADATA_EXPECTED_OUTPUT,
+    build_chunk_prompt,
+    build_continuation_prompt,
+    build_legacy_prompt,
+    build_metadata_prompt,
+    build_metadata_system_prompt,
+    build_packed_prompt,
+    build_system_prompt,
+    expand_keys,
+)
+from ..utils.endpoint_pool import EndpointPool
+from ..utils.batch_client import BatchClient
+from ..utils.json_stream import TourStreamParser, recover_json
+from ..utils.stream_client import StreamError, stream_chat_completion
+from ..utils.telemetry import RunTelemetry, format_cost
+from .page_triage import PageTriage, PAGE_METADATA, PAGE_TOURS
+from .table_parser import PricingTableParser
+from .request_packer import RequestPacker, estimate_tokens
+from .tour_merger import TourMerger, title_key
+from .model_router import ModelRouter
+from .local_llm import LocalLLM
+from .semantic_indexer import REFERENCE_TOP_K
+
+if TYPE_CHECKING:
+    from .revision_tracker import PageReuse
+
+
+# Falhas do endpoint (rede, HTTP, rate limit; exceções do litellm herdam de openai.APIError): contam
+# para o circuit breaker e levam a requisição a outro endpoint. Erros ao interpretar a resposta não.
+ENDPOINT_ERRORS = (OSError, http.client.HTTPException, StreamError, APIError)
+
+
+def openai_api_model(model: str) -> Optional[str]:
+    """
+    Nome do modelo na API compatível com OpenAI usada pelo streaming, ou None
+    se o modelo (string do litellm) é de outro provedor ("anthropic/...",
+    "ollama/..."): esses seguem pelo CrewAI, sem streaming.
+    """
+    if model.startswith("openai/"):
+        return model.split("/", 1)[1]
+    return None if "/" in model else model
 
 
 class TourExtractor:
@@ -20,43 +68,254 @@ class TourExtractor:
         self.config = config
         self.logger = logger
         self.agent = None
+        self.metadata_agent = None
         self.md_files = []
         self.texts = []
-        self.ratelimiter = RateLimiter(config.rate_limit)
+        self.pool = None
+        # False quando o pool é de outro extrator (modo multi-PDF): estatísticas ficam com o dono
+        self.owns_pool = True
         self.indexer = indexer     # Novo: injete o indexador para Expand Recall
+        self.triage = PageTriage(config, logger, indexer=indexer)
+        self.table_parser = PricingTableParser(config, logger)
+        self.packer = RequestPacker(config, logger)
+        self.merger = TourMerger(logger)
+        self.router = ModelRouter(config, logger)
+        self.tier_agents = []
+        self.metadata_agents = {}
+        self.local_llm = LocalLLM(config, logger) if config.extraction_backend == "local" else None
+        self.system_prompts = {}
+        self.page_labels = []
+        # Resposta consolidada de cada página extraída e metadados do catálogo (última execução)
+        self.page_results: Dict[int, Dict[str, Any]] = {}
+        self.catalog_metadata: Dict[str, Any] = {}
+        self.usage = {}
+        self.usage_lock = threading.Lock()
+        # Callback opcional chamado com cada tour assim que chega (streaming); prévia, antes da consolidação
+        self.on_tour: Optional[Callable[[Dict[str, Any]], None]] = None
+        self.stream_stats = {}
+        self.started_at = 0.0
+        self.recovery_stats = {}
+        self.telemetry = RunTelemetry()
     
     def setup(self):
-        """Inicializa agente CrewAI"""
-        # Valida API key
-        if not os.environ.get("OPENAI_API_KEY", "").strip():
-            raise ValueError("OPENAI_API_KEY não configurada no arquivo .env")
-        
-        # Carrega chunks
+        """Carrega os chunks indexados e inicializa os agentes CrewAI (uma vez)"""
+        self.load_chunks()
+        if self.pool is None:
+            self.setup_agents()
+    
+    def load_chunks(self):
+        """Carrega os chunks do índice (files.json)"""
         with open(os.path.join(self.config.index_dir, "files.json"), "r") as f:
             self.md_files = json.load(f)
         
+        self.texts = []
         for path in self.md_files:
             try:
                 with open(path, "r", encoding="utf-8") as f:
                     self.texts.append(f.read().strip())
             except Exception:
                 self.texts.append("")
+    
+    def setup_agents(self):
+        """Inicializa o pool de endpoints e os agentes CrewAI (ou o modelo local)"""
+        # Pool de endpoints; a chave é dispensável quando todas as camadas usam um endpoint próprio (ex: servidor local)
+        self.pool = EndpointPool.from_config(
+            self.config, self.logger,
+            allow_missing_key=self.local_llm is not None or all(tier["base_url"] for tier in self.router.tiers)
+        )
+        if self.config.streaming_enabled and self.local_llm is None:
+            for tier in self.router.tiers:
+                if openai_api_model(tier["model"]) is None:
+                    self.logger.warning(f"Streaming requer API compatível com OpenAI: camada {tier['name']} "
+                                        f"({tier['model']}) segue sem streaming")
+        
+        backstory = "Especialista em extrair dados precisos de catálogos turísticos europeus, latino-americanos e globais"
         
-        # Cria agente
-        llm = LLM(model=self.config.llm_model, temperature=self.config.temperature)
+        # Prefixo de sistema fixo (regras + schema) reaproveitado pelo cache de prompt do provedor
+        chunk_backstory = backstory
+        if self.config.prompt_style != "legacy":
+            chunk_backstory = backstory + "\n\n" + build_system_prompt(self.config.prompt_compact_keys)
         
-        self.agent = Agent(
-            role="Extrator Universal Multi-Idioma de Tours",
-            goal="Extrair informações completas de tours/tarifários em qualquer idioma e formato",
-            backstory="Especialista em extrair dados precisos de catálogos turísticos europeus, latino-americanos e globais",
-            llm=llm,
-            verbose=False
+        # Metadados: regras + schema de agência/produto (chaves compactas nas mesmas condições dos chunks)
+        compact = self.config.prompt_compact_keys and self.config.prompt_style != "legacy"
+        metadata_backstory = backstory + "\n\n" + build_metadata_system_prompt(compact)
+        
+        self.system_prompts = {"chunk": chunk_backstory, "metadata": metadata_backstory}
+        if self.local_llm is not None:
+            # Extração totalmente local: sem agentes CrewAI
+            self.local_llm.setup()
+            self.tier_agents = [{e.name: None for e in self.pool.endpoints}]
+            self.metadata_agents = {e.name: None for e in self.pool.endpoints}
+            if self.config.triage_enabled:
+                self.triage.setup()
+            return
+        
+        # Um agente por camada de modelo (a primeira é a mais barata) e por endpoint do pool
+        self.tier_agents = [
+            {
+                endpoint.name: Agent(
+                    role="Extrator Universal Multi-Idioma de Tours",
+                    goal="Extrair informações completas de tours/tarifários em qualquer idioma e formato",
+                    backstory=chunk_backstory,
+                    llm=self._build_llm(tier, endpoint),
+                    verbose=False
+                )
+                for endpoint in self.pool.endpoints
+            }
+            for tier in self.router.tiers
+        ]
+        self.metadata_agents = {
+            endpoint.name: Agent(
+                role="Extrator de Metadados de Catálogos Turísticos",
+                goal="Identificar agência, tipo de produto, condições gerais, ano e destinos do catálogo",
+                backstory=metadata_backstory,
+                llm=agent.llm,
+                verbose=False
+            )
+            for endpoint, agent in zip(self.pool.endpoints, self.tier_agents[0].values())
+        }
+        first = self.pool.endpoints[0].name
+        self.agent = self.tier_agents[0][first]
+        self.metadata_agent = self.metadata_agents[first]
+        
+        models = " -> ".join(
+            tier["model"] + (f" @ {tier['base_url']}" if tier["base_url"] else "") for tier in self.router.tiers
         )
+        endpoints = ", ".join(e.name for e in self.pool.endpoints)
+        self.logger.info(f"Agente configurado (modelos: {models}; endpoints: {endpoints})")
         
-        self.logger.info(f"Agente configurado (modelo: {self.config.llm_model})")
+        # Triagem de páginas
+        if self.config.triage_enabled:
+            self.triage.setup()
+    
+    def share(self, other: "TourExtractor"):
+        """
+        Usa o pool de endpoints (rate limit RPM/TPM), os agentes e o modelo
+        local já configurados por outro extrator (modo multi-PDF).
+        """
+        self.pool = other.pool
+        self.owns_pool = False
+        self.tier_agents = other.tier_agents
+        self.metadata_agents = other.metadata_agents
+        self.agent = other.agent
+        self.metadata_agent = other.metadata_agent
+        self.system_prompts = other.system_prompts
+        self.local_llm = other.local_llm
+        self.triage.prototype_embeddings = other.triage.prototype_embeddings
     
-    def process_chunk(self, idx: int) -> Dict[str, Any]:
-        self.ratelimiter.wait()
+    def _build_llm(self, tier: Dict[str, Any], endpoint) -> LLM:
+        """LLM da camada no endpoint (chave/base URL) do pool"""
+        base_url = endpoint.base_url or tier["base_url"]
+        if not base_url:
+            return LLM(model=tier["model"], temperature=self.config.temperature, api_key=endpoint.api_key)
+        return LLM(
+            model=tier["model"],
+            temperature=self.config.temperature,
+            base_url=base_url,
+            api_key=endpoint.api_key
+        )
+    
+    def _call(self, prompt: str, expected_output: str, tier_idx: int = 0, kind: str = "chunk",
+              source: Optional[str] = None, label: Optional[str] = None):
+        """
+        Executa a requisição no endpoint com mais folga; se o endpoint falhar
+        (ENDPOINT_ERRORS), tenta os demais endpoints do pool antes de propagar
+        o erro. Uma resposta que não pode ser interpretada não é falha do
+        endpoint: o erro sobe para quem chamou (escalonamento de camada).
+        
+        Args:
+            source: Chunk de origem dos tours emitidos em streaming
+            label: Identificação da chamada na telemetria (padrão: source)
+        
+        Returns:
+            Tupla (dict extraído ou None, uso de tokens)
+        """
+        agents = self.metadata_agents if kind == "metadata" else self.tier_agents[tier_idx]
+        tier = self.router.tiers[tier_idx]
+        label = label or source or kind
+        if self.local_llm is not None:
+            # Modelo local: fora do pool (sem rate limit de API nem circuit breaker)
+            start = time.perf_counter()
+            try:
+                raw, usage = self._run_task(prompt, expected_output, kind=kind)
+            except Exception:
+                self.telemetry.record(label, kind, tier["name"], tier["model"], "local", {},
+                                      0.0, time.perf_counter() - start, 0, "error", 0.0)
+                raise
+            return self._finish_call(raw, usage, label, kind, tier, "local", 0.0, time.perf_counter() - start, 0)
+        tried = set()
+        while True:
+            wait_start = time.perf_counter()
+            lease = self.pool.acquire(estimate_tokens(prompt), exclude=tried)
+            queue_wait = time.perf_counter() - wait_start
+            name = lease.endpoint.name
+            start = time.perf_counter()
+            try:
+                if (self.config.streaming_enabled and kind != "metadata"
+                        and openai_api_model(tier["model"]) is not None):
+                    raw, usage = self._stream_task(prompt, tier, lease.endpoint, source)
+                else:
+                    raw, usage = self._run_task(prompt, expected_output, agent=agents[name], kind=kind)
+            except ENDPOINT_ERRORS as e:
+                latency = time.perf_counter() - start
+                self.pool.release(lease, {}, latency, ok=False)
+                self.telemetry.record(label, kind, tier["name"], tier["model"], name, {},
+                                      queue_wait, latency, len(tried), "error", 0.0)
+                tried.add(name)
+                if len(tried) >= len(self.pool.endpoints):
+                    raise
+                self.logger.warning(f"Endpoint {name} falhou ({e}); tentando outro endpoint")
+                continue
+            except Exception:
+                # Erro que não é do endpoint: libera a reserva sem contar falha
+                self.pool.release(lease, {}, time.perf_counter() - start)
+                raise
+            latency = time.perf_counter() - start
+            self.pool.release(lease, usage, latency)
+            return self._finish_call(raw, usage, label, kind, tier, name, queue_wait, latency, len(tried))
+    
+    def _finish_call(self, raw, usage: Dict[str, int], label: str, kind: str, tier: Dict[str, Any], endpoint: str,
+                     queue_wait: float, latency: float, retries: int):
+        """Interpreta a saída bruta e registra a chamada na telemetria"""
+        try:
+            data = self._task_output(raw)
+        except Exception:
+            self.telemetry.record(label, kind, tier["name"], tier["model"], endpoint, usage, queue_wait, latency,
+                                  retries, "error", self.router.cost(tier["name"], usage))
+            raise
+        self.telemetry.record(label, kind, tier["name"], tier["model"], endpoint, usage, queue_wait, latency,
+                              retries, self._parse_outcome(data), self.router.cost(tier["name"], usage))
+        return data, usage
+    
+    def _task_output(self, raw) -> Optional[Dict[str, Any]]:
+        """Dict extraído da saída bruta (texto do streaming ou do backend local, CrewOutput)"""
+        if raw is None or isinstance(raw, dict):
+            return raw
+        if isinstance(raw, str):
+            return self._parse_content(raw)
+        if getattr(raw, "json_dict", None):
+            return raw.json_dict
+        if getattr(raw, "pydantic", None):
+            return raw.pydantic.dict()
+        return self._parse_content(str(raw))
+    
+    @staticmethod
+    def _parse_outcome(data) -> str:
+        """Resultado do parse de uma resposta, para a telemetria"""
+        if not isinstance(data, dict):
+            return "empty"
+        info = data.get("_recovery")
+        if info is None:
+            return "ok"
+        return "truncated" if info["truncated"] else "recovered"
+    
+    def _chunk_prompt(self, idx: int):
+        """
+        Monta a requisição de um chunk (página alvo + vizinhos similares).
+        
+        Returns:
+            Tupla (prompt, expected_output)
+        """
         chunk_filename = os.path.basename(self.md_files[idx])
 
         # Chunk alvo/texto
@@ -64,207 +323,763 @@ class TourExtractor:
         # (NOVO) Pegue outros chunks mais similares usando indexador!
         similar_contexts = []
         if self.indexer is not None:
-            similar = self.indexer.search_similar_chunks(target_text, top_k=3)
+            similar = self.indexer.search_similar_chunks(target_text, top_k=REFERENCE_TOP_K)
             # Exclua duplicação do próprio chunk idx!
             similar = [c for c in similar if c['idx'] != idx]
             for c in similar:
-                similar_contexts.append(c['text'][:self.config.max_context_chars])
-        # Concatenar target + similares
-        context = target_text + "\n\n" + "\n\n".join(similar_contexts)
-        
-        # Prompt ROBUSTO MULTI-FORMATO E MULTI-IDIOMA
-        prompt = f"""
-Extraia TODAS as informações de tours/excursões/traslados do texto com MÁXIMA PRECISÃO, INDEPENDENTE do idioma (inglês, português, espanhol, francês) ou formato (tabelas, parágrafos, listas).
-
------------------------------------------------------------------------------
-REGRAS CRÍTICAS DE EXTRAÇÃO:
------------------------------------------------------------------------------
-
-1. **IDIOMA:** Detecte automaticamente (inglês/português/espanhol/francês). Extraia em qualquer idioma.
-
-2. **CIDADE e TÍTULO:** 
-   - city: apenas a cidade (ex: "Paris", "San Andrés", "Colmar")
-   - title: nome do tour SEM a cidade (ex: "French wine tasting", NÃO "Paris French wine tasting")
-
-3. **DESCRIÇÃO:** Texto COMPLETO e detalhado (mínimo 80 caracteres). Inclua roteiro, diferenciais, pontos visitados.
-
-4. **DURAÇÃO:** Objeto {{"quantity": 3.5, "unit": "hours"}} ou {{"quantity": 8, "unit": "hours"}}
-
-5. **LOCALIZAÇÃO:**
-   - main: cidade principal
-   - region: região/estado (se mencionado)
-   - zone: "Zona 1"/"Zona 2"/"Zona 3" (se houver sistema de zonas)
-
-6. **PREÇOS - DOIS FORMATOS SUPORTADOS:**
-
-   📌 **FORMATO A - POR VEÍCULO (Europeu):**
-   - pricing_type: "per_vehicle"
-   - options: [
-       {{
-         "name_option": "Car/Van with english speaking driver. Price per car/van",
-         "details": [
-           {{"capacity": "01-03 pax", "vehicle_options": "car", "price": {{"quantity": 625, "currency": "EUR"}}}},
-           {{"capacity": "04-06 pax", "vehicle_options": "van", "price": {{"quantity": 625, "currency": "EUR"}}}}
-         ]
-       }},
-       {{
-         "name_option": "Entrance ticket. Price per pax",
-         "details": [{{"capacity": "all", "vehicle_options": null, "price": {{"quantity": 13, "currency": "EUR"}}}}]
-       }}
-     ]
-
-   📌 **FORMATO B - POR PESSOA/TABELA MATRICIAL (Latino-americano):**
-   - pricing_type: "per_person"
-   - pricing_matrix: [
-       {{"pax_count": 1, "price": 21, "currency": "USD"}},
-       ...
-     ]
-
-7. **HORÁRIOS E FREQUÊNCIA:**
-   - schedule: {{
-       "departure_time": "05:30" ou "08:30",
-       "return_time": "17:00",
-       "frequency": "Diário" ou "Segunda a Sexta"
-     }}
-
-8. **PONTO DE ENCONTRO:**
-   - meeting_point: "Hotel lobby" ou "Aeroporto" ou "Pier 5"
-
-9. **ITENS INCLUSOS/EXCLUÍDOS:**
-   - includes: ["Guia em espanhol", "Transporte", "Almoço"]
-   - excludes: ["Bebidas alcoólicas", "Gorjetas"]
-
-10. **IDIOMAS DISPONÍVEIS:**
-    - language_options: ["espanhol", "inglês", "português", "francês"]
-
-11. **OPERAÇÃO:**
-    - operation: {{
-        "non_operating_periods": ["01 May", "08 Jan to 09 Feb", "Domingos"]
-      }}
-
-12. **OBSERVAÇÕES (TODAS!):**
-    - observations: Agrupe TODAS as observações, restrições, notas, políticas de child, quantidade mínima para reserva, horários de reunião, fechamentos, suplementos, etc.
-    - Exemplo: "Eiffel Tower closed: 01 May. Top floor closed: 08 Jan to 09 Feb. Only for good walkers. Minimum 2 pax to confirm."
-
-13. **MIN_BOOKING:** Quantidade mínima de pessoas para confirmar reserva (ex: 2)
-
-14. **SOURCE_CHUNKS:** ["{chunk_filename}"]
-
------------------------------------------------------------------------------
-SCHEMA OBRIGATÓRIO (adapte ao formato encontrado):
------------------------------------------------------------------------------
-
-{{
-  "agency": "Nome da Agência",
-  "product": {{
-    "type": "Private Tour" ou "Shared Tour" ou "Transfer",
-    "general_conditions": "Condições gerais do catálogo...",
-    "year": 2024,
-    "destination": ["France"] ou ["Colombia"]
-  }},
-  "tours": [
-    {{
-      "id": "TOUR_ID_UNICO_NUMERICO",
-      "city": "Paris",
-      "title": "French wine tasting",
-      "location": {{"main": "Paris", "region": "Ile-de-France", "zone": null}},
-      "duration": {{"quantity": 1.5, "unit": "hours"}},
-      "description": "Complete description...",
-      
-      "pricing_type": "per_vehicle",  // ou "per_person"
-      "options": [...],  // Se per_vehicle
-      "pricing_matrix": [...],  // Se per_person
-      
-      "schedule": {{
-        "departure_time": "08:30",
-        "return_time": null,
-        "frequency": "Diário"
-      }},
-      "meeting_point": "Hotel lobby",
-      "includes": ["Guia", "Transporte", "Entrada"],
-      "excludes": ["Refeições", "Gorjetas"],
-      "language_options": ["espanhol", "inglês"],
-      
-      "operation": {{
-        "non_operating_periods": ["01 May", "Domingos"]
-      }},
-      "min_adults": 1,
-      "max_adults": 6,
-      "max_childrens": null,
-      "min_booking": 2,
-      "observations": "Todas observações agregadas aqui...",
-      "source_chunks": ["{chunk_filename}"]
-    }}
-  ]
-}}
-
------------------------------------------------------------------------------
-TEXTO PARA ANÁLISE:
------------------------------------------------------------------------------
-
-{context}
-
------------------------------------------------------------------------------
-ATENÇÃO FINAL:
-- Se NÃO houver informação, use null ou []
-- NUNCA invente dados
-- Adapte o formato ao que encontrar (per_vehicle OU per_person)
-- SEMPRE extraia observations COMPLETAS
------------------------------------------------------------------------------
-
-RETORNE APENAS O JSON ESTRUTURADO ACIMA!
-"""
+                similar_contexts.append((os.path.basename(c['file']), c['text'][:self.config.max_context_chars]))
         
-        task = Task(
-            description=prompt,
-            agent=self.agent,
-            expected_output="JSON com tours extraídos completos seguindo schema multi-formato"
-        )
+        if self.config.prompt_style == "legacy":
+            # Concatenar target + similares
+            context = target_text + "\n\n" + "\n\n".join(text for _, text in similar_contexts)
+            prompt = build_legacy_prompt(chunk_filename, context)
+            expected_output = "JSON com tours extraídos completos seguindo schema multi-formato"
+        else:
+            # Vizinhos entram apenas como referência: o tour pertence ao chunk onde aparece
+            prompt = build_chunk_prompt(chunk_filename, target_text, references=similar_contexts)
+            expected_output = CHUNK_EXPECTED_OUTPUT
+        return prompt, expected_output
+    
+    def _expand(self, data):
+        """Expande as chaves compactas da resposta (prompt schema)"""
+        if self.config.prompt_style != "legacy" and self.config.prompt_compact_keys:
+            return expand_keys(data or {})
+        return data
+    
+    def _finish_chunk(self, idx: int, data) -> Dict[str, Any]:
+        """Normaliza a resposta de um chunk e atribui a origem dos tours"""
+        if not isinstance(data, dict) or not isinstance(data.get("tours"), list):
+            return {"tours": []}
         
-        crew = Crew(agents=[self.agent], tasks=[task], process="sequential", verbose=False)
+        # Atribuição da origem feita pelo código (não é pedida ao modelo)
+        chunk_filename = os.path.basename(self.md_files[idx])
+        for tour in data["tours"]:
+            if isinstance(tour, dict):
+                tour["source_chunks"] = [chunk_filename]
+        return data
+    
+    def _stream_task(self, prompt: str, tier: Dict[str, Any], endpoint, source: Optional[str]):
+        """
+        Executa a requisição em streaming, emitindo cada tour completo pelo
+        callback on_tour enquanto o restante da resposta ainda é gerado.
         
+        Returns:
+            Tupla (texto da resposta, uso de tokens)
+        """
+        messages = [
+            {"role": "system", "content": self.system_prompts["chunk"]},
+            {"role": "user", "content": prompt},
+        ]
+        # Prefixo do provedor (litellm) não faz parte do nome do modelo na API
+        model = openai_api_model(tier["model"])
+        parser = TourStreamParser(lambda tour, chunk: self._emit(tour, chunk or source))
+        text, usage = stream_chat_completion(
+            endpoint.base_url or tier["base_url"], endpoint.api_key, model, messages,
+            temperature=self.config.temperature, on_text=parser.feed
+        )
+        return text, usage
+    
+    def _emit(self, tour: Dict[str, Any], chunk: Optional[str]):
+        """Entrega um tour recém-completado ao callback (com chaves expandidas e origem)"""
+        tour = self._expand(dict(tour))
+        if chunk:
+            tour["source_chunks"] = [os.path.basename(chunk)]
+        # Chunks escalonados para outra camada repetem os tours já emitidos
+        key = (chunk, title_key(tour.get("title"), tour.get("city")))
+        with self.usage_lock:
+            if key in self.stream_stats.setdefault("seen", set()):
+                return
+            self.stream_stats["seen"].add(key)
+            self.stream_stats["emitted"] = self.stream_stats.get("emitted", 0) + 1
+            self.stream_stats.setdefault("first_tour_s", time.perf_counter() - self.started_at)
+        if self.on_tour is None:
+            return
         try:
-            result = crew.kickoff()
+            self.on_tour(tour)
+        except Exception as e:
+            self.logger.warning(f"Callback de streaming falhou: {e}")
+    
+    def process_chunk(self, idx: int, start_tier: int = 0) -> Dict[str, Any]:
+        """
+        Extrai um chunk começando pela camada start_tier e escalonando para a
+        camada seguinte enquanto a resposta falhar na validação.
+        """
+        prompt, expected_output = self._chunk_prompt(idx)
+        price_tables = self._price_tables(idx)
+        last_tier = len(self.router.tiers) - 1
+        data = None
+        for tier_idx in range(start_tier, last_tier + 1):
+            tier = self.router.tiers[tier_idx]
+            start = time.perf_counter()
+            try:
+                source = os.path.basename(self.md_files[idx])
+                data, usage = self._call(prompt, expected_output, tier_idx=tier_idx, source=source)
+                data, usage = self._complete_truncated(data, usage, prompt, expected_output,
+                                                       tier_idx=tier_idx, source=source)
+                self._record_usage("chunks", usage)
+                data = self._expand(data)
+                problems = self.router.validate(data, price_tables)
+            except Exception as e:
+                data, usage, problems = None, {}, [f"erro: {e}"]
             
-            # Extrai JSON
-            if hasattr(result, 'json_dict') and result.json_dict:
-                return result.json_dict
-            elif hasattr(result, 'pydantic') and result.pydantic:
-                return result.pydantic.dict()
+            escalate = bool(problems) and tier_idx < last_tier
+            self.router.record(tier["name"], usage, time.perf_counter() - start, escalations=int(escalate))
+            if not problems:
+                break
+            if escalate:
+                self.logger.info(f"Chunk {idx+1} escalonado de {tier['name']}: {'; '.join(problems[:3])}")
             else:
-                content = str(result).strip()
-                first, last = content.find('{'), content.rfind('}')
-                if first != -1 and last != -1:
-                    return json.loads(content[first:last+1])
-                return {"agency": None, "product": None, "tours": []}
+                self.logger.error(f"Chunk {idx+1} sem resposta válida ({tier['name']}): {'; '.join(problems[:3])}")
+        
+        return self._finish_chunk(idx, data)
+    
+    def _price_tables(self, idx: int) -> int:
+        """Número de tabelas de preço da página (regra de sanidade do roteamento)"""
+        return self.triage.score_page(self.texts[idx])["price_tables"]
+    
+    def process_pack(self, indices: List[int]) -> Dict[int, Dict[str, Any]]:
+        """
+        Extrai várias páginas pequenas em uma única requisição.
+        
+        Returns:
+            Resultado por índice de chunk, com source_chunks da página de origem
+        """
+        tier = self.router.tiers[0]
+        
+        prompt = self._pack_prompt(indices)
+        expected_output = 'JSON {"chunks": [{"chunk": ..., "tours": [...]}]} seguindo o schema do sistema'
+        source = os.path.basename(self.md_files[indices[0]])
+        label = "+".join(os.path.basename(self.md_files[i]) for i in indices)
+        start = time.perf_counter()
+        try:
+            data, usage = self._call(prompt, expected_output, kind="packed", source=source, label=label)
+            data, usage = self._complete_truncated(data, usage, prompt, expected_output, kind="packed",
+                                                   source=source, label=label)
+            self._record_usage("chunks", usage)
         except Exception as e:
-            self.logger.error(f"Erro chunk {idx+1}: {e}")
-            return {"agency": None, "product": None, "tours": []}
+            self.logger.error(f"Erro no pacote {', '.join(os.path.basename(self.md_files[i]) for i in indices)}: {e}")
+            self.router.record(tier["name"], {}, time.perf_counter() - start, escalations=len(indices))
+            return self._escalate_pages({i: {"tours": []} for i in indices}, indices)
+        
+        results = self._split_pack(indices, data)
+        
+        # Validação por página: apenas as páginas reprovadas sobem de camada, individualmente
+        failed = [i for i in indices if self.router.validate(results[i], self._price_tables(i))]
+        self.router.record(tier["name"], usage, time.perf_counter() - start, escalations=len(failed))
+        return self._escalate_pages(results, failed)
+    
+    def _pack_prompt(self, indices: List[int]) -> str:
+        """Requisição agrupada de várias páginas pequenas"""
+        filenames = [os.path.basename(self.md_files[i]) for i in indices]
+        texts = [self.texts[i][:self.config.max_context_chars] for i in indices]
+        return build_packed_prompt(filenames, texts)
     
-    def extract(self) -> Dict[str, Any]:
-        """Extrai tours em paralelo"""
-        self.logger.info(f"Processando {len(self.texts)} chunks com {self.config.max_workers} workers")
+    def _split_pack(self, indices: List[int], data) -> Dict[int, Dict[str, Any]]:
+        """Distribui os tours da resposta agrupada para as páginas de origem"""
+        filenames = [os.path.basename(self.md_files[i]) for i in indices]
+        results = {i: {"tours": []} for i in indices}
+        by_name = dict(zip(filenames, indices))
         
-        agency = None
-        product = None
-        all_tours = []
+        data = data or {}
+        if self.config.prompt_compact_keys:
+            data = expand_keys(data)
+        
+        # Resposta sem agrupamento por página: atribui ao primeiro chunk do pacote
+        groups = data.get("chunks")
+        if not isinstance(groups, list):
+            groups = [{"chunk": filenames[0], "tours": data.get("tours", [])}]
+        
+        for group in groups:
+            if not isinstance(group, dict):
+                continue
+            name = os.path.basename(str(group.get("chunk", "")))
+            if name not in by_name:
+                self.logger.warning(f"Pacote {filenames}: página desconhecida '{name}', atribuída a {filenames[0]}")
+                name = filenames[0]
+            for tour in group.get("tours") or []:
+                if isinstance(tour, dict):
+                    tour["source_chunks"] = [name]
+                    results[by_name[name]]["tours"].append(tour)
+        return results
+    
+    def _escalate_pages(self, results: Dict[int, Dict[str, Any]], indices: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Reprocessa páginas de um pacote, individualmente, a partir da segunda camada"""
+        if len(self.router.tiers) < 2:
+            return results
+        for idx in indices:
+            self.logger.info(f"Chunk {idx+1} escalonado do pacote ({self.router.tiers[0]['name']})")
+            results[idx] = self.process_chunk(idx, start_tier=1)
+        return results
+    
+    def _run_task(self, prompt: str, expected_output: str, agent=None, kind: str = "chunk"):
+        """
+        Executa uma tarefa no agente (a saída é interpretada por _task_output).
+        
+        Args:
+            kind: Tipo de requisição ("chunk", "packed" ou "metadata"), usado pelo backend local
+        
+        Returns:
+            Tupla (saída bruta do agente, uso de tokens)
+        """
+        if self.local_llm is not None:
+            system_prompt = self.system_prompts["metadata" if kind == "metadata" else "chunk"]
+            return self.local_llm.run(system_prompt, prompt, kind)
+        
+        agent = agent or self.agent
+        task = Task(description=prompt, agent=agent, expected_output=expected_output)
+        crew = Crew(agents=[agent], tasks=[task], process="sequential", verbose=False)
+        result = crew.kickoff()
         
+        metrics = getattr(result, "token_usage", None)
+        usage = {
+            "prompt_tokens": getattr(metrics, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(metrics, "completion_tokens", 0) or 0,
+        }
+        return result, usage
+    
+    def _parse_content(self, content: str):
+        """
+        Extrai o objeto JSON do texto da resposta (None se não houver).
+        
+        Respostas malformadas ou truncadas passam pela recuperação parcial: os
+        tours completos são salvos e validados um a um contra Tour. O dict
+        recuperado leva a chave "_recovery" (telemetria e continuação da
+        cauda truncada; removida por _complete_truncated).
+        """
+        content = content.strip()
+        first, last = content.find('{'), content.rfind('}')
+        if first == -1:
+            return None
+        if last > first:
+            try:
+                return json.loads(content[first:last+1])
+            except json.JSONDecodeError:
+                if not self.config.recovery_enabled:
+                    raise
+        elif not self.config.recovery_enabled:
+            return None
+        
+        data, info = recover_json(content)
+        invalid = 0
+        if data is not None and info["salvaged"]:
+            for group in self._tour_groups(data):
+                valid = [tour for tour in group["tours"] if self._valid_tour(tour)]
+                invalid += len(group["tours"]) - len(valid)
+                group["tours"] = valid
+        
+        with self.usage_lock:
+            stats = self.recovery_stats
+            stats["responses"] = stats.get("responses", 0) + 1
+            stats["salvaged"] = stats.get("salvaged", 0) + info["salvaged"] - invalid
+            stats["invalid"] = stats.get("invalid", 0) + invalid
+            stats["damaged"] = stats.get("damaged", 0) + info["damaged"]
+            stats["truncated"] = stats.get("truncated", 0) + int(info["truncated"])
+            stats["lost"] = stats.get("lost", 0) + int(data is None)
+        
+        if data is not None:
+            data["_recovery"] = info
+        return data
+    
+    @staticmethod
+    def _tour_groups(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Grupos {"tours": [...]} da resposta (um por página nas respostas agrupadas)"""
+        if isinstance(data.get("chunks"), list):
+            return [g for g in data["chunks"] if isinstance(g, dict) and isinstance(g.get("tours"), list)]
+        if isinstance(data.get("tours"), list):
+            return [data]
+        return []
+    
+    def _valid_tour(self, tour: Any) -> bool:
+        """Valida um tour recuperado individualmente contra o schema Tour"""
+        if not isinstance(tour, dict):
+            return False
+        try:
+            Tour.model_validate(self._expand(tour))
+        except ValidationError:
+            return False
+        return True
+    
+    def _complete_truncated(self, data, usage: Dict[str, int], prompt: str, expected_output: str,
+                            tier_idx: int = 0, kind: str = "chunk", source: Optional[str] = None,
+                            label: Optional[str] = None):
+        """
+        Pede a continuação de uma resposta truncada (apenas os tours que
+        faltam) e junta os tours recebidos aos já salvos.
+        
+        Returns:
+            Tupla (dict extraído, uso de tokens somado ao da continuação)
+        """
+        if not isinstance(data, dict):
+            return data, usage
+        info = data.pop("_recovery", None)
+        attempts = 0
+        while info is not None and info["truncated"] and attempts < self.config.recovery_max_continuations:
+            attempts += 1
+            titles = [self._expand(t).get("title") for g in self._tour_groups(data) for t in g["tours"]]
+            continuation = build_continuation_prompt(prompt, titles, info["last_chunk"])
+            try:
+                more, extra = self._call(continuation, expected_output, tier_idx=tier_idx, kind=kind,
+                                         source=source, label=label)
+            except Exception as e:
+                self.logger.warning(f"Continuação de resposta truncada falhou ({source}): {e}")
+                break
+            usage = {k: usage.get(k, 0) + extra.get(k, 0) for k in ("prompt_tokens", "completion_tokens")}
+            if not isinstance(more, dict):
+                break
+            info = more.pop("_recovery", None)
+            added = self._merge_continuation(data, more)
+            with self.usage_lock:
+                self.recovery_stats["continuations"] = self.recovery_stats.get("continuations", 0) + 1
+                self.recovery_stats["continuation_tours"] = self.recovery_stats.get("continuation_tours", 0) + added
+        return data, usage
+    
+    def _merge_continuation(self, data: Dict[str, Any], more: Dict[str, Any]) -> int:
+        """
+        Acrescenta os tours da continuação à resposta truncada, ignorando os
+        já recebidos.
+        
+        Returns:
+            Número de tours acrescentados
+        """
+        def key(tour):
+            tour = self._expand(tour)
+            return title_key(tour.get("title"), tour.get("city"))
+        
+        # Respostas agrupadas: a continuação pode trazer só a página interrompida e as seguintes
+        if "chunks" in data or "chunks" in more:
+            if "chunks" not in data:
+                data["chunks"] = [{"chunk": None, "tours": data.pop("tours", [])}]
+            by_chunk = {g.get("chunk"): g for g in self._tour_groups(data)}
+            added = 0
+            for group in self._tour_groups(more):
+                target = by_chunk.get(group.get("chunk"))
+                if target is None:
+                    target = {"chunk": group.get("chunk"), "tours": []}
+                    data["chunks"].append(target)
+                    by_chunk[target["chunk"]] = target
+                seen = {key(t) for t in target["tours"]}
+                new = [t for t in group["tours"] if key(t) not in seen]
+                target["tours"].extend(new)
+                added += len(new)
+            return added
+        
+        seen = {key(t) for t in data.get("tours") or []}
+        new = [t for t in more.get("tours") or [] if isinstance(t, dict) and key(t) not in seen]
+        data.setdefault("tours", []).extend(new)
+        return len(new)
+    
+    def _record_usage(self, kind: str, usage: Dict[str, int]):
+        """Acumula uso de tokens por tipo de chamada (thread-safe)"""
+        with self.usage_lock:
+            totals = self.usage.setdefault(kind, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            totals["calls"] += 1
+            totals["prompt_tokens"] += usage.get("prompt_tokens", 0)
+            totals["completion_tokens"] += usage.get("completion_tokens", 0)
+    
+    def _metadata_pages(self) -> List[int]:
+        """Primeiras páginas e páginas classificadas como metadados"""
+        first_pages = set(range(min(self.config.metadata_first_pages, len(self.texts))))
+        metadata_pages = {i for i, label in enumerate(self.page_labels) if label == PAGE_METADATA}
+        return sorted(first_pages | metadata_pages)
+    
+    def _metadata_prompt(self):
+        """
+        Monta a requisição de metadados a partir das primeiras páginas e das
+        páginas classificadas como metadados (condições gerais).
+        
+        Returns:
+            Tupla (prompt ou None se não houver texto, número de páginas usadas)
+        """
+        pages = self._metadata_pages()
+        
+        # Monta contexto respeitando o limite de caracteres
+        parts, budget = [], self.config.max_context_chars
+        for idx in pages:
+            if budget <= 0:
+                break
+            text = self.texts[idx][:budget]
+            parts.append((os.path.basename(self.md_files[idx]), text))
+            budget -= len(text)
+        
+        if not parts:
+            return None, 0
+        return build_metadata_prompt(parts), len(parts)
+    
+    def extract_catalog_metadata(self) -> Dict[str, Any]:
+        """
+        Extrai agência e produto uma única vez, a partir das primeiras páginas
+        e das páginas classificadas como metadados (condições gerais).
+        
+        Returns:
+            Dicionário com "agency" e "product" (valores podem ser None)
+        """
+        prompt, pages = self._metadata_prompt()
+        if prompt is None:
+            return {"agency": None, "product": None}
+        
+        start = time.perf_counter()
+        try:
+            data, usage = self._call(
+                prompt,
+                expected_output=METADATA_EXPECTED_OUTPUT,
+                kind="metadata"
+            )
+            self._record_usage("metadata", usage)
+            self.router.record(self.router.tiers[0]["name"], usage, time.perf_counter() - start)
+        except Exception as e:
+            self.logger.error(f"Erro na extração de metadados do catálogo: {e}")
+            data = None
+        
+        data = self._expand(data) or {}
+        self.logger.info(f"Metadados do catálogo extraídos de {pages} páginas em uma única chamada")
+        return {"agency": data.get("agency"), "product": data.get("product")}
+    
+    def _log_token_savings(self):
+        """Registra tokens por chunk e estima os tokens de saída evitados com os metadados únicos"""
+        meta = self.usage.get("metadata")
+        chunks = self.usage.get("chunks")
+        if chunks and chunks["calls"]:
+            self.logger.info(
+                f"Tokens por chunk (média, prompt {self.config.prompt_style}): "
+                f"entrada {chunks['prompt_tokens'] / chunks['calls']:.0f}, "
+                f"saída {chunks['completion_tokens'] / chunks['calls']:.0f}"
+            )
+        if not meta or not chunks or not meta["completion_tokens"]:
+            return
+        
+        saved = meta["completion_tokens"] * chunks["calls"]
+        total = chunks["completion_tokens"] + meta["completion_tokens"]
+        self.logger.info(
+            f"Tokens de saída: {total} nesta execução; ~{saved} evitados ao extrair metadados uma única vez "
+            f"({saved / (total + saved):.0%} de redução estimada)"
+        )
+    
+    def _write_run_summary(self, tours: int):
+        """Grava a telemetria da execução (run_summary.json, ao lado de tours_extracted.json)"""
+        path = os.path.join(self.config.results_dir, "run_summary.json")
+        try:
+            summary = self.telemetry.write(path, tours)
+        except OSError as e:
+            self.logger.warning(f"Resumo da execução não gravado: {e}")
+            return
+        latency, wait = summary["latency_s"], summary["queue_wait_s"]
+        self.logger.info(
+            f"Chamadas de LLM: {summary['calls']} ({summary['retries']} novas tentativas), latência "
+            f"p50 {latency['p50']:.1f}s / p95 {latency['p95']:.1f}s / p99 {latency['p99']:.1f}s, espera na fila "
+            f"p50 {wait['p50']:.1f}s / p95 {wait['p95']:.1f}s, custo {format_cost(summary['cost_usd'])}; resumo: {path}"
+        )
+    
+    def _log_recovery(self):
+        """Registra as respostas malformadas/truncadas e os tours recuperados delas"""
+        stats = self.recovery_stats
+        if not stats.get("responses"):
+            return
+        self.logger.info(
+            f"Recuperação de JSON: {stats['responses']} respostas malformadas ({stats['truncated']} truncadas, "
+            f"{stats['lost']} sem nada aproveitável); {stats['salvaged']} tours salvos, "
+            f"{stats['invalid']} reprovados no schema, {stats['damaged']} objetos danificados descartados; "
+            f"{stats.get('continuations', 0)} continuações trouxeram mais {stats.get('continuation_tours', 0)} tours"
+        )
+    
+    def _page_embeddings(self):
+        """Retorna embeddings das páginas (indexador em memória ou artefato salvo)"""
+        embeddings = getattr(self.indexer, "embeddings", None)
+        if embeddings is not None:
+            return embeddings
+        
+        emb_path = os.path.join(self.config.index_dir, "embeddings.npy")
+        if os.path.exists(emb_path):
+            import numpy as np
+            return np.load(emb_path)
+        return None
+    
+    def triage_pages(self) -> List[int]:
+        """Classifica as páginas e retorna os índices que podem conter tours"""
+        if not self.config.triage_enabled:
+            self.page_labels = []
+            return list(range(len(self.texts)))
+        
+        self.page_labels = self.triage.classify_pages(self.texts, self._page_embeddings())
+        # Páginas de metadados vão apenas para a extração de metadados do catálogo
+        return [i for i, label in enumerate(self.page_labels) if label == PAGE_TOURS]
+    
+    def parse_tables(self, indices: List[int]) -> Dict[int, Dict[str, Any]]:
+        """Resolve sem LLM as páginas de tabelas de preço regulares"""
+        if not self.config.table_parser_enabled:
+            return {}
+        
+        self.table_parser.set_boilerplate(self.texts)
+        results = {}
+        for idx in indices:
+            data = self.table_parser.parse_page(self.texts[idx], os.path.basename(self.md_files[idx]))
+            if data is not None:
+                results[idx] = data
+        
+        total = len(indices)
+        self.logger.info(
+            f"Tabelas determinísticas: {len(results)}/{total} páginas resolvidas sem LLM "
+            f"({len(results) / total if total else 0:.0%}), "
+            f"{sum(len(d['tours']) for d in results.values())} tours"
+        )
+        return results
+    
+    def extract_batch(self, groups: List[List[int]], metadata: Optional[Dict[str, Any]] = None):
+        """
+        Extrai todos os grupos (e os metadados) em um único lote da Batch API.
+        
+        Respostas ausentes no lote são refeitas online; respostas reprovadas na
+        validação sobem de camada como no modo online. Metadados já conhecidos
+        (revisão anterior do catálogo) não entram no lote.
+        
+        Returns:
+            Tupla (resultados por índice de chunk, metadados do catálogo)
+        """
+        tier = self.router.tiers[0]
+        endpoint = self.pool.endpoints[0]
+        client = BatchClient(
+            endpoint.base_url or tier["base_url"], endpoint.api_key, self.logger,
+            poll_interval_s=self.config.batch_poll_interval_s,
+            completion_window=self.config.batch_completion_window,
+            max_wait_s=self.config.batch_max_wait_h * 3600
+        )
+        # Prefixo do provedor (litellm) não faz parte do nome do modelo na API
+        model = tier["model"].split("/", 1)[1] if tier["model"].startswith("openai/") else tier["model"]
+        
+        def request_line(custom_id: str, kind: str, prompt: str):
+            messages = [
+                {"role": "system", "content": self.system_prompts["metadata" if kind == "metadata" else "chunk"]},
+                {"role": "user", "content": prompt},
+            ]
+            return BatchClient.request_line(custom_id, model, messages, self.config.temperature)
+        
+        lines, targets, prompts = [], {}, {}
+        for group in groups:
+            if len(group) == 1:
+                custom_id = f"chunk-{group[0]}"
+                prompts[custom_id] = ("chunk", self._chunk_prompt(group[0])[0])
+            else:
+                custom_id = "pack-" + "-".join(str(i) for i in group)
+                prompts[custom_id] = ("packed", self._pack_prompt(group))
+            lines.append(request_line(custom_id, *prompts[custom_id]))
+            targets[custom_id] = group
+        metadata_prompt = self._metadata_prompt()[0] if metadata is None else None
+        if metadata_prompt is not None:
+            lines.append(request_line("metadata", "metadata", metadata_prompt))
+        
+        if not lines:
+            return {}, metadata or {"agency": None, "product": None}
+        
+        start = time.perf_counter()
+        try:
+            outputs = client.run(lines, self.config.batch_dir, tag=f"batch_{int(time.time())}")
+        except (RuntimeError, OSError, ValueError) as e:
+            # Lote rejeitado/falho ou Batch API indisponível: sem respostas, tudo é refeito online abaixo
+            self.logger.error(f"Lote falhou ({e}); todas as {len(lines)} requisições serão refeitas online")
+            outputs = {}
+        elapsed = time.perf_counter() - start
+        
+        parsed = {custom_id: self._batch_output(outputs.get(custom_id)) for custom_id in targets}
+        labels = {c: "+".join(os.path.basename(self.md_files[i]) for i in group) for c, group in targets.items()}
+        for custom_id, (data, usage) in parsed.items():
+            self.telemetry.record(
+                labels[custom_id], prompts[custom_id][0], tier["name"], tier["model"], "batch", usage or {},
+                0.0, elapsed, 0, "error" if usage is None else self._parse_outcome(data),
+                self.router.cost(tier["name"], usage or {}, self.config.batch_cost_factor)
+            )
+        
+        # Respostas truncadas no lote: apenas a cauda é pedida online
+        truncated = [c for c, (data, _) in parsed.items()
+                     if isinstance(data, dict) and (data.get("_recovery") or {}).get("truncated")]
+        if truncated:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+                futures = {
+                    executor.submit(
+                        self._complete_truncated, *parsed[custom_id], prompts[custom_id][1],
+                        "JSON seguindo o schema do sistema", kind=prompts[custom_id][0],
+                        source=os.path.basename(self.md_files[targets[custom_id][0]]), label=labels[custom_id]
+                    ): custom_id
+                    for custom_id in truncated
+                }
+                for future in concurrent.futures.as_completed(futures):
+                    parsed[futures[future]] = future.result()
+        
+        results, missing, failed = {}, [], []
+        for custom_id, group in targets.items():
+            data, usage = parsed[custom_id]
+            if usage is None:
+                missing.extend(group)
+                continue
+            if isinstance(data, dict):
+                data.pop("_recovery", None)
+            self._record_usage("chunks", usage)
+            if len(group) == 1:
+                idx = group[0]
+                data = self._expand(data)
+                results[idx] = self._finish_chunk(idx, data)
+                bad = [idx] if self.router.validate(data, self._price_tables(idx)) else []
+            else:
+                results.update(self._split_pack(group, data))
+                bad = [i for i in group if self.router.validate(results[i], self._price_tables(i))]
+            failed.extend(bad)
+            escalations = len(bad) if len(self.router.tiers) > 1 else 0
+            self.router.record(tier["name"], usage, elapsed, escalations=escalations,
+                               cost_factor=self.config.batch_cost_factor)
+        
+        metadata_data, metadata_usage = self._batch_output(outputs.get("metadata"))
+        if metadata_usage is not None:
+            self.telemetry.record("metadata", "metadata", tier["name"], tier["model"], "batch", metadata_usage,
+                                  0.0, elapsed, 0, self._parse_outcome(metadata_data),
+                                  self.router.cost(tier["name"], metadata_usage, self.config.batch_cost_factor))
+            self._record_usage("metadata", metadata_usage)
+            self.router.record(tier["name"], metadata_usage, elapsed, cost_factor=self.config.batch_cost_factor)
+        
+        self.logger.info(
+            f"Lote: {len(lines)} requisições em {elapsed:.0f}s; {len(missing)} páginas sem resposta refeitas online, "
+            f"{len(failed)} reprovadas na validação"
+        )
+        
+        # Refaz online: ausentes a partir da primeira camada, reprovadas a partir da segunda
+        retries = [(idx, 0) for idx in missing]
+        if len(self.router.tiers) > 1:
+            retries += [(idx, 1) for idx in failed]
         with concurrent.futures.ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
-            futures = {executor.submit(self.process_chunk, i): i for i in range(len(self.texts))}
-            
+            futures = {executor.submit(self.process_chunk, idx, start_tier): idx for idx, start_tier in retries}
+            if metadata_prompt is not None and metadata_usage is None:
+                metadata_future = executor.submit(self.extract_catalog_metadata)
+            else:
+                metadata_future = None
             for future in concurrent.futures.as_completed(futures):
-                data = future.result()
+                results[futures[future]] = future.result()
+        
+        if metadata_future is not None:
+            metadata = metadata_future.result()
+        elif metadata is None:
+            metadata_data = self._expand(metadata_data) or {}
+            metadata = {"agency": metadata_data.get("agency"), "product": metadata_data.get("product")}
+        return results, metadata
+    
+    def _batch_output(self, output: Optional[Dict[str, Any]]):
+        """
+        Interpreta o resultado de uma linha do lote.
+        
+        Returns:
+            Tupla (dict extraído ou None, uso de tokens ou None se a requisição falhou)
+        """
+        if not output or "content" not in output:
+            return None, None
+        raw_usage = output.get("usage") or {}
+        usage = {
+            "prompt_tokens": raw_usage.get("prompt_tokens", 0) or 0,
+            "completion_tokens": raw_usage.get("completion_tokens", 0) or 0,
+        }
+        try:
+            return self._parse_content(output["content"]), usage
+        except json.JSONDecodeError:
+            return None, usage
+    
+    def extract(self, reuse: Optional["PageReuse"] = None) -> Dict[str, Any]:
+        """
+        Extrai tours em paralelo.
+        
+        Args:
+            reuse: Respostas e metadados da revisão anterior do catálogo
+                (RevisionTracker); páginas reaproveitadas não geram requisições
+        """
+        indices = self.triage_pages()
+        results, metadata = {}, None
+        if reuse is not None:
+            results = {i: reuse.results[i] for i in indices if i in reuse.results}
+            # Metadados refeitos se alguma página usada para extraí-los mudou
+            if reuse.metadata is not None and not reuse.stale.intersection(self._metadata_pages()):
+                metadata = reuse.metadata
+            self.logger.info(
+                f"Revisão incremental: {len(results)} páginas reaproveitadas sem requisição; metadados "
+                f"{'reaproveitados' if metadata is not None else 'extraídos novamente'}"
+            )
+        table_results = self.parse_tables([i for i in indices if i not in results])
+        results.update(table_results)
+        llm_indices = [i for i in indices if i not in results]
+        self.logger.info(f"Processando {len(llm_indices)} de {len(self.texts)} chunks com {self.config.max_workers} workers")
+        
+        all_tours = []
+        self.usage = {}
+        self.router.reset()
+        if self.owns_pool:
+            self.pool.reset()
+        self.stream_stats = {}
+        self.recovery_stats = {}
+        self.telemetry.reset()
+        self.started_at = time.perf_counter()
+        
+        # Páginas pequenas agrupadas em uma única requisição
+        if self.config.packing_enabled and self.config.prompt_style != "legacy":
+            groups = self.packer.pack(llm_indices, self.texts, self._page_embeddings())
+        else:
+            groups = [[i] for i in llm_indices]
+        
+        if self.config.batch_enabled and self.local_llm is None:
+            batch_results, metadata = self.extract_batch(groups, metadata)
+            results.update(batch_results)
+        else:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.config.max_workers) as executor:
+                # Metadados do catálogo extraídos uma única vez, em paralelo aos chunks
+                metadata_future = executor.submit(self.extract_catalog_metadata) if metadata is None else None
+                futures = {}
+                for group in groups:
+                    if len(group) == 1:
+                        futures[executor.submit(self.process_chunk, group[0])] = group[0]
+                    else:
+                        futures[executor.submit(self.process_pack, group)] = None
                 
-                if not agency and data.get("agency"):
-                    agency = data["agency"]
-                if not product and data.get("product"):
-                    product = data["product"]
+                for future in concurrent.futures.as_completed(futures):
+                    idx = futures[future]
+                    if idx is None:
+                        results.update(future.result())
+                    else:
+                        results[idx] = future.result()
                 
-                for tour in data.get("tours", []):
-                    if isinstance(tour, dict) and tour.get("title"):
-                        all_tours.append(tour)
+                if metadata_future is not None:
+                    metadata = metadata_future.result()
+        
+        # Tabelas não trazem a cidade: vem das cidades do catálogo (tours do LLM ou destino do produto)
+        if table_results:
+            llm_tours = [t for i, data in results.items() if i not in table_results for t in data.get("tours", [])]
+            cities = self.table_parser.catalog_cities(llm_tours, metadata.get("product"))
+            for idx in table_results:
+                self.table_parser.locate(results[idx]["tours"], self.texts[idx], cities)
+        
+        self.page_results = results
+        self.catalog_metadata = metadata
+        agency = metadata.get("agency")
+        product = metadata.get("product")
+        
+        # Consolida na ordem do documento
+        for idx in sorted(results):
+            data = results[idx]
+
+            for tour in data.get("tours", []):
+                if isinstance(tour, dict) and tour.get("title"):
+                    all_tours.append(tour)
+        
+        # Duplicatas entre chunks (vizinhos semânticos) fundidas no chunk dono
+        all_tours = self.merger.merge(
+            all_tours, texts={os.path.basename(f): text for f, text in zip(self.md_files, self.texts)}
+        )
         
         self.logger.info(f"Extração concluída: {len(all_tours)} tours extraídos")
+        self._log_token_savings()
+        self.router.report()
+        if self.owns_pool:
+            self.pool.report()
+        self._log_recovery()
+        if self.stream_stats.get("emitted"):
+            self.logger.info(
+                f"Streaming: {self.stream_stats['emitted']} tours emitidos; primeiro resultado após "
+                f"{self.stream_stats['first_tour_s']:.1f}s (extração total {time.perf_counter() - self.started_at:.1f}s)"
+            )
+        if self.local_llm is not None:
+            self.local_llm.report()
+        self._write_run_summary(len(all_tours))
         
         return {
             "agency": agency or "Travel Agency",
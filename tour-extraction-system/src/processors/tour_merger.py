@@ -0,0 +1,151 @@
+"""
+Consolida tours duplicados extraídos de chunks diferentes.
+"""
+import re
+import json
+import unicodedata
+from typing import Dict, Any, List, Optional, Sequence, Set, Tuple
+
+from .request_packer import estimate_tokens
+
+
+STOPWORDS = {"a", "o", "e", "de", "da", "do", "das", "dos", "the", "of", "and", "la", "le", "el", "y", "et", "en", "em"}
+
+
+def normalize_text(text: Any) -> str:
+    """Minúsculas, sem acentos e sem pontuação"""
+    text = unicodedata.normalize("NFKD", str(text or "")).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+
+def title_key(title: Any, city: Any = None) -> str:
+    """Tokens do título ordenados, sem stopwords e sem o nome da cidade"""
+    city_tokens = set(normalize_text(city).split())
+    tokens = [t for t in normalize_text(title).split() if t not in STOPWORDS and t not in city_tokens]
+    return " ".join(sorted(tokens))
+
+
+def tour_keys(cities: Sequence[Any], titles: Sequence[Any]) -> List[str]:
+    """
+    Chave natural de cada tour de um catálogo: cidade + tokens do título
+    (ordem, caixa e acentos ignorados). Títulos repetidos no mesmo catálogo
+    (ex: mesmo passeio em idiomas diferentes) recebem o sufixo #2, #3...
+    pela ordem em que aparecem.
+    """
+    keys, seen = [], {}
+    for city, title in zip(cities, titles):
+        key = f"{normalize_text(city)}|{title_key(title, city) or normalize_text(title)}"
+        seen[key] = seen.get(key, 0) + 1
+        keys.append(key if seen[key] == 1 else f"{key}#{seen[key]}")
+    return keys
+
+
+def price_signature(tour: Dict[str, Any]) -> Tuple[float, ...]:
+    """Conjunto ordenado de preços do tour (options e pricing_matrix)"""
+    prices = set()
+    for entry in tour.get("pricing_matrix") or []:
+        if isinstance(entry, dict) and isinstance(entry.get("price"), (int, float)):
+            prices.add(float(entry["price"]))
+    for opt in tour.get("options") or []:
+        for detail in (opt or {}).get("details") or []:
+            price = (detail or {}).get("price") or {}
+            if isinstance(price, dict) and isinstance(price.get("quantity"), (int, float)):
+                prices.add(float(price["quantity"]))
+    return tuple(sorted(prices))
+
+
+def _filled(value: Any) -> bool:
+    if isinstance(value, dict):
+        return any(_filled(v) for v in value.values())
+    return value not in (None, "", [], {})
+
+
+class TourMerger:
+    """
+    Mantém cada tour atribuído a um único chunk "dono".
+
+    Tours de chunks diferentes com mesma chave difusa (título normalizado +
+    cidade) e assinatura de preços compatível são fundidos. O dono é a cópia
+    do chunk cujo próprio texto contém o título (o tour aparece ali, não só
+    como contexto de referência) ou, sem essa evidência, a primeira no
+    documento; das duplicatas vêm apenas os campos vazios do dono.
+    """
+
+    def __init__(self, logger):
+        self.logger = logger
+        self.stats = {}
+        self.chunk_tokens: Dict[str, Set[str]] = {}
+
+    def merge(self, tours: List[Dict[str, Any]], texts: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+        """
+        Funde duplicatas entre chunks.
+
+        Args:
+            tours: Tours na ordem do documento
+            texts: Texto alvo de cada chunk (nome do arquivo -> texto), usado para escolher o dono
+
+        Returns:
+            Lista sem duplicatas entre chunks
+        """
+        self.chunk_tokens = {name: set(normalize_text(text).split()) for name, text in (texts or {}).items()}
+        merged: List[Dict[str, Any]] = []
+        index: Dict[str, List[int]] = {}
+        duplicates = 0
+        wasted_tokens = 0
+
+        for tour in tours:
+            key = title_key(tour.get("title"), tour.get("city")) + "|" + normalize_text(tour.get("city"))
+            owner_pos = self._find_owner(merged, index.get(key, []), tour)
+            if owner_pos is None:
+                index.setdefault(key, []).append(len(merged))
+                merged.append(tour)
+                continue
+
+            duplicates += 1
+            wasted_tokens += estimate_tokens(json.dumps(tour, ensure_ascii=False))
+            merged[owner_pos] = self._combine(merged[owner_pos], tour)
+
+        self.stats = {
+            "tours_in": len(tours),
+            "tours_out": len(merged),
+            "duplicates": duplicates,
+            "duplicate_output_tokens": wasted_tokens,
+        }
+        if duplicates:
+            self.logger.info(
+                f"Duplicatas entre chunks: {duplicates} tours fundidos "
+                f"(~{wasted_tokens} tokens de saída repetidos)"
+            )
+        return merged
+
+    @staticmethod
+    def _find_owner(merged, positions, tour):
+        """Posição de um tour equivalente vindo de outro chunk, se houver"""
+        sources = set(tour.get("source_chunks") or [])
+        signature = price_signature(tour)
+        for pos in positions:
+            other = merged[pos]
+            # Tours distintos do mesmo chunk com mesmo título (ex: idiomas diferentes) são preservados
+            if sources and sources == set(other.get("source_chunks") or []):
+                continue
+            other_signature = price_signature(other)
+            if not signature or not other_signature or signature == other_signature:
+                return pos
+        return None
+
+    def _appears_in_source(self, tour: Dict[str, Any]) -> bool:
+        """Se o título do tour está no texto alvo do chunk de origem"""
+        tokens = set(title_key(tour.get("title"), tour.get("city")).split())
+        if not tokens:
+            return False
+        return any(tokens <= self.chunk_tokens.get(chunk, set()) for chunk in tour.get("source_chunks") or [])
+
+    def _combine(self, owner: Dict[str, Any], duplicate: Dict[str, Any]) -> Dict[str, Any]:
+        """Mantém o dono (chunk onde o tour aparece, senão o primeiro) e completa campos vazios"""
+        if not self._appears_in_source(owner) and self._appears_in_source(duplicate):
+            owner, duplicate = duplicate, owner
+        combined = dict(owner)
+        for key, value in duplicate.items():
+            if key != "source_chunks" and not _filled(combined.get(key)) and _filled(value):
+                combined[key] = value
+        return combined
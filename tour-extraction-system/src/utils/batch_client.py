@@ -0,0 +1,154 @@
+"""
+Cliente mínimo da Batch API no estilo OpenAI (arquivos JSONL + polling).
+"""
+import os
+import json
+import time
+import uuid
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+class BatchClient:
+    """
+    Envia um lote de requisições de chat completion e aguarda o resultado.
+
+    Fluxo: grava o JSONL de entrada, envia para /files (purpose=batch),
+    cria o lote em /batches, consulta o status até um estado final e baixa
+    os arquivos de saída e de erros.
+    """
+
+    def __init__(self, base_url: Optional[str], api_key: str, logger,
+                 poll_interval_s: float = 30.0, completion_window: str = "24h", max_wait_s: float = 86400.0):
+        self.base_url = (base_url or DEFAULT_BASE_URL).rstrip("/")
+        self.api_key = api_key
+        self.logger = logger
+        self.poll_interval_s = poll_interval_s
+        self.completion_window = completion_window
+        self.max_wait_s = max_wait_s
+
+    @staticmethod
+    def request_line(custom_id: str, model: str, messages: List[Dict[str, str]],
+                     temperature: float = 0.0) -> Dict[str, Any]:
+        """Linha do JSONL de entrada para /v1/chat/completions"""
+        return {
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": model,
+                "messages": messages,
+                "temperature": temperature,
+                "response_format": {"type": "json_object"},
+            },
+        }
+
+    def run(self, lines: List[Dict[str, Any]], workdir: str, tag: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Executa o lote completo.
+
+        Args:
+            lines: Linhas de requisição (request_line)
+            workdir: Diretório onde entrada e saídas do lote são gravadas
+            tag: Prefixo dos arquivos do lote
+
+        Returns:
+            Resultado por custom_id: {"content", "usage"} ou {"error"}
+        """
+        os.makedirs(workdir, exist_ok=True)
+        input_path = os.path.join(workdir, f"{tag}_input.jsonl")
+        with open(input_path, "w", encoding="utf-8") as f:
+            for line in lines:
+                f.write(json.dumps(line, ensure_ascii=False) + "\n")
+
+        file_id = self.upload(input_path)
+        batch = self._request("POST", "/batches", {
+            "input_file_id": file_id,
+            "endpoint": "/v1/chat/completions",
+            "completion_window": self.completion_window,
+            "metadata": {"tag": tag},
+        })
+        self.logger.info(f"Lote {batch['id']} criado com {len(lines)} requisições ({input_path})")
+
+        batch = self.wait(batch["id"])
+        if batch["status"] == "failed":
+            errors = (batch.get("errors") or {}).get("data") or []
+            raise RuntimeError(f"Lote {batch['id']} falhou: {'; '.join(e.get('message', '') for e in errors[:3])}")
+
+        results = {}
+        for key in ("output_file_id", "error_file_id"):
+            if not batch.get(key):
+                continue
+            content = self._request("GET", f"/files/{batch[key]}/content", raw=True)
+            with open(os.path.join(workdir, f"{tag}_{key.replace('_file_id', '')}.jsonl"), "wb") as f:
+                f.write(content)
+            for raw in content.decode("utf-8").splitlines():
+                if raw.strip():
+                    item = json.loads(raw)
+                    results[item["custom_id"]] = self._parse_result(item)
+        return results
+
+    def upload(self, path: str) -> str:
+        """Envia o JSONL de entrada (multipart, purpose=batch)"""
+        boundary = uuid.uuid4().hex
+        with open(path, "rb") as f:
+            payload = f.read()
+        body = (
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"purpose\"\r\n\r\nbatch\r\n"
+            f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{os.path.basename(path)}\"\r\n"
+            f"Content-Type: application/jsonl\r\n\r\n"
+        ).encode("utf-8") + payload + f"\r\n--{boundary}--\r\n".encode("utf-8")
+        response = self._request("POST", "/files", body, content_type=f"multipart/form-data; boundary={boundary}")
+        return response["id"]
+
+    def wait(self, batch_id: str) -> Dict[str, Any]:
+        """Consulta o lote até um estado final; cancela ao exceder max_wait_s"""
+        start = time.time()
+        cancelled = False
+        while True:
+            batch = self._request("GET", f"/batches/{batch_id}")
+            if batch["status"] in TERMINAL_STATUSES:
+                counts = batch.get("request_counts") or {}
+                self.logger.info(
+                    f"Lote {batch_id}: {batch['status']} ({counts.get('completed', 0)}/{counts.get('total', 0)} "
+                    f"concluídas, {counts.get('failed', 0)} com erro) em {time.time() - start:.0f}s"
+                )
+                return batch
+            if not cancelled and time.time() - start > self.max_wait_s:
+                self.logger.warning(f"Lote {batch_id} excedeu {self.max_wait_s:.0f}s; cancelando")
+                self._request("POST", f"/batches/{batch_id}/cancel", {})
+                cancelled = True
+            time.sleep(self.poll_interval_s)
+
+    @staticmethod
+    def _parse_result(item: Dict[str, Any]) -> Dict[str, Any]:
+        response = item.get("response") or {}
+        body = response.get("body") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            error = item.get("error") or body.get("error") or {}
+            return {"error": error.get("message") or f"HTTP {response.get('status_code')}"}
+        return {
+            "content": body["choices"][0]["message"]["content"] or "",
+            "usage": body.get("usage") or {},
+        }
+
+    def _request(self, method: str, path: str, body: Any = None, content_type: str = "application/json",
+                 raw: bool = False):
+        data = body if isinstance(body, bytes) or body is None else json.dumps(body).encode("utf-8")
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=data,
+            method=method,
+            headers={"Authorization": f"Bearer {self.api_key}", "Content-Type": content_type},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=300) as response:
+                content = response.read()
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"Batch API {method} {path}: HTTP {e.code} {e.read()[:300]!r}") from e
+        return content if raw else json.loads(content)
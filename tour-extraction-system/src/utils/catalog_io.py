@@ -0,0 +1,140 @@
+"""
+Serialização do catálogo: JSON indentado, compacto ou JSON Lines (um tour
+por linha), com compressão gzip/zstd opcional.
+"""
+import os
+import io
+import gc
+import gzip
+import json
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Union
+
+from ..core.catalog_model import CompactCatalog
+
+try:
+    import orjson
+except ImportError:  # opcional: sem orjson, usa o json da biblioteca padrão
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # opcional: necessário só para compression: zstd
+    zstandard = None
+
+
+FORMATS = ("pretty", "compact", "jsonl")
+COMPRESSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def dumps(obj: Any, pretty: bool = False) -> bytes:
+    """JSON em UTF-8 (orjson quando disponível; o json padrão para tipos que ele recusa)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+        except TypeError:
+            pass
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Any) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def catalog_path(base_path: str, fmt: str = "pretty", compression: str = "none") -> str:
+    """Caminho com a extensão do formato (.json/.jsonl) e da compressão (.gz/.zst)"""
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato JSON inválido: {fmt} (esperado: {', '.join(FORMATS)})")
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Compressão inválida: {compression} (esperado: {', '.join(COMPRESSIONS)})")
+    return base_path + (".jsonl" if fmt == "jsonl" else ".json") + COMPRESSIONS[compression]
+
+
+def _open(path: str, mode: str):
+    """Arquivo binário, comprimido conforme a extensão"""
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, compresslevel=6)
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise RuntimeError("Arquivos .zst requerem zstandard (pip install zstandard)")
+        if "r" in mode:
+            return io.BufferedReader(zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True))
+        return zstandard.ZstdCompressor(level=3).stream_writer(open(path, "wb"), closefd=True)
+    return open(path, mode)
+
+
+def write_catalog(catalog: Union[Dict[str, Any], CompactCatalog], base_path: str, fmt: str = "pretty",
+                  compression: str = "none") -> str:
+    """
+    Grava o catálogo (em dicts ou compacto).
+
+    No formato jsonl a primeira linha traz os metadados do catálogo (tudo
+    menos "tours") e cada linha seguinte um tour, gravado e lido um por vez;
+    do catálogo compacto, cada tour só vira dict na hora de ser gravado.
+
+    Args:
+        base_path: Caminho sem extensão (ex: output/results/tours_extracted)
+        fmt: "pretty" (indentado), "compact" ou "jsonl"
+        compression: "none", "gzip" ou "zstd"
+
+    Returns:
+        Caminho gravado
+    """
+    path = catalog_path(base_path, fmt, compression)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if isinstance(catalog, CompactCatalog):
+        header, tours = catalog.header(), catalog.iter_tour_dicts()
+    else:
+        header, tours = {k: v for k, v in catalog.items() if k != "tours"}, catalog.get("tours", [])
+    with _open(path, "wb") as f:
+        if fmt == "jsonl":
+            f.write(dumps(header) + b"\n")
+            for tour in tours:
+                f.write(dumps(tour) + b"\n")
+        elif isinstance(catalog, CompactCatalog):
+            with _gc_paused():
+                f.write(dumps(catalog.to_dict(), pretty=fmt == "pretty"))
+        else:
+            f.write(dumps(catalog, pretty=fmt == "pretty"))
+    return path
+
+
+def iter_tours(path: str) -> Iterator[Dict[str, Any]]:
+    """Tours de um arquivo jsonl (comprimido ou não), um por vez"""
+    with _open(path, "rb") as f:
+        f.readline()  # metadados do catálogo
+        for line in f:
+            if line.strip():
+                yield loads(line)
+
+
+@contextmanager
+def _gc_paused():
+    """
+    Pausa o coletor cíclico durante o parse: um catálogo grande cria milhões
+    de dicts e listas sem ciclos, e as coletas disparadas por essas alocações
+    dominavam o tempo de leitura.
+    """
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def read_catalog(path: str) -> Any:
+    """
+    Lê um catálogo gravado em qualquer formato de write_catalog (detectado
+    pela extensão) ou um tours_extracted.json antigo.
+    """
+    with _open(path, "rb") as f, _gc_paused():
+        if ".jsonl" not in os.path.basename(path):
+            return loads(f.read())
+        header = loads(f.readline() or b"{}")
+        return {**header, "tours": [loads(line) for line in f if line.strip()]}
@@ -0,0 +1,197 @@
+"""
+Pool de endpoints (chaves de API / base URLs) com orçamento próprio de RPM/TPM
+e circuit breaker por endpoint.
+"""
+import os
+import time
+import threading
+from typing import Any, Dict, List, Optional, Set
+
+
+# Tokens de saída reservados por requisição até o uso real ser conhecido
+OUTPUT_TOKENS_RESERVE = 1000
+
+
+class Endpoint:
+    """Endpoint compatível com OpenAI e seu estado de uso"""
+
+    def __init__(self, name: str, base_url: Optional[str], api_key: str, rpm: int, tpm: int):
+        self.name = name
+        self.base_url = base_url
+        self.api_key = api_key
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests: List[float] = []          # timestamps na janela de 60s
+        self.tokens: List[List[float]] = []      # [timestamp, tokens] na janela de 60s
+        self.failures = 0
+        self.open_until = 0.0
+        self.stats = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.stats = {"requests": 0, "errors": 0, "tokens": 0, "breaker_trips": 0, "latency_s": 0.0}
+
+    def _prune(self, now: float):
+        self.requests = [t for t in self.requests if now - t < 60.0]
+        self.tokens = [entry for entry in self.tokens if now - entry[0] < 60.0]
+
+    def headroom(self, now: float, estimate: int) -> Optional[float]:
+        """Fração livre do orçamento (None se indisponível agora)"""
+        if now < self.open_until:
+            return None
+        self._prune(now)
+        free = 1.0
+        if self.rpm:
+            if len(self.requests) >= self.rpm:
+                return None
+            free = min(free, 1.0 - len(self.requests) / self.rpm)
+        if self.tpm:
+            used = sum(entry[1] for entry in self.tokens)
+            # Requisição maior que o orçamento inteiro passa com a janela vazia
+            if used and used + estimate > self.tpm:
+                return None
+            free = min(free, 1.0 - used / self.tpm)
+        return free
+
+    def next_free_at(self, now: float) -> float:
+        """Instante estimado em que o endpoint volta a ter orçamento"""
+        candidates = [self.open_until] if now < self.open_until else []
+        if self.rpm and len(self.requests) >= self.rpm:
+            candidates.append(self.requests[0] + 60.0)
+        if self.tpm and self.tokens:
+            candidates.append(self.tokens[0][0] + 60.0)
+        return min(candidates) if candidates else now
+
+
+class Lease:
+    """Reserva de uma requisição em um endpoint (entrada própria na janela de tokens)"""
+
+    def __init__(self, endpoint: Endpoint, entry: List[float]):
+        self.endpoint = endpoint
+        self.entry = entry
+
+
+class EndpointPool:
+    """
+    Distribui as requisições para o endpoint com mais folga no orçamento.
+
+    Endpoints que falham failure_threshold vezes seguidas saem de rotação por
+    cooldown_s segundos (circuit breaker); após o cooldown recebem uma nova
+    tentativa e voltam à rotação no primeiro sucesso.
+    """
+
+    def __init__(self, endpoints: List[Endpoint], logger, failure_threshold: int = 3, cooldown_s: float = 30.0):
+        if not endpoints:
+            raise ValueError("Nenhum endpoint de LLM disponível")
+        self.endpoints = endpoints
+        self.logger = logger
+        self.failure_threshold = failure_threshold
+        self.cooldown_s = cooldown_s
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+    @classmethod
+    def from_config(cls, config, logger, allow_missing_key: bool = False) -> "EndpointPool":
+        """
+        Monta o pool a partir de config.endpoints; sem endpoints configurados,
+        usa um único endpoint com OPENAI_API_KEY e rate_limit_per_minute.
+
+        Args:
+            allow_missing_key: Aceita endpoints sem chave (ex: servidor local nas camadas)
+        """
+        specs = config.endpoints or [{"name": "default", "api_key_env": "OPENAI_API_KEY", "rpm": config.rate_limit}]
+        endpoints = []
+        for i, spec in enumerate(specs):
+            name = spec.get("name") or f"endpoint{i + 1}"
+            base_url = spec.get("base_url")
+            api_key = os.environ.get(spec.get("api_key_env", "OPENAI_API_KEY"), "").strip()
+            if not api_key and not base_url and not allow_missing_key:
+                logger.warning(f"Endpoint {name} ignorado: variável {spec.get('api_key_env', 'OPENAI_API_KEY')} vazia")
+                continue
+            endpoints.append(Endpoint(name, base_url, api_key or "sk-local",
+                                      int(spec.get("rpm", 0)), int(spec.get("tpm", 0))))
+        if not endpoints:
+            raise ValueError("OPENAI_API_KEY não configurada no arquivo .env" if not config.endpoints
+                             else "Nenhum endpoint de LLM com chave de API configurada")
+        return cls(endpoints, logger, config.endpoint_failure_threshold, config.endpoint_cooldown_s)
+
+    def reset(self):
+        """Zera estatísticas (nova execução)"""
+        with self.lock:
+            self.started_at = time.time()
+            for endpoint in self.endpoints:
+                endpoint.reset_stats()
+
+    def acquire(self, estimated_tokens: int, exclude: Optional[Set[str]] = None) -> Optional[Lease]:
+        """
+        Reserva uma requisição no endpoint com mais folga, aguardando se todos
+        estiverem sem orçamento.
+
+        Args:
+            estimated_tokens: Tokens estimados de entrada da requisição
+            exclude: Endpoints já tentados para esta requisição
+
+        Returns:
+            Reserva no endpoint escolhido ou None se todos foram excluídos
+        """
+        exclude = exclude or set()
+        estimate = estimated_tokens + OUTPUT_TOKENS_RESERVE
+        while True:
+            with self.lock:
+                now = time.time()
+                candidates = [e for e in self.endpoints if e.name not in exclude]
+                if not candidates:
+                    return None
+                scored = [(e.headroom(now, estimate), e) for e in candidates]
+                available = [(free, e) for free, e in scored if free is not None]
+                if available:
+                    endpoint = max(available, key=lambda item: item[0])[1]
+                    entry = [now, estimate]
+                    endpoint.requests.append(now)
+                    endpoint.tokens.append(entry)
+                    return Lease(endpoint, entry)
+                wait = min(e.next_free_at(now) for e in candidates) - now
+            time.sleep(min(max(wait, 0.05), 1.0))
+
+    def release(self, lease: Lease, usage: Dict[str, int], latency: float, ok: bool = True):
+        """Registra o resultado da requisição e atualiza o circuit breaker"""
+        endpoint = lease.endpoint
+        used = usage.get("prompt_tokens", 0) + usage.get("completion_tokens", 0)
+        with self.lock:
+            # Substitui a estimativa reservada pelo uso real
+            if used:
+                lease.entry[1] = used
+            endpoint.stats["requests"] += 1
+            endpoint.stats["tokens"] += used
+            endpoint.stats["latency_s"] += latency
+            if ok:
+                endpoint.failures = 0
+                return
+            endpoint.stats["errors"] += 1
+            endpoint.failures += 1
+            if endpoint.failures >= self.failure_threshold:
+                endpoint.open_until = time.time() + self.cooldown_s
+                endpoint.failures = self.failure_threshold - 1   # meia-abertura: uma nova falha reabre
+                endpoint.stats["breaker_trips"] += 1
+                self.logger.warning(
+                    f"Endpoint {endpoint.name} fora de rotação por {self.cooldown_s:.0f}s "
+                    f"após {self.failure_threshold} falhas seguidas"
+                )
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """Registra no log a vazão de cada endpoint na execução"""
+        minutes = max((time.time() - self.started_at) / 60.0, 1e-9)
+        report = {}
+        for endpoint in self.endpoints:
+            stats = dict(endpoint.stats)
+            stats["requests_per_min"] = stats["requests"] / minutes
+            stats["tokens_per_min"] = stats["tokens"] / minutes
+            report[endpoint.name] = stats
+            if not stats["requests"]:
+                continue
+            self.logger.info(
+                f"Endpoint {endpoint.name}: {stats['requests']} requisições ({stats['requests_per_min']:.1f}/min, "
+                f"limite {endpoint.rpm or '∞'}), {stats['tokens']} tokens ({stats['tokens_per_min']:.0f}/min, "
+                f"limite {endpoint.tpm or '∞'}), {stats['errors']} erros, {stats['breaker_trips']} aberturas do circuito"
+            )
+        return report
@@ -0,0 +1,506 @@
+"""
+Servidor local compatível com a API OpenAI (chat completions) para testes offline.
+
+Modos:
+    replay  Responde com a resposta gravada para o hash do prompt; prompts
+            sem gravação recebem uma resposta sintética
+    synth   Sempre sintetiza a resposta (tours de uma extração de referência)
+    record  Repassa ao provedor real (--upstream) e grava as respostas
+
+Também implementa a Batch API (/files, /batches): cada linha do lote é
+respondida como no modo replay/synth, com a conclusão após --batch-delay.
+
+Uso (na raiz do projeto):
+    python -m src.utils.fake_llm_server --mode synth \
+        --reference output/results/tours_extracted.json \
+        --latency-median 1.5 --latency-sigma 0.5 --rate-429 0.05 --rpm 60
+
+Depois aponte o extrator para o servidor em config/settings.yaml
+(extraction.llm_base_url: "http://127.0.0.1:8000/v1").
+"""
+import os
+import re
+import json
+import math
+import time
+import random
+import hashlib
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from collections import Counter, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Marcadores de página dos prompts (ver src/core/prompts.py)
+PAGE_PATTERN = re.compile(r"^(?:=== )?PÁGINA: (\S+?)(?: ===)?\s*$", re.MULTILINE)
+METADATA_MARKER = "METADADOS GERAIS"
+
+
+def prompt_hash(messages: List[Dict[str, Any]]) -> str:
+    """Hash estável das mensagens (papel + conteúdo), independente do modelo"""
+    payload = json.dumps(
+        [[m.get("role"), m.get("content")] for m in messages],
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Aproximação de tokens (4 caracteres por token)"""
+    return max(1, len(text) // 4)
+
+
+class FakeLLMBackend:
+    """
+    Lógica do servidor falso: gravações, síntese de respostas, latência e
+    injeção de falhas. Separada do handler HTTP para ser usada em benchmarks.
+    """
+
+    def __init__(self, mode: str = "synth", recordings_dir: str = "output/llm_recordings",
+                 reference: Optional[str] = None, upstream: Optional[str] = None,
+                 latency_median: float = 0.0, latency_sigma: float = 0.0, output_tps: float = 0.0,
+                 error_rate: float = 0.0, rate_429: float = 0.0, rpm: int = 0,
+                 completion_tokens: int = 0, batch_delay: float = 0.0, seed: Optional[int] = None):
+        self.mode = mode
+        self.recordings_dir = recordings_dir
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.output_tps = output_tps
+        self.error_rate = error_rate
+        self.rate_429 = rate_429
+        self.rpm = rpm
+        self.completion_tokens = completion_tokens
+        self.batch_delay = batch_delay
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.timestamps: List[float] = []
+        self.stats = Counter()
+        self.latencies: List[float] = []
+
+        self.tours_by_chunk = defaultdict(list)
+        self.metadata = {"agency": None, "product": None}
+        if reference:
+            self._load_reference(reference)
+        if mode == "record":
+            if not self.upstream:
+                raise ValueError("Modo record exige --upstream")
+            os.makedirs(recordings_dir, exist_ok=True)
+
+    def _load_reference(self, path: str):
+        """Tours de uma extração anterior, indexados pelo chunk de origem"""
+        with open(path, "r", encoding="utf-8") as f:
+            catalog = json.load(f)
+        self.metadata = {"agency": catalog.get("agency"), "product": catalog.get("product")}
+        for tour in catalog.get("tours", []):
+            clean = {k: v for k, v in tour.items() if k not in ("id", "source_chunks")}
+            for chunk in tour.get("source_chunks") or []:
+                self.tours_by_chunk[os.path.basename(chunk)].append(clean)
+
+    # ------------------------------------------------------------------
+    # Requisições
+    # ------------------------------------------------------------------
+
+    def handle(self, body: Dict[str, Any], headers: Dict[str, str]) -> Tuple[int, Dict[str, Any], Dict[str, str]]:
+        """
+        Processa uma requisição de chat completion.
+
+        Returns:
+            Tupla (status HTTP, corpo JSON, cabeçalhos extras)
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+            rejection = self._inject_failure()
+        if rejection:
+            return rejection
+
+        start = time.perf_counter()
+        if self.mode == "record":
+            status, response = self._forward(body, headers)
+            if status == 200:
+                self._save_recording(prompt_hash(body.get("messages") or []), body, response)
+            with self.lock:
+                self.stats["recorded" if status == 200 else "upstream_errors"] += 1
+            return status, response, {}
+
+        response = self._respond(body)
+
+        # Latência simulada: base log-normal + tempo de geração dos tokens de saída
+        delay = self._sample_latency(response["usage"]["completion_tokens"])
+        time.sleep(max(0.0, delay - (time.perf_counter() - start)))
+        with self.lock:
+            self.stats["ok"] += 1
+            self.latencies.append(delay)
+        return 200, response, {}
+
+    def handle_stream(self, body: Dict[str, Any], headers: Dict[str, str]):
+        """
+        Como handle, mas com a resposta dividida em eventos SSE distribuídos ao
+        longo da latência simulada (primeiro token após uma fração da latência).
+
+        Returns:
+            Tupla (status HTTP, corpo JSON de erro ou None, cabeçalhos extras, iterador de eventos ou None)
+        """
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["streamed"] += 1
+            rejection = self._inject_failure()
+        if rejection:
+            return rejection + (None,)
+
+        if self.mode == "record":
+            status, response = self._forward(body, headers)
+            if status != 200:
+                return status, response, {}, None
+            self._save_recording(prompt_hash(body.get("messages") or []), body, response)
+        else:
+            response = self._respond(body)
+        delay = self._sample_latency(response["usage"]["completion_tokens"])
+        include_usage = bool((body.get("stream_options") or {}).get("include_usage"))
+        return 200, None, {}, self._stream_events(response, delay, include_usage)
+
+    def _stream_events(self, response: Dict[str, Any], delay: float, include_usage: bool):
+        content = response["choices"][0]["message"]["content"] or ""
+        pieces = [content[i:i + 16] for i in range(0, len(content), 16)] or [""]
+        pause = delay / (len(pieces) + 1)
+        base = {"id": response["id"], "object": "chat.completion.chunk",
+                "created": response["created"], "model": response["model"]}
+
+        time.sleep(pause)
+        for piece in pieces:
+            yield {**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            time.sleep(pause)
+        yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        if include_usage:
+            yield {**base, "choices": [], "usage": response["usage"]}
+        with self.lock:
+            self.stats["ok"] += 1
+            self.latencies.append(delay)
+
+    def _respond(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Resposta gravada (modo replay) ou sintética"""
+        messages = body.get("messages") or []
+        response = self._load_recording(prompt_hash(messages)) if self.mode == "replay" else None
+        with self.lock:
+            if self.mode == "replay":
+                self.stats["replay_hits" if response else "replay_misses"] += 1
+        return response or self._synthesize(body, messages)
+
+    # ------------------------------------------------------------------
+    # Batch API
+    # ------------------------------------------------------------------
+
+    def create_file(self, content: bytes) -> Dict[str, Any]:
+        file_id = f"file-{hashlib.sha256(content).hexdigest()[:16]}-{len(self.files)}"
+        with self.lock:
+            self.files[file_id] = content
+        return {"id": file_id, "object": "file", "bytes": len(content), "purpose": "batch",
+                "created_at": int(time.time())}
+
+    def create_batch(self, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        if body.get("input_file_id") not in self.files:
+            return 400, _error("input_file_id desconhecido", "invalid_request_error")
+        batch_id = f"batch_{len(self.batches) + 1:06d}"
+        batch = {
+            "id": batch_id, "object": "batch", "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window"),
+            "status": "validating", "output_file_id": None, "error_file_id": None,
+            "created_at": int(time.time()), "metadata": body.get("metadata"),
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        }
+        with self.lock:
+            self.batches[batch_id] = batch
+            self.stats["batches"] += 1
+        threading.Thread(target=self._process_batch, args=(batch_id,), daemon=True).start()
+        return 200, batch
+
+    def cancel_batch(self, batch_id: str) -> Tuple[int, Dict[str, Any]]:
+        with self.lock:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                return 404, _error(f"Lote {batch_id} não encontrado", "not_found")
+            if batch["status"] not in ("completed", "failed", "expired", "cancelled"):
+                batch["status"] = "cancelling"
+            return 200, dict(batch)
+
+    def _process_batch(self, batch_id: str):
+        """Responde cada linha do lote e publica os arquivos de saída e erros"""
+        batch = self.batches[batch_id]
+        lines = [json.loads(raw) for raw in self.files[batch["input_file_id"]].decode("utf-8").splitlines() if raw.strip()]
+        batch["request_counts"]["total"] = len(lines)
+        batch["status"] = "in_progress"
+        deadline = time.time() + self.batch_delay
+
+        outputs, errors = [], []
+        for line in lines:
+            if batch["status"] == "cancelling":
+                break
+            with self.lock:
+                failed = self.random.random() < self.error_rate
+            if failed:
+                errors.append({"id": f"req_{len(errors)}", "custom_id": line["custom_id"], "response": {
+                    "status_code": 500, "body": _error("The server had an error (injetado)", "server_error")
+                }, "error": None})
+                batch["request_counts"]["failed"] += 1
+                continue
+            response = self._respond(line.get("body") or {})
+            outputs.append({"id": f"req_{len(outputs)}", "custom_id": line["custom_id"],
+                            "response": {"status_code": 200, "body": response}, "error": None})
+            batch["request_counts"]["completed"] += 1
+
+        while batch["status"] != "cancelling" and time.time() < deadline:
+            time.sleep(0.05)
+
+        for key, items in (("output_file_id", outputs), ("error_file_id", errors)):
+            if items:
+                content = "".join(json.dumps(i, ensure_ascii=False) + "\n" for i in items).encode("utf-8")
+                batch[key] = self.create_file(content)["id"]
+        batch["status"] = "cancelled" if batch["status"] == "cancelling" else "completed"
+
+    def _inject_failure(self) -> Optional[Tuple[int, Dict[str, Any], Dict[str, str]]]:
+        """Limite de RPM do servidor e falhas aleatórias (chamado sob lock)"""
+        now = time.time()
+        if self.rpm:
+            self.timestamps = [t for t in self.timestamps if now - t < 60.0]
+            if len(self.timestamps) >= self.rpm:
+                retry_after = max(0.0, 60.0 - (now - self.timestamps[0]))
+                self.stats["rate_limited"] += 1
+                return 429, _error("Rate limit reached for requests", "rate_limit_exceeded"), \
+                    {"Retry-After": f"{math.ceil(retry_after)}"}
+            self.timestamps.append(now)
+
+        roll = self.random.random()
+        if roll < self.rate_429:
+            self.stats["injected_429"] += 1
+            return 429, _error("Rate limit reached (injetado)", "rate_limit_exceeded"), {"Retry-After": "1"}
+        if roll < self.rate_429 + self.error_rate:
+            self.stats["injected_errors"] += 1
+            return 500, _error("The server had an error (injetado)", "server_error"), {}
+        return None
+
+    def _sample_latency(self, completion_tokens: int) -> float:
+        latency = 0.0
+        if self.latency_median > 0:
+            with self.lock:
+                latency = self.random.lognormvariate(math.log(self.latency_median), self.latency_sigma)
+        if self.output_tps > 0:
+            latency += completion_tokens / self.output_tps
+        return latency
+
+    # ------------------------------------------------------------------
+    # Respostas
+    # ------------------------------------------------------------------
+
+    def _synthesize(self, body: Dict[str, Any], messages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Resposta no formato do extrator, com tours da referência para as páginas do prompt"""
+        prompt = "\n".join(str(m.get("content") or "") for m in messages)
+        user_prompt = "\n".join(str(m.get("content") or "") for m in messages if m.get("role") == "user")
+
+        pages = PAGE_PATTERN.findall(user_prompt)
+        if METADATA_MARKER in user_prompt:
+            content = self.metadata
+        elif len(pages) > 1:
+            content = {"chunks": [{"chunk": p, "tours": self.tours_by_chunk.get(p, [])} for p in pages]}
+        else:
+            content = {"tours": self.tours_by_chunk.get(pages[0], []) if pages else []}
+
+        text = json.dumps(content, ensure_ascii=False, separators=(",", ":"))
+        usage = {
+            "prompt_tokens": estimate_tokens(prompt),
+            "completion_tokens": self.completion_tokens or estimate_tokens(text),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        return {
+            "id": f"chatcmpl-fake-{prompt_hash(messages)[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }
+
+    def _recording_path(self, key: str) -> str:
+        return os.path.join(self.recordings_dir, f"{key}.json")
+
+    def _load_recording(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._recording_path(key)
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)["response"]
+
+    def _save_recording(self, key: str, body: Dict[str, Any], response: Dict[str, Any]):
+        with open(self._recording_path(key), "w", encoding="utf-8") as f:
+            json.dump({"model": body.get("model"), "messages": body.get("messages"), "response": response},
+                      f, ensure_ascii=False, indent=2)
+
+    def _forward(self, body: Dict[str, Any], headers: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        """Repassa a requisição ao provedor real"""
+        request = urllib.request.Request(
+            f"{self.upstream}/chat/completions",
+            data=json.dumps({**body, "stream": False}).encode("utf-8"),
+            headers={"Content-Type": "application/json", "Authorization": headers.get("Authorization", "")},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=300) as resp:
+                return resp.status, json.loads(resp.read())
+        except urllib.error.HTTPError as e:
+            return e.code, json.loads(e.read() or b"{}")
+
+    def summary(self) -> Dict[str, Any]:
+        """Contadores e percentis de latência simulada"""
+        with self.lock:
+            latencies = sorted(self.latencies)
+            summary = dict(self.stats)
+        if latencies:
+            summary["latency_p50_s"] = latencies[len(latencies) // 2]
+            summary["latency_p95_s"] = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        return summary
+
+
+def _error(message: str, code: str) -> Dict[str, Any]:
+    return {"error": {"message": message, "type": code, "param": None, "code": code}}
+
+
+def make_handler(backend: FakeLLMBackend):
+    """Handler HTTP ligado a um backend"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            path = self.path.rstrip("/")
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length)
+            if path.endswith("/files"):
+                return self._send(200, backend.create_file(self._multipart_file(raw)))
+            batch_cancel = re.search(r"/batches/([^/]+)/cancel$", path)
+            if batch_cancel:
+                return self._send(*backend.cancel_batch(batch_cancel.group(1)))
+            if not path.endswith(("/chat/completions", "/batches")):
+                return self._send(404, _error(f"Rota não suportada: {self.path}", "not_found"))
+            try:
+                body = json.loads(raw or b"{}")
+            except json.JSONDecodeError:
+                return self._send(400, _error("JSON inválido", "invalid_request_error"))
+            if path.endswith("/batches"):
+                return self._send(*backend.create_batch(body))
+            if body.get("stream"):
+                status, error, extra, events = backend.handle_stream(body, dict(self.headers))
+                if events is None:
+                    return self._send(status, error, extra)
+                return self._send_events(events)
+            status, response, extra = backend.handle(body, dict(self.headers))
+            self._send(status, response, extra)
+
+        def _multipart_file(self, raw: bytes) -> bytes:
+            """Conteúdo do campo "file" de um upload multipart"""
+            header = f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode("utf-8")
+            message = BytesParser(policy=email_policy).parsebytes(header + raw)
+            for part in message.iter_parts():
+                if part.get_param("name", header="content-disposition") == "file":
+                    return part.get_payload(decode=True)
+            return b""
+
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            file_content = re.search(r"/files/([^/]+)/content$", path)
+            if file_content:
+                content = backend.files.get(file_content.group(1))
+                if content is None:
+                    return self._send(404, _error("Arquivo não encontrado", "not_found"))
+                return self._send_raw(200, content, "application/jsonl")
+            batch = re.search(r"/batches/([^/]+)$", path)
+            if batch:
+                found = backend.batches.get(batch.group(1))
+                if found is None:
+                    return self._send(404, _error("Lote não encontrado", "not_found"))
+                return self._send(200, found)
+            if self.path.rstrip("/").endswith("/stats"):
+                return self._send(200, backend.summary())
+            if self.path.rstrip("/").endswith("/models"):
+                return self._send(200, {"object": "list", "data": [{"id": "fake", "object": "model"}]})
+            self._send(404, _error(f"Rota não suportada: {self.path}", "not_found"))
+
+        def _send(self, status, payload, extra=None):
+            self._send_raw(status, json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json", extra)
+
+        def _send_events(self, events):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            for event in events:
+                self.wfile.write(f"data: {json.dumps(event, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+        def _send_raw(self, status, data, content_type, extra=None):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (extra or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def start_server(backend: FakeLLMBackend, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Inicia o servidor em uma thread daemon (porta 0 = porta livre)"""
+    server = ThreadingHTTPServer((host, port), make_handler(backend))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor LLM falso compatível com a API OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--mode", choices=["replay", "synth", "record"], default="replay")
+    parser.add_argument("--recordings", default="output/llm_recordings", help="Diretório de respostas gravadas")
+    parser.add_argument("--reference", default=None, help="JSON de referência para respostas sintéticas")
+    parser.add_argument("--upstream", default=None, help="Base URL do provedor real (modo record)")
+    parser.add_argument("--latency-median", type=float, default=0.0, help="Mediana da latência log-normal (s)")
+    parser.add_argument("--latency-sigma", type=float, default=0.0, help="Desvio da latência log-normal")
+    parser.add_argument("--output-tps", type=float, default=0.0, help="Tokens de saída por segundo (0 = ignorar)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 500")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fração de respostas 429 injetadas")
+    parser.add_argument("--rpm", type=int, default=0, help="Limite de requisições por minuto (0 = sem limite)")
+    parser.add_argument("--completion-tokens", type=int, default=0, help="Tokens de saída fixos (0 = estimar)")
+    parser.add_argument("--batch-delay", type=float, default=0.0, help="Tempo até a conclusão de cada lote (s)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    backend = FakeLLMBackend(
+        mode=args.mode, recordings_dir=args.recordings, reference=args.reference, upstream=args.upstream,
+        latency_median=args.latency_median, latency_sigma=args.latency_sigma, output_tps=args.output_tps,
+        error_rate=args.error_rate, rate_429=args.rate_429, rpm=args.rpm,
+        completion_tokens=args.completion_tokens, batch_delay=args.batch_delay, seed=args.seed,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(backend))
+    print(f"Servidor LLM falso ({args.mode}) em http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(backend.summary(), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+Parser JSON incremental: emite cada tour completo assim que sua chave de
+fechamento chega no fluxo de tokens. Também usado para recuperar tours de
+respostas truncadas ou malformadas.
+"""
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+class _Frame:
+    """Objeto ou lista aberto no fluxo"""
+
+    __slots__ = ("kind", "key", "start", "expect_key", "current_key", "chunk")
+
+    def __init__(self, kind: str, key: Optional[str], start: int):
+        self.kind = kind                # "{" ou "["
+        self.key = key                  # chave da qual este container é valor
+        self.start = start              # posição de abertura no buffer
+        self.expect_key = kind == "{"   # próximo texto entre aspas é uma chave
+        self.current_key = None         # última chave lida (objetos)
+        self.chunk = None               # valor de "chunk" (respostas agrupadas)
+
+
+class TourStreamParser:
+    """
+    Acompanha o JSON da resposta caractere a caractere (strings, escapes e
+    profundidade) e, ao fechar um objeto que é elemento de uma lista "tours",
+    decodifica apenas esse objeto e chama on_tour(tour, chunk).
+
+    chunk é o valor de "chunk" do objeto que contém a lista (respostas com
+    várias páginas) ou None.
+    """
+
+    def __init__(self, on_tour: Optional[Callable[[Dict[str, Any], Optional[str]], None]] = None,
+                 list_key: str = "tours"):
+        self.on_tour = on_tour
+        self.list_key = list_key
+        self.buffer = ""
+        self.pos = 0
+        self.stack: List[_Frame] = []
+        self.in_string = False
+        self.escape = False
+        self.string_start = 0
+        self.started = False
+        self.tours: List[Dict[str, Any]] = []
+        self.damaged = 0
+        self.last_chunk: Optional[str] = None   # último "chunk" visto (respostas agrupadas)
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        """
+        Consome um fragmento da resposta.
+
+        Returns:
+            Tours completados por este fragmento
+        """
+        self.buffer += text
+        emitted = []
+        while self.pos < len(self.buffer):
+            char = self.buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    self._string_closed(self.buffer[self.string_start + 1:self.pos])
+            elif not self.started:
+                # Ignora texto antes do JSON (ex: ```json)
+                if char == "{":
+                    self.started = True
+                    self.stack.append(_Frame("{", None, self.pos))
+            elif char == '"':
+                self.in_string = True
+                self.string_start = self.pos
+            elif char in "{[":
+                parent = self.stack[-1] if self.stack else None
+                key = None
+                if parent is not None:
+                    key = parent.current_key if parent.kind == "{" else parent.key
+                self.stack.append(_Frame(char, key, self.pos))
+            elif char in "}]":
+                if self.stack:
+                    frame = self.stack.pop()
+                    if char == "}" and self._is_tour(frame):
+                        tour = self._decode(self.buffer[frame.start:self.pos + 1])
+                        if tour is not None:
+                            owner = self.stack[-2] if len(self.stack) >= 2 else None
+                            chunk = owner.chunk if owner is not None else None
+                            emitted.append(tour)
+                            self.tours.append(tour)
+                            if self.on_tour is not None:
+                                self.on_tour(tour, chunk)
+            elif char == "," and self.stack and self.stack[-1].kind == "{":
+                self.stack[-1].expect_key = True
+            elif char == ":" and self.stack and self.stack[-1].kind == "{":
+                self.stack[-1].expect_key = False
+            self.pos += 1
+        return emitted
+
+    def _string_closed(self, raw: str):
+        frame = self.stack[-1] if self.stack else None
+        if frame is None or frame.kind != "{":
+            return
+        try:
+            value = json.loads(f'"{raw}"')
+        except json.JSONDecodeError:
+            value = raw
+        if frame.expect_key:
+            frame.current_key = value
+        elif frame.current_key == "chunk":
+            frame.chunk = value
+            self.last_chunk = value
+
+    def _is_tour(self, frame: _Frame) -> bool:
+        parent = self.stack[-1] if self.stack else None
+        return parent is not None and parent.kind == "[" and parent.key == self.list_key
+
+    def _decode(self, text: str) -> Optional[Dict[str, Any]]:
+        try:
+            value = json.loads(text)
+        except json.JSONDecodeError:
+            self.damaged += 1
+            return None
+        return value if isinstance(value, dict) else None
+
+    @property
+    def complete(self) -> bool:
+        """True quando o objeto raiz foi fechado"""
+        return self.started and not self.stack
+
+
+def clean_json_text(text: str) -> str:
+    """
+    Remove comentários (// e /* */) e vírgulas finais fora de strings,
+    erros comuns quando o modelo copia o exemplo do prompt.
+    """
+    out = []
+    i, n = 0, len(text)
+    in_string = escape = False
+    while i < n:
+        char = text[i]
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+            i += 1
+            continue
+        if char == '"':
+            in_string = True
+        elif text.startswith("//", i):
+            end = text.find("\n", i)
+            i = n if end == -1 else end
+            continue
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            i = n if end == -1 else end + 2
+            continue
+        elif char in "}]":
+            # Vírgula final antes do fechamento: {"a": 1,} / [1, 2,]
+            j = len(out) - 1
+            while j >= 0 and out[j].isspace():
+                j -= 1
+            if j >= 0 and out[j] == ",":
+                del out[j]
+        out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def recover_json(text: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Interpreta uma resposta que falhou no json.loads.
+
+    Tenta primeiro o texto limpo (comentários e vírgulas finais); se ainda
+    falhar, salva cada tour completo individualmente, descartando apenas os
+    objetos danificados e a cauda truncada.
+
+    Returns:
+        Tupla (dict no formato {"tours"} ou {"chunks"} ou None, informações da
+        recuperação: truncated, salvaged, damaged, last_chunk)
+    """
+    cleaned = clean_json_text(text)
+    info = {"truncated": False, "salvaged": 0, "damaged": 0, "last_chunk": None}
+    first, last = cleaned.find("{"), cleaned.rfind("}")
+    if first == -1:
+        return None, info
+    if last > first:
+        try:
+            data = json.loads(cleaned[first:last + 1])
+            if isinstance(data, dict):
+                return data, info
+        except json.JSONDecodeError:
+            pass
+
+    groups: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    parser = TourStreamParser(lambda tour, chunk: groups.setdefault(chunk, []).append(tour))
+    parser.feed(cleaned)
+    info.update(
+        truncated=not parser.complete,
+        salvaged=len(parser.tours),
+        damaged=parser.damaged,
+        last_chunk=parser.last_chunk,
+    )
+    if not parser.tours and not parser.complete and parser.last_chunk is None:
+        return None, info
+    if any(chunk is not None for chunk in groups):
+        data = {"chunks": [{"chunk": chunk, "tours": tours} for chunk, tours in groups.items()]}
+    else:
+        data = {"tours": groups.get(None, [])}
+    return data, info
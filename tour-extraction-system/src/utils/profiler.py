@@ -0,0 +1,169 @@
+"""
+Perfil das etapas do pipeline: tempo de parede, CPU, pico de memória e objetos.
+"""
+import os
+import gc
+import sys
+import json
+import time
+import pstats
+import cProfile
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+try:
+    import psutil
+except ImportError:  # opcional: sem psutil, usa /proc (Linux) ou resource (Unix)
+    psutil = None
+
+
+def current_rss() -> Optional[int]:
+    """Memória residente do processo em bytes (None se indisponível)"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    except ImportError:
+        return None
+
+
+class _Sampler(threading.Thread):
+    """
+    Amostra o RSS durante a etapa (pico) e, no modo de perfil, as pilhas de
+    todas as threads (o cProfile só enxerga a thread que o ativou).
+    """
+
+    def __init__(self, interval_s: float, stacks: bool):
+        super().__init__(daemon=True)
+        self.interval_s = interval_s
+        self.collect_stacks = stacks
+        self.stop_event = threading.Event()
+        self.peak_rss = current_rss() or 0
+        self.stacks: Counter = Counter()
+        self.samples = 0
+
+    def run(self):
+        own = threading.get_ident()
+        while not self.stop_event.wait(self.interval_s):
+            rss = current_rss()
+            if rss:
+                self.peak_rss = max(self.peak_rss, rss)
+            if not self.collect_stacks:
+                continue
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                names = []
+                while frame is not None:
+                    code = frame.f_code
+                    names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(names))] += 1
+
+    def stop(self):
+        self.stop_event.set()
+        self.join()
+
+
+class StageProfiler:
+    """
+    Mede cada etapa do pipeline (with profiler.stage("nome"): ...).
+
+    Sempre registra tempo de parede, tempo de CPU do processo (todas as
+    threads), pico de RSS e objetos rastreados pelo GC. Com profile_dir,
+    grava também por etapa o cProfile (.prof + resumo .txt), as pilhas
+    amostradas de todas as threads (.folded, formato de flame graph) e os
+    tipos de objeto que mais cresceram.
+    """
+
+    def __init__(self, logger, profile_dir: Optional[str] = None, sample_interval_s: float = 0.01):
+        self.logger = logger
+        self.profile_dir = profile_dir
+        self.sample_interval_s = sample_interval_s
+        self.stages: List[Dict[str, Any]] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        """Mede o bloco como uma etapa"""
+        profiling = self.profile_dir is not None
+        index = len(self.stages) + 1
+        objects_before = gc.get_objects()
+        types_before = Counter(type(o).__name__ for o in objects_before) if profiling else None
+        count_before = len(objects_before)
+        del objects_before
+
+        sampler = _Sampler(self.sample_interval_s if profiling else 0.05, stacks=profiling)
+        profile = cProfile.Profile() if profiling else None
+        rss_before = current_rss()
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        sampler.start()
+        if profile is not None:
+            profile.enable()
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+            sampler.stop()
+            wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+            rss_after = current_rss()
+            objects_after = gc.get_objects()
+            stats = {
+                "stage": name,
+                "wall_s": round(wall, 3),
+                "cpu_s": round(cpu, 3),
+                "cpu_utilization": round(cpu / wall, 3) if wall else 0.0,
+                "rss_before_mb": round(rss_before / 2**20, 1) if rss_before else None,
+                "rss_after_mb": round(rss_after / 2**20, 1) if rss_after else None,
+                "peak_rss_mb": round(max(sampler.peak_rss, rss_after or 0) / 2**20, 1) if rss_after else None,
+                "gc_objects": len(objects_after),
+                "gc_objects_delta": len(objects_after) - count_before,
+            }
+            if profiling:
+                growth = Counter(type(o).__name__ for o in objects_after)
+                growth.subtract(types_before)
+                stats["top_object_growth"] = {k: v for k, v in growth.most_common(15) if v > 0}
+                self._write_profile(f"{index:02d}_{name}", profile, sampler)
+            del objects_after
+            self.stages.append(stats)
+            self.logger.info(
+                f"Etapa {name}: {stats['wall_s']:.2f}s parede, {stats['cpu_s']:.2f}s CPU, "
+                f"pico RSS {stats['peak_rss_mb']} MB, {stats['gc_objects_delta']:+d} objetos"
+            )
+
+    def _write_profile(self, prefix: str, profile: cProfile.Profile, sampler: _Sampler):
+        """Grava o cProfile e as pilhas amostradas da etapa"""
+        os.makedirs(self.profile_dir, exist_ok=True)
+        base = os.path.join(self.profile_dir, prefix)
+        profile.dump_stats(base + ".prof")
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            pstats.Stats(profile, stream=f).sort_stats("cumulative").print_stats(40)
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+    def report(self) -> List[Dict[str, Any]]:
+        """Registra no log a participação de cada etapa e grava stages.json no modo de perfil"""
+        total = sum(s["wall_s"] for s in self.stages)
+        for stats in self.stages:
+            self.logger.info(
+                f"  {stats['stage']:<12} {stats['wall_s']:>9.2f}s ({stats['wall_s'] / total if total else 0:.0%}) "
+                f"CPU {stats['cpu_s']:.2f}s, pico RSS {stats['peak_rss_mb']} MB"
+            )
+        if self.profile_dir is not None:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, "stages.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.stages, f, ensure_ascii=False, indent=2)
+            self.logger.info(f"Perfil por etapa salvo em {self.profile_dir} (.prof, .txt, .folded, stages.json)")
+        return self.stages
@@ -0,0 +1,69 @@
+"""
+Chat completion em streaming (SSE) para endpoints compatíveis com OpenAI.
+"""
+import json
+import urllib.error
+import urllib.request
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .batch_client import DEFAULT_BASE_URL
+
+
+class StreamError(RuntimeError):
+    """Falha do endpoint durante o streaming (HTTP ou evento SSE inválido)"""
+
+
+def stream_chat_completion(base_url: Optional[str], api_key: str, model: str, messages: List[Dict[str, str]],
+                           temperature: float = 0.0, on_text: Optional[Callable[[str], None]] = None,
+                           timeout: float = 300.0) -> Tuple[str, Dict[str, int]]:
+    """
+    Envia a requisição com stream=True e repassa cada fragmento de texto a on_text.
+
+    Returns:
+        Tupla (texto completo da resposta, uso de tokens)
+    """
+    body = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "response_format": {"type": "json_object"},
+        "stream": True,
+        "stream_options": {"include_usage": True},
+    }
+    request = urllib.request.Request(
+        (base_url or DEFAULT_BASE_URL).rstrip("/") + "/chat/completions",
+        data=json.dumps(body).encode("utf-8"),
+        method="POST",
+        headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json",
+                 "Accept": "text/event-stream"},
+    )
+
+    parts, usage = [], {}
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            for raw in response:
+                line = raw.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                try:
+                    event = json.loads(payload)
+                except json.JSONDecodeError as e:
+                    raise StreamError(f"Evento SSE inválido: {payload[:200]!r}") from e
+                if event.get("usage"):
+                    usage = event["usage"]
+                for choice in event.get("choices") or []:
+                    text = (choice.get("delta") or {}).get("content")
+                    if text:
+                        parts.append(text)
+                        if on_text is not None:
+                            on_text(text)
+    except urllib.error.HTTPError as e:
+        raise StreamError(f"Streaming HTTP {e.code}: {e.read()[:300]!r}") from e
+
+    return "".join(parts), {
+        "prompt_tokens": usage.get("prompt_tokens", 0) or 0,
+        "completion_tokens": usage.get("completion_tokens", 0) or 0,
+    }
@@ -0,0 +1,158 @@
+"""
+Telemetria por chamada de LLM e resumo da execução (tokens, espera, latência e custo).
+"""
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+
+def add_cost(total: Optional[float], cost: Optional[float]) -> Optional[float]:
+    """Soma custos; None (modelo sem preço) torna o total desconhecido"""
+    return None if total is None or cost is None else total + cost
+
+
+def format_cost(cost: Optional[float]) -> str:
+    return "n/d (modelo sem preço)" if cost is None else f"${cost:.4f}"
+
+
+def _round_cost(cost: Optional[float]) -> Optional[float]:
+    return None if cost is None else round(cost, 6)
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentil por posição mais próxima (0 se a lista estiver vazia)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    if not values:
+        return {"p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0, "mean": 0.0}
+    return {
+        "p50": round(percentile(values, 50), 3),
+        "p95": round(percentile(values, 95), 3),
+        "p99": round(percentile(values, 99), 3),
+        "max": round(max(values), 3),
+        "mean": round(sum(values) / len(values), 3),
+    }
+
+
+class RunTelemetry:
+    """
+    Acumula um registro por chamada de LLM (thread-safe), identificado pelo
+    chunk de origem: tokens, espera na fila do rate limiter, latência de
+    rede, tentativas em outros endpoints, resultado do parse e custo.
+    """
+
+    def __init__(self, slowest: int = 10):
+        self.slowest = slowest
+        self.lock = threading.Lock()
+        self.calls: List[Dict[str, Any]] = []
+        self.started_at = time.time()
+
+    def reset(self):
+        """Nova execução"""
+        with self.lock:
+            self.calls = []
+            self.started_at = time.time()
+
+    def record(self, chunk: str, kind: str, tier: str, model: str, endpoint: str, usage: Dict[str, int],
+               queue_wait_s: float, latency_s: float, retries: int, outcome: str, cost_usd: Optional[float]):
+        """
+        Registra uma chamada.
+
+        Args:
+            outcome: "ok", "recovered" (JSON reparado), "truncated", "empty" ou "error"
+            cost_usd: Custo estimado (None se o modelo não tem preço configurado)
+        """
+        call = {
+            "chunk": chunk,
+            "kind": kind,
+            "tier": tier,
+            "model": model,
+            "endpoint": endpoint,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", 0),
+            "queue_wait_s": round(queue_wait_s, 3),
+            "latency_s": round(latency_s, 3),
+            "retries": retries,
+            "outcome": outcome,
+            "cost_usd": _round_cost(cost_usd),
+            "at_s": round(time.time() - self.started_at, 3),
+        }
+        with self.lock:
+            self.calls.append(call)
+
+    def summary(self, tours: int = 0) -> Dict[str, Any]:
+        """Totais, percentis, chunks mais lentos e custo por modelo"""
+        with self.lock:
+            calls = list(self.calls)
+
+        by_model, by_chunk, outcomes = {}, {}, {}
+        for call in calls:
+            model = by_model.setdefault(call["model"], {"calls": 0, "prompt_tokens": 0,
+                                                        "completion_tokens": 0, "cost_usd": 0.0})
+            model["calls"] += 1
+            model["prompt_tokens"] += call["prompt_tokens"]
+            model["completion_tokens"] += call["completion_tokens"]
+            model["cost_usd"] = add_cost(model["cost_usd"], call["cost_usd"])
+            chunk = by_chunk.setdefault(call["chunk"], {"calls": 0, "latency_s": 0.0, "queue_wait_s": 0.0,
+                                                        "tokens": 0, "cost_usd": 0.0, "tiers": []})
+            chunk["calls"] += 1
+            chunk["latency_s"] += call["latency_s"]
+            chunk["queue_wait_s"] += call["queue_wait_s"]
+            chunk["tokens"] += call["prompt_tokens"] + call["completion_tokens"]
+            chunk["cost_usd"] = add_cost(chunk["cost_usd"], call["cost_usd"])
+            if call["tier"] not in chunk["tiers"]:
+                chunk["tiers"].append(call["tier"])
+            outcomes[call["outcome"]] = outcomes.get(call["outcome"], 0) + 1
+
+        for stats in list(by_model.values()) + list(by_chunk.values()):
+            stats["cost_usd"] = _round_cost(stats["cost_usd"])
+            if "latency_s" in stats:
+                stats["latency_s"] = round(stats["latency_s"], 3)
+                stats["queue_wait_s"] = round(stats["queue_wait_s"], 3)
+        slowest = sorted(by_chunk.items(), key=lambda item: item[1]["latency_s"], reverse=True)[:self.slowest]
+
+        return {
+            "started_at": datetime.fromtimestamp(self.started_at).isoformat(timespec="seconds"),
+            "elapsed_s": round(time.time() - self.started_at, 3),
+            "tours": tours,
+            "calls": len(calls),
+            "chunks": len(by_chunk),
+            "retries": sum(call["retries"] for call in calls),
+            "outcomes": outcomes,
+            "tokens": {
+                "prompt": sum(call["prompt_tokens"] for call in calls),
+                "completion": sum(call["completion_tokens"] for call in calls),
+            },
+            "cost_usd": self.total_cost(calls),
+            "latency_s": _distribution([call["latency_s"] for call in calls]),
+            "queue_wait_s": _distribution([call["queue_wait_s"] for call in calls]),
+            "completion_tokens": _distribution([call["completion_tokens"] for call in calls]),
+            "cost_by_model": by_model,
+            "slowest_chunks": [dict(chunk=name, **stats) for name, stats in slowest],
+            "per_chunk": {name: [c for c in calls if c["chunk"] == name] for name in by_chunk},
+        }
+
+    @staticmethod
+    def total_cost(calls: List[Dict[str, Any]]) -> Optional[float]:
+        """Custo somado das chamadas (ou documentos); None se algum veio de modelo sem preço"""
+        total = 0.0
+        for call in calls:
+            total = add_cost(total, call["cost_usd"])
+        return _round_cost(total)
+
+    def write(self, path: str, tours: int = 0) -> Dict[str, Any]:
+        """Grava o resumo da execução em JSON"""
+        summary = self.summary(tours)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+        return summary
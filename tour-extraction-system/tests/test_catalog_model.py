@@ -0,0 +1,66 @@
+"""
+Ida e volta do catálogo compacto: from_dict(x).to_dict() devolve x.
+
+Uso (na raiz do projeto):
+    python -m pytest tests
+"""
+from src.core.catalog_model import CompactCatalog
+
+
+def catalog(*tours):
+    return {"agency": "Ag", "product": {"type": "Tours", "year": 2025}, "tours": list(tours)}
+
+
+def round_trip(data):
+    return CompactCatalog.from_dict(data).to_dict()
+
+
+def test_round_trip_schema_tour():
+    data = catalog({
+        "id": "1",
+        "city": "Paris",
+        "title": "Louvre Museum",
+        "location": {"main": "Paris", "region": "Ile-de-France", "zone": "Zona 1"},
+        "duration": {"quantity": 3.5, "unit": "hours"},
+        "pricing_type": "per_vehicle",
+        "options": [{"name_option": "Privado", "details": [
+            {"capacity": "01-03 pax", "vehicle_options": "car", "price": {"quantity": 625, "currency": "EUR"}},
+            {"capacity": "04-06 pax", "vehicle_options": "van", "price": {"quantity": 710.5, "currency": "EUR"}},
+        ]}],
+        "pricing_matrix": [{"pax_count": 2, "price": 21, "currency": "USD"}],
+        "schedule": {"departure_time": "08:30", "frequency": "Diário"},
+        "includes": ["Guia"],
+        "operation": {"non_operating_periods": ["01 May"]},
+        "min_booking": 2,
+        "source_chunks": ["page_001.md"],
+    })
+    assert round_trip(data) == data
+
+
+def test_round_trip_keeps_nested_keys_outside_schema():
+    data = catalog({
+        "title": "Seine Cruise",
+        "location": {"main": "Paris", "landmark": "Pont Neuf"},
+        "duration": {"quantity": 1, "unit": "hours", "approx": True},
+        "schedule": {"departure_time": "10:00", "days": ["Mon", "Tue"]},
+        "operation": {"non_operating_periods": [], "notes": "x"},
+        "options": [{"name_option": "Shared", "notes": "sem guia", "details": [
+            {"capacity": "all", "vehicle_options": None, "season": "alta",
+             "price": {"quantity": "sob consulta", "currency": "EUR", "per": "pax"}},
+        ]}],
+        "pricing_matrix": [{"pax_count": 1, "price": 30, "currency": "EUR", "child": 15}],
+        "rating": 4.5,
+    })
+    assert round_trip(data) == data
+
+
+def test_round_trip_keeps_shapes_outside_schema():
+    data = catalog(
+        {"title": "A", "location": "Paris centro", "duration": "3 horas", "operation": "Diário"},
+        {"title": "B", "operation": {"non_operating_periods": "Domingos"}, "includes": "Guia"},
+        {"title": "C", "options": [{"name_option": "X", "details": "consultar"}],
+         "pricing_matrix": [{"pax_count": 1, "price": 10, "currency": "EUR"}]},
+        {"title": "D", "options": [{"name_option": "Y", "details": [
+            {"capacity": "all", "vehicle_options": None, "price": "sob consulta"}]}]},
+    )
+    assert round_trip(data) == data
@@ -0,0 +1,86 @@
+"""
+Pool de endpoints: escolha pela folga no orçamento e circuit breaker.
+
+Uso (na raiz do projeto):
+    python -m pytest tests
+"""
+import time
+import logging
+
+from src.utils import endpoint_pool
+from src.utils.endpoint_pool import Endpoint, EndpointPool, OUTPUT_TOKENS_RESERVE
+
+
+def pool(*endpoints, **kwargs):
+    return EndpointPool(list(endpoints), logging.getLogger("test"), **kwargs)
+
+
+def test_acquire_picks_endpoint_with_most_headroom():
+    busy = Endpoint("busy", None, "k", rpm=10, tpm=0)
+    idle = Endpoint("idle", None, "k", rpm=10, tpm=0)
+    endpoints = pool(busy, idle)
+    busy.requests.extend([time.time()] * 5)
+
+    lease = endpoints.acquire(100)
+    assert lease.endpoint is idle
+    assert lease.entry[1] == 100 + OUTPUT_TOKENS_RESERVE
+    # O ocioso segue escolhido até também ter 5 de 10 requisições; no empate vence o primeiro da lista
+    assert [endpoints.acquire(100).endpoint.name for _ in range(4)] == ["idle"] * 4
+    assert endpoints.acquire(100).endpoint.name == "busy"
+
+
+def test_acquire_skips_endpoint_without_token_budget():
+    small = Endpoint("small", None, "k", rpm=0, tpm=5000)
+    large = Endpoint("large", None, "k", rpm=0, tpm=100000)
+    small.tokens.append([time.time(), 1000])
+    endpoints = pool(small, large)
+
+    assert endpoints.acquire(4000).endpoint is large
+    assert endpoints.acquire(100, exclude={"large"}).endpoint is small
+    assert endpoints.acquire(100, exclude={"small", "large"}) is None
+
+
+def test_release_replaces_estimate_with_real_usage():
+    endpoint = Endpoint("a", None, "k", rpm=0, tpm=0)
+    endpoints = pool(endpoint)
+    lease = endpoints.acquire(100)
+    endpoints.release(lease, {"prompt_tokens": 70, "completion_tokens": 30}, 0.5)
+    assert endpoint.tokens == [[lease.entry[0], 100]]
+    assert endpoint.stats["requests"] == 1 and endpoint.stats["tokens"] == 100
+
+
+def test_breaker_trips_and_half_opens(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(endpoint_pool.time, "time", lambda: clock[0])
+    flaky = Endpoint("flaky", None, "k", rpm=0, tpm=0)
+    backup = Endpoint("backup", None, "k", rpm=0, tpm=0)
+    endpoints = pool(flaky, backup, failure_threshold=2, cooldown_s=30)
+
+    lease = endpoints.acquire(10, exclude={"backup"})
+    endpoints.release(lease, {}, 0.1, ok=False)
+    assert flaky.open_until == 0.0
+    lease = endpoints.acquire(10, exclude={"backup"})
+    endpoints.release(lease, {}, 0.1, ok=False)
+    assert flaky.open_until == 1030.0
+    assert flaky.stats["breaker_trips"] == 1
+
+    # Fora de rotação durante o cooldown
+    assert flaky.headroom(clock[0], 10) is None
+    assert endpoints.acquire(10).endpoint is backup
+
+    # Meia-abertura: após o cooldown uma única falha reabre o circuito
+    clock[0] = 1031.0
+    lease = endpoints.acquire(10, exclude={"backup"})
+    assert lease.endpoint is flaky
+    endpoints.release(lease, {}, 0.1, ok=False)
+    assert flaky.open_until == 1061.0
+    assert flaky.stats["breaker_trips"] == 2
+
+    # Um sucesso após o cooldown fecha o circuito
+    clock[0] = 1062.0
+    lease = endpoints.acquire(10, exclude={"backup"})
+    endpoints.release(lease, {}, 0.1)
+    assert flaky.failures == 0
+    lease = endpoints.acquire(10, exclude={"backup"})
+    endpoints.release(lease, {}, 0.1, ok=False)
+    assert flaky.open_until == 1061.0
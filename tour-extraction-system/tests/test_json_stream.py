@@ -0,0 +1,85 @@
+"""
+Parser incremental e recuperação de respostas JSON truncadas ou malformadas.
+
+Uso (na raiz do projeto):
+    python -m pytest tests
+"""
+from src.utils.json_stream import TourStreamParser, clean_json_text, recover_json
+
+
+def test_stream_emits_each_tour_when_it_closes():
+    seen = []
+    parser = TourStreamParser(lambda tour, chunk: seen.append((tour["title"], chunk)))
+    assert parser.feed('```json\n{"tours": [{"title": "Louvre", "city": "Paris"}') == [
+        {"title": "Louvre", "city": "Paris"}
+    ]
+    assert parser.feed(', {"title": "Seine') == []
+    assert parser.feed(' Cruise"}]}\n```') == [{"title": "Seine Cruise"}]
+    assert seen == [("Louvre", None), ("Seine Cruise", None)]
+    assert parser.complete
+
+
+def test_stream_ignores_braces_and_quotes_inside_strings():
+    parser = TourStreamParser()
+    text = '{"tours": [{"title": "Tour {VIP} [2h]", "observations": "diz \\"}]\\" no folheto"}]}'
+    for char in text:
+        parser.feed(char)
+    assert parser.tours == [{"title": "Tour {VIP} [2h]", "observations": 'diz "}]" no folheto'}]
+    assert parser.complete and parser.damaged == 0
+
+
+def test_stream_ignores_nested_lists_named_tours():
+    parser = TourStreamParser()
+    parser.feed('{"tours": [{"title": "A", "extra": {"tours": []}, "options": [{"name_option": "X"}]}]}')
+    assert [tour["title"] for tour in parser.tours] == ["A"]
+
+
+def test_recover_truncated_tail():
+    data, info = recover_json('{"tours": [{"title": "Louvre", "city": "Paris"}, {"title": "Seine Cru')
+    assert data == {"tours": [{"title": "Louvre", "city": "Paris"}]}
+    assert info == {"truncated": True, "salvaged": 1, "damaged": 0, "last_chunk": None}
+
+
+def test_recover_trailing_commas_and_comments():
+    text = """{
+      // tours da página
+      "tours": [
+        {"title": "Louvre", "url": "https://louvre.fr", "includes": ["Guia", "Ingresso",],},  /* fim */
+      ],
+    }"""
+    data, info = recover_json(text)
+    assert data == {"tours": [{"title": "Louvre", "url": "https://louvre.fr", "includes": ["Guia", "Ingresso"]}]}
+    assert not info["truncated"] and info["salvaged"] == 0
+
+
+def test_clean_keeps_comment_markers_and_commas_inside_strings():
+    text = '{"note": "a // b, /* c */", "list": ["x,]"],}'
+    assert clean_json_text(text) == '{"note": "a // b, /* c */", "list": ["x,]"]}'
+
+
+def test_recover_skips_damaged_tour():
+    data, info = recover_json('{"tours": [{"title": "A"}, {"title": "B" "city": "X"}, {"title": "C"}]')
+    assert data == {"tours": [{"title": "A"}, {"title": "C"}]}
+    assert info["damaged"] == 1 and info["salvaged"] == 2
+
+
+def test_recover_packed_chunks_truncated():
+    text = ('{"chunks": [{"chunk": "page_001.md", "tours": [{"title": "A"}, {"title": "B"}]}, '
+            '{"chunk": "page_002.md", "tours": [{"title": "C"}, {"title": "D", "ci')
+    data, info = recover_json(text)
+    assert data == {"chunks": [
+        {"chunk": "page_001.md", "tours": [{"title": "A"}, {"title": "B"}]},
+        {"chunk": "page_002.md", "tours": [{"title": "C"}]},
+    ]}
+    assert info["truncated"] and info["last_chunk"] == "page_002.md"
+
+
+def test_recover_packed_chunk_cut_before_its_tours():
+    # A página cortada antes do primeiro tour fica só em last_chunk (refeita por quem chamou)
+    data, info = recover_json('{"chunks": [{"chunk": "page_001.md", "tours": [{"title": "A"}]}, {"chunk": "page_002.md"')
+    assert data == {"chunks": [{"chunk": "page_001.md", "tours": [{"title": "A"}]}]}
+    assert info["last_chunk"] == "page_002.md"
+
+
+def test_recover_without_json():
+    assert recover_json("Não encontrei tours nesta página.")[0] is None
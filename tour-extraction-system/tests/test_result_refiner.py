@@ -0,0 +1,40 @@
+"""
+Refinamento com preços nulos ou não numéricos ("sob consulta").
+
+Uso (na raiz do projeto):
+    python -m pytest tests
+"""
+import logging
+import dataclasses
+
+import pandas as pd
+
+from src.core.config import SystemConfig
+from src.processors.result_refiner import ResultRefiner
+
+
+def tour(title, *prices):
+    details = [{"capacity": "1-2", "vehicle_options": None, "price": {"quantity": p, "currency": "EUR"}}
+               for p in prices]
+    return {"title": title, "city": "Paris", "location": {"main": "Paris"},
+            "options": [{"name_option": "Privado", "details": details}]}
+
+
+def refiner(tmp_path):
+    config = dataclasses.replace(SystemConfig.from_yaml("config/settings.yaml"), results_dir=str(tmp_path))
+    return ResultRefiner(config, logging.getLogger("test"))
+
+
+def test_refine_with_null_and_text_prices(tmp_path):
+    tours = [
+        tour("Louvre Museum", None),
+        tour("Seine Cruise", "sob consulta"),
+        tour("Eiffel Tower", "sob consulta", 120, None, 95),
+    ]
+    path = refiner(tmp_path).refine({"tours": tours})
+
+    refined = pd.read_excel(path).set_index("Title")
+    assert pd.isna(refined.loc["Louvre Museum", "Price"])
+    assert pd.isna(refined.loc["Seine Cruise", "Price"])
+    assert refined.loc["Eiffel Tower", "Price"] == 95
+    assert refined.loc["Eiffel Tower", "Currency"] == "EUR"
@@ -0,0 +1,42 @@
+"""
+Fusão de duplicatas entre chunks: o dono é o chunk onde o tour aparece.
+
+Uso (na raiz do projeto):
+    python -m pytest tests
+"""
+import logging
+
+from src.processors.tour_merger import TourMerger
+
+
+TEXTS = {
+    "page_001.md": "EIFFEL TOWER - 2h - 90 EUR\nVer também o passeio seguinte.",
+    "page_002.md": "LOUVRE MUSEUM - 3h - 120 EUR",
+}
+
+
+def merge(*tours):
+    return TourMerger(logging.getLogger("test")).merge([dict(t) for t in tours], TEXTS)
+
+
+def test_owner_is_chunk_whose_text_contains_the_title():
+    # Vizinho que só viu o tour como contexto de referência, com mais campos preenchidos
+    reference = {"title": "Louvre Museum", "city": "Paris", "source_chunks": ["page_001.md"],
+                 "description": "Visita guiada", "meeting_point": "Hotel lobby"}
+    own = {"title": "Louvre Museum", "city": "Paris", "source_chunks": ["page_002.md"],
+           "meeting_point": "Pirâmide"}
+
+    [tour] = merge(reference, own)
+    assert tour["source_chunks"] == ["page_002.md"]
+    assert tour["meeting_point"] == "Pirâmide"
+    assert tour["description"] == "Visita guiada"
+
+
+def test_first_in_document_without_evidence():
+    first = {"title": "Seine Cruise", "city": "Paris", "source_chunks": ["page_001.md"]}
+    second = {"title": "Seine Cruise", "city": "Paris", "source_chunks": ["page_002.md"],
+              "description": "Passeio de barco", "duration": {"quantity": 1, "unit": "hours"}}
+
+    [tour] = merge(first, second)
+    assert tour["source_chunks"] == ["page_001.md"]
+    assert tour["description"] == "Passeio de barco"